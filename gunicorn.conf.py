@@ -0,0 +1,47 @@
+"""
+Gunicorn settings for the production WSGI deployment, loaded
+automatically by `gunicorn theatre_service_api.wsgi` run from the
+project root. Every value can be overridden from the environment.
+"""
+
+import multiprocessing
+import os
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8000")
+
+# Requests spend most of their time waiting on PostgreSQL, so run a few
+# threads per process on top of the usual 2 * cores + 1 processes
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "gthread")
+workers = int(
+    os.getenv("GUNICORN_WORKERS", multiprocessing.cpu_count() * 2 + 1)
+)
+threads = int(os.getenv("GUNICORN_THREADS", 4))
+
+# Recycle workers now and then so slow leaks cannot pile up, the jitter
+# keeps them from restarting all at once
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", 1000))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", 100))
+
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 30))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", 30))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", 5))
+
+# Load Django once in the master, workers fork with it already imported
+preload_app = os.getenv("GUNICORN_PRELOAD", "true").lower() == "true"
+reload = os.getenv("GUNICORN_RELOAD", "false").lower() == "true"
+
+# Heartbeat files in memory, the container filesystem can stall them
+worker_tmp_dir = os.getenv("GUNICORN_WORKER_TMP_DIR", "/dev/shm")
+
+accesslog = "-"
+errorlog = "-"
+
+
+def pre_fork(server, worker):
+    """
+    Close connections the master opened while preloading, a socket
+    inherited by several workers would be shared between them
+    """
+    from django.db import connections
+
+    connections.close_all()
@@ -7,6 +7,7 @@ from theatre.models import (
     Play,
     Performance,
     Reservation,
+    SeatHold,
     Ticket
 )
 
@@ -17,3 +18,4 @@ admin.site.register(Play)
 admin.site.register(Performance)
 admin.site.register(Reservation)
 admin.site.register(Ticket)
+admin.site.register(SeatHold)
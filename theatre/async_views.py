@@ -0,0 +1,210 @@
+from functools import partial
+
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ObjectDoesNotExist, ValidationError
+from django.db.models import prefetch_related_objects
+from django.http import Http404
+from django.utils.decorators import classonlymethod
+from django.views import View
+from rest_framework.response import Response
+
+from theatre.cache import CatalogCacheMixin
+from theatre.search import uses_search_vector
+from theatre.views import PerformanceViewSet, PlayViewSet
+from user.authentication import aauthenticate
+
+
+async def alist(queryset):
+    """
+    Evaluate queryset with the async ORM. aiterator() refuses
+    prefetch_related() on Django 4.1, so the lookups are prefetched
+    once for all fetched objects in a worker thread.
+    """
+    lookups = queryset._prefetch_related_lookups
+    objects = [
+        obj async for obj in queryset.prefetch_related(None).aiterator()
+    ]
+    if objects and lookups:
+        await sync_to_async(prefetch_related_objects)(objects, *lookups)
+    return objects
+
+
+async def apaginate(paginator, queryset, request):
+    """Limit/offset page of TheatrePagination, fetched asynchronously"""
+    paginator.keyset = None
+    paginator.request = request
+    paginator.limit = paginator.get_limit(request)
+    if paginator.limit is None:
+        return None
+
+    offset = paginator.offset = paginator.get_offset(request)
+    limit = paginator.limit
+
+    if request.query_params.get(paginator.count_query_param) == "false":
+        paginator.count = None
+        results = await alist(queryset[offset:offset + limit + 1])
+        paginator.has_next = len(results) > limit
+        return results[:limit]
+
+    paginator.count = await queryset.acount()
+    if paginator.count == 0 or offset > paginator.count:
+        return []
+    return await alist(queryset[offset:offset + limit])
+
+
+class AsyncReadView(View):
+    """
+    Serve one read action of a DRF viewset with the async ORM, so that
+    an ASGI worker is not tied up while the database answers.
+    Authentication, permissions, throttles, pagination, serializers and
+    the catalog cache are the viewset's own. Other methods, and reads
+    this view cannot do asynchronously, are passed to the viewset.
+    """
+
+    viewset_class = None
+    action = None
+    # router method -> action mapping of the URL, used for the sync path
+    actions = None
+    # relations the serializer reads on top of the viewset queryset
+    prefetch = ()
+    sync_view = None
+
+    @classonlymethod
+    def as_view(cls, **initkwargs):
+        sync_view = cls.viewset_class.as_view(cls.actions)
+        view = super().as_view(sync_view=sync_view, **initkwargs)
+        view.csrf_exempt = True
+        return view
+
+    async def dispatch(self, request, *args, **kwargs):
+        if request.method != "GET":
+            return await self.run_sync(request, *args, **kwargs)
+        return await self.get(request, *args, **kwargs)
+
+    async def run_sync(self, request, *args, **kwargs):
+        return await sync_to_async(self.sync_view)(request, *args, **kwargs)
+
+    def handles(self, viewset, request):
+        """Whether this request can be served asynchronously"""
+        return True
+
+    async def get(self, request, *args, **kwargs):
+        viewset = self.viewset_class()
+        viewset.action_map = {"get": self.action}
+        viewset.args = args
+        viewset.kwargs = kwargs
+        drf_request = viewset.initialize_request(request, *args, **kwargs)
+        viewset.request = drf_request
+        viewset.headers = viewset.default_response_headers
+
+        if not self.handles(viewset, drf_request):
+            return await self.run_sync(request, *args, **kwargs)
+
+        handler = partial(getattr(self, self.action), viewset)
+        try:
+            await self.initial(viewset, drf_request, *args, **kwargs)
+            if isinstance(viewset, CatalogCacheMixin):
+                response = await viewset.acached_response(
+                    handler, drf_request, *args, **kwargs
+                )
+            else:
+                response = await handler(drf_request, *args, **kwargs)
+        except Exception as exc:
+            response = viewset.handle_exception(exc)
+
+        return viewset.finalize_response(
+            drf_request, response, *args, **kwargs
+        )
+
+    @staticmethod
+    async def initial(viewset, request, *args, **kwargs):
+        """APIView.initial() with the authentication done asynchronously"""
+        viewset.format_kwarg = viewset.get_format_suffix(**kwargs)
+        negotiated = viewset.perform_content_negotiation(request)
+        request.accepted_renderer, request.accepted_media_type = negotiated
+        request.version, request.versioning_scheme = (
+            viewset.determine_version(request, *args, **kwargs)
+        )
+
+        await aauthenticate(request)
+        viewset.check_permissions(request)
+        await sync_to_async(viewset.check_throttles)(request)
+
+    async def list(self, viewset, request, *args, **kwargs):
+        queryset = viewset.filter_queryset(viewset.get_queryset())
+        queryset = queryset.prefetch_related(*self.prefetch)
+
+        page = await apaginate(viewset.paginator, queryset, request)
+        if page is None:
+            serializer = viewset.get_serializer(
+                await alist(queryset), many=True
+            )
+            return Response(serializer.data)
+
+        serializer = viewset.get_serializer(page, many=True)
+        return viewset.get_paginated_response(serializer.data)
+
+    async def retrieve(self, viewset, request, *args, **kwargs):
+        queryset = viewset.filter_queryset(viewset.get_queryset())
+        lookup_url_kwarg = viewset.lookup_url_kwarg or viewset.lookup_field
+
+        try:
+            instance = await queryset.prefetch_related(*self.prefetch).aget(
+                **{viewset.lookup_field: kwargs[lookup_url_kwarg]}
+            )
+        except (ObjectDoesNotExist, TypeError, ValueError, ValidationError):
+            raise Http404
+
+        viewset.check_object_permissions(request, instance)
+        return Response(viewset.get_serializer(instance).data)
+
+
+class AsyncListView(AsyncReadView):
+    action = "list"
+    actions = {"get": "list", "post": "create"}
+
+    def handles(self, viewset, request):
+        return not viewset.paginator.wants_cursor(request)
+
+
+class AsyncDetailView(AsyncReadView):
+    action = "retrieve"
+    actions = {
+        "get": "retrieve",
+        "put": "update",
+        "patch": "partial_update",
+        "delete": "destroy",
+    }
+
+
+class PlayListView(AsyncListView):
+    viewset_class = PlayViewSet
+
+    def handles(self, viewset, request):
+        # the in-process search index used without PostgreSQL is built
+        # synchronously, tsvector search is an ordinary query
+        if "search" in request.query_params and not uses_search_vector():
+            return False
+        return super().handles(viewset, request)
+
+
+class PlayDetailView(AsyncDetailView):
+    viewset_class = PlayViewSet
+
+
+class PerformanceListView(AsyncListView):
+    viewset_class = PerformanceViewSet
+
+    def handles(self, viewset, request):
+        # date and play lists are materialized, a cache read away
+        if viewset.schedule_scope(request) is not None:
+            return False
+        return super().handles(viewset, request)
+
+
+class PerformanceDetailView(AsyncDetailView):
+    viewset_class = PerformanceViewSet
+    prefetch = ("play__genres", "play__actors", "tickets")
+
+    def handles(self, viewset, request):
+        return request.query_params.get("seatmap") != "bitmap"
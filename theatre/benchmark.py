@@ -0,0 +1,333 @@
+import statistics
+import time
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from theatre.models import (
+    Actor,
+    Genre,
+    Performance,
+    Play,
+    Reservation,
+    TheatreHall,
+    Ticket,
+)
+from user.serializers import JWTObtainPairSerializer
+
+WORDS = (
+    "love war night king queen shadow river winter garden letter storm "
+    "mother father stranger city forest ghost wedding journey secret "
+    "summer house crown sea fire glass silver dream promise island"
+).split()
+
+# rows generated by default, each can be scaled from the command line
+DEFAULT_SIZES = {
+    "halls": 10,
+    "genres": 20,
+    "actors": 500,
+    "plays": 200,
+    "performances": 2000,
+    "users": 200,
+    "reservations": 2000,
+}
+
+TICKETS_PER_RESERVATION = 3
+BATCH_SIZE = 5000
+
+# a performance's show_time minus its predecessor's end_time in a hall
+INTERVAL = timedelta(minutes=30)
+
+
+def seat_at(index, theatre_hall):
+    """(row, seat) of the index-th seat of a hall in row-major order"""
+    return (
+        index // theatre_hall.seats_in_row + 1,
+        index % theatre_hall.seats_in_row + 1,
+    )
+
+
+def generate_dataset(rng, sizes, password):
+    """
+    Catalog, schedule, users and sales with bulk_create, sized by sizes
+    (see DEFAULT_SIZES). Performances follow each other in their halls
+    and tickets fill every performance from its first seat.
+    """
+    halls = TheatreHall.objects.bulk_create(
+        TheatreHall(
+            name=f"Benchmark hall {number}",
+            rows=rng.randint(10, 30),
+            seats_in_row=rng.randint(15, 40),
+        )
+        for number in range(sizes["halls"])
+    )
+    genres = Genre.objects.bulk_create(
+        Genre(name=f"Benchmark {rng.choice(WORDS)} {number}")
+        for number in range(sizes["genres"])
+    )
+    actors = Actor.objects.bulk_create(
+        (
+            Actor(
+                first_name=rng.choice(WORDS).title(),
+                last_name=rng.choice(WORDS).title(),
+            )
+            for _ in range(sizes["actors"])
+        ),
+        batch_size=BATCH_SIZE,
+    )
+    plays = Play.objects.bulk_create(
+        (
+            Play(
+                title=" ".join(rng.sample(WORDS, 3)).title(),
+                description=" ".join(rng.choices(WORDS, k=30)),
+                duration=rng.randint(60, 180),
+            )
+            for _ in range(sizes["plays"])
+        ),
+        batch_size=BATCH_SIZE,
+    )
+    Play.genres.through.objects.bulk_create(
+        (
+            Play.genres.through(play=play, genre=genre)
+            for play in plays
+            for genre in rng.sample(genres, min(2, len(genres)))
+        ),
+        batch_size=BATCH_SIZE,
+    )
+    Play.actors.through.objects.bulk_create(
+        (
+            Play.actors.through(play=play, actor=actor)
+            for play in plays
+            for actor in rng.sample(actors, min(4, len(actors)))
+        ),
+        batch_size=BATCH_SIZE,
+    )
+
+    first_show = timezone.now().replace(
+        minute=0, second=0, microsecond=0
+    ) + timedelta(days=1)
+    next_show = {hall.id: first_show for hall in halls}
+    schedule = []
+    for number in range(sizes["performances"]):
+        theatre_hall = halls[number % len(halls)]
+        play = rng.choice(plays)
+        show_time = next_show[theatre_hall.id]
+        end_time = show_time + timedelta(minutes=play.duration)
+        next_show[theatre_hall.id] = end_time + INTERVAL
+        schedule.append(
+            Performance(
+                play=play,
+                theatre_hall=theatre_hall,
+                show_time=show_time,
+                end_time=end_time,
+            )
+        )
+    performances = Performance.objects.bulk_create(
+        schedule, batch_size=BATCH_SIZE
+    )
+
+    hashed_password = make_password(password)
+    users = get_user_model().objects.bulk_create(
+        (
+            get_user_model()(
+                email=f"benchmark{number}@example.com",
+                password=hashed_password,
+            )
+            for number in range(sizes["users"])
+        ),
+        batch_size=BATCH_SIZE,
+    )
+
+    reservations = Reservation.objects.bulk_create(
+        (
+            Reservation(user=rng.choice(users))
+            for _ in range(sizes["reservations"])
+        ),
+        batch_size=BATCH_SIZE,
+    )
+    tickets = []
+    for reservation in reservations:
+        performance = rng.choice(performances)
+        theatre_hall = performance.theatre_hall
+        if (
+            performance.tickets_sold + TICKETS_PER_RESERVATION
+            > theatre_hall.capacity
+        ):
+            continue
+        for _ in range(TICKETS_PER_RESERVATION):
+            row, seat = seat_at(performance.tickets_sold, theatre_hall)
+            tickets.append(
+                Ticket(
+                    row=row,
+                    seat=seat,
+                    performance=performance,
+                    reservation=reservation,
+                )
+            )
+            performance.tickets_sold += 1
+    Ticket.objects.bulk_create(tickets, batch_size=BATCH_SIZE)
+    Performance.objects.bulk_update(
+        performances, ["tickets_sold"], batch_size=BATCH_SIZE
+    )
+
+    return {
+        "plays": plays,
+        "performances": performances,
+        "users": users,
+        "password": password,
+        "reservations": reservations,
+        "tickets": len(tickets),
+    }
+
+
+class BenchmarkClient:
+    """
+    Requests of the benchmarked paths against a generated dataset. Each
+    method picks what to request and returns the request to time.
+    """
+
+    def __init__(self, client, dataset, rng):
+        self.client = client
+        self.dataset = dataset
+        self.rng = rng
+        self.user = dataset["reservations"][0].user
+        access = JWTObtainPairSerializer.get_token(self.user).access_token
+        self.auth = {"HTTP_AUTHORIZATION": f"Bearer {access}"}
+
+    def get(self, path):
+        return lambda: self.client.get(path, **self.auth)
+
+    def play_list(self):
+        return self.get(reverse("theatre:play-list"))
+
+    def play_detail(self):
+        play = self.rng.choice(self.dataset["plays"])
+        return self.get(reverse("theatre:play-detail", args=[play.id]))
+
+    def performance_list(self):
+        return self.get(reverse("theatre:performance-list"))
+
+    def performance_detail(self):
+        performance = self.rng.choice(self.dataset["performances"])
+        return self.get(
+            reverse("theatre:performance-detail", args=[performance.id])
+        )
+
+    def reservation_create(self):
+        performance = self.rng.choice(
+            [
+                performance
+                for performance in self.dataset["performances"]
+                if performance.tickets_sold + 2
+                <= performance.theatre_hall.capacity
+            ]
+        )
+        tickets = []
+        for _ in range(2):
+            row, seat = seat_at(
+                performance.tickets_sold, performance.theatre_hall
+            )
+            tickets.append(
+                {"row": row, "seat": seat, "performance": performance.id}
+            )
+            performance.tickets_sold += 1
+
+        return lambda: self.client.post(
+            reverse("theatre:reservation-list"),
+            {"tickets": tickets},
+            format="json",
+            **self.auth,
+        )
+
+    def reservation_list(self):
+        return self.get(reverse("theatre:reservation-list"))
+
+    def login(self):
+        user = self.rng.choice(self.dataset["users"])
+        return lambda: self.client.post(
+            reverse("user:token_obtain_pair"),
+            {"email": user.email, "password": self.dataset["password"]},
+            format="json",
+        )
+
+
+# benchmark name -> BenchmarkClient method, default iterations
+BENCHMARKS = {
+    "play-list": ("play_list", 50),
+    "play-detail": ("play_detail", 50),
+    "performance-list": ("performance_list", 50),
+    "performance-detail": ("performance_detail", 50),
+    "reservation-create": ("reservation_create", 50),
+    "reservation-list": ("reservation_list", 50),
+    # password hashing makes logins slow on purpose
+    "login": ("login", 5),
+}
+
+
+def percentile(timings, share):
+    timings = sorted(timings)
+    return timings[max(int(len(timings) * share + 0.5) - 1, 0)]
+
+
+def run_benchmark(prepare, iterations, warm_cache=False):
+    """
+    Time iterations of the requests prepare() returns, reading the cache
+    cold unless warm_cache. Returns timings in milliseconds and the most
+    queries one request ran.
+    """
+    timings = []
+    queries = 0
+    for _ in range(iterations):
+        request = prepare()
+        if not warm_cache:
+            cache.clear()
+
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            response = request()
+            timings.append((time.perf_counter() - started) * 1000)
+
+        if response.status_code >= 400:
+            raise RuntimeError(
+                f"{prepare.__name__} answered {response.status_code}: "
+                f"{response.content[:200]!r}"
+            )
+        queries = max(queries, len(captured))
+
+    return {
+        "iterations": iterations,
+        "p50_ms": round(statistics.median(timings), 3),
+        "p95_ms": round(percentile(timings, 0.95), 3),
+        "mean_ms": round(statistics.fmean(timings), 3),
+        "queries": queries,
+    }
+
+
+def compare_results(baseline, results, tolerance):
+    """
+    Regressions of results against a baseline: any extra query, or a
+    median slower by more than tolerance (0.2 is 20%)
+    """
+    regressions = []
+    for name, result in results.items():
+        before = baseline.get(name)
+        if before is None:
+            continue
+
+        if result["queries"] > before["queries"]:
+            regressions.append(
+                f"{name}: {result['queries']} queries, "
+                f"baseline {before['queries']}"
+            )
+        if result["p50_ms"] > before["p50_ms"] * (1 + tolerance):
+            regressions.append(
+                f"{name}: p50 {result['p50_ms']:.2f}ms, "
+                f"baseline {before['p50_ms']:.2f}ms"
+            )
+    return regressions
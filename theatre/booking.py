@@ -0,0 +1,105 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Min, Q
+from django.utils import timezone
+
+from theatre.exceptions import SeatsTaken
+from theatre.models import Performance, SeatHold, Ticket
+
+
+def lock_performances(performance_ids):
+    """
+    Serialize seat writes per performance: lock the performance rows
+    in a stable order so concurrent bookings queue instead of deadlocking.
+    Must be called inside a transaction.
+    """
+    list(
+        Performance.objects.select_for_update()
+        .filter(pk__in=performance_ids)
+        .order_by("pk")
+        .values_list("pk", flat=True)
+    )
+
+
+def taken_seats(seats, user_id):
+    """
+    Return the (performance_id, row, seat) triples out of seats
+    that are sold or held by somebody other than the user
+    """
+    if not seats:
+        return set()
+
+    lookup = {
+        "performance_id__in": {seat[0] for seat in seats},
+        "row__in": {seat[1] for seat in seats},
+        "seat__in": {seat[2] for seat in seats},
+    }
+    sold = (
+        Ticket.objects.filter(**lookup)
+        .order_by()
+        .values_list("performance_id", "row", "seat")
+    )
+    held = (
+        SeatHold.objects.filter(expires_at__gt=timezone.now(), **lookup)
+        .exclude(user_id=user_id)
+        .order_by()
+        .values_list("performance_id", "row", "seat")
+    )
+    return set(seats).intersection(sold.union(held))
+
+
+def release_holds(user_id, seats):
+    """Drop the user's holds on seats and expired holds around them"""
+    requested = Q()
+    for performance_id, row, seat in seats:
+        requested |= Q(performance_id=performance_id, row=row, seat=seat)
+
+    SeatHold.objects.filter(
+        (Q(user_id=user_id) & requested)
+        | Q(
+            performance_id__in={seat[0] for seat in seats},
+            expires_at__lte=timezone.now(),
+        )
+    ).delete()
+
+
+def hold_seats(user_id, performance, seats):
+    """
+    Hold (row, seat) pairs of the performance for the user
+    for SEAT_HOLD_TTL_SECONDS, in place of the seats the user held
+    there before. Holding again does not extend the first hold, the
+    seats are released when it would have expired. Must be called
+    inside a transaction, raises SeatsTaken listing the seats somebody
+    else got first.
+    """
+    seats = {(performance.id, row, seat) for row, seat in seats}
+    lock_performances([performance.id])
+
+    taken = taken_seats(seats, user_id)
+    if taken:
+        raise SeatsTaken(taken)
+
+    now = timezone.now()
+    previous = SeatHold.objects.filter(
+        performance=performance, user_id=user_id
+    )
+    first_expiry = previous.filter(expires_at__gt=now).aggregate(
+        expires_at=Min("expires_at")
+    )["expires_at"]
+    previous.delete()
+    release_holds(user_id, seats)
+
+    expires_at = now + timedelta(seconds=settings.SEAT_HOLD_TTL_SECONDS)
+    if first_expiry is not None:
+        expires_at = min(expires_at, first_expiry)
+    return SeatHold.objects.bulk_create(
+        SeatHold(
+            performance=performance,
+            user_id=user_id,
+            row=row,
+            seat=seat,
+            expires_at=expires_at,
+        )
+        for _, row, seat in sorted(seats)
+    )
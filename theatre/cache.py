@@ -0,0 +1,105 @@
+import hashlib
+import json
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.http import parse_etags, urlencode
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+
+CATALOG_VERSION_KEY = "catalog:version"
+
+
+def get_catalog_version():
+    version = cache.get(CATALOG_VERSION_KEY)
+    if version is None:
+        cache.add(CATALOG_VERSION_KEY, time.time_ns(), timeout=None)
+        version = cache.get(CATALOG_VERSION_KEY)
+    return version
+
+
+def invalidate_catalog():
+    """Retire every cached catalog response by moving to a new version"""
+    cache.set(CATALOG_VERSION_KEY, time.time_ns(), timeout=None)
+
+
+def catalog_cache_key(request):
+    query = urlencode(sorted(request.query_params.lists()), doseq=True)
+    url = f"{request.build_absolute_uri(request.path)}?{query}"
+    digest = hashlib.md5(url.encode()).hexdigest()
+    return f"catalog:{get_catalog_version()}:{digest}"
+
+
+def make_etag(data):
+    content = json.dumps(data, cls=JSONEncoder, sort_keys=True)
+    return f'"{hashlib.md5(content.encode()).hexdigest()}"'
+
+
+class CatalogCacheMixin:
+    """
+    Serve successful responses from the cache until the catalog changes.
+    Permissions and throttles still run, only the handler is skipped.
+    """
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        key = catalog_cache_key(request)
+        cached = cache.get(key)
+
+        if cached is None:
+            response = handler(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+            etag = make_etag(response.data)
+            cache.set(
+                key, (etag, response.data), settings.CATALOG_CACHE_TIMEOUT
+            )
+        else:
+            etag, data = cached
+            response = Response(data)
+
+        return self.conditional_response(request, response, etag)
+
+    async def acached_response(self, handler, request, *args, **kwargs):
+        """cached_response() for async views, handler is a coroutine"""
+        key = await sync_to_async(catalog_cache_key)(request)
+        cached = await cache.aget(key)
+
+        if cached is None:
+            response = await handler(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+            etag = make_etag(response.data)
+            await cache.aset(
+                key, (etag, response.data), settings.CATALOG_CACHE_TIMEOUT
+            )
+        else:
+            etag, data = cached
+            response = Response(data)
+
+        return self.conditional_response(request, response, etag)
+
+    @staticmethod
+    def conditional_response(request, response, etag):
+        if_none_match = request.headers.get("If-None-Match")
+        if if_none_match and (
+            etag in parse_etags(if_none_match) or if_none_match == "*"
+        ):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+
+        response["ETag"] = etag
+        return response
+
+
+class CachedListMixin(CatalogCacheMixin):
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+
+class CachedRetrieveMixin(CatalogCacheMixin):
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(
+            super().retrieve, request, *args, **kwargs
+        )
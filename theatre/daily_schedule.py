@@ -0,0 +1,151 @@
+import threading
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from theatre.cache import get_catalog_version
+from theatre.models import Performance
+from theatre.serializers import PerformanceListSerializer
+
+
+def date_scope(day):
+    return f"date:{day.isoformat()}"
+
+
+def play_scope(play_id):
+    return f"play:{play_id}"
+
+
+def performance_scopes(show_time, play_id):
+    """Materialized lists a performance appears in"""
+    if timezone.is_aware(show_time):
+        show_time = timezone.localtime(show_time)
+    return {date_scope(show_time.date()), play_scope(play_id)}
+
+
+def rows_key(scope):
+    # play and hall changes move the catalog version and retire them all
+    return f"schedule:{get_catalog_version()}:{scope}"
+
+
+def availability_key(scope):
+    return f"schedule:availability:{scope}"
+
+
+def scope_queryset(scope):
+    kind, _, value = scope.partition(":")
+    performances = Performance.objects.order_by("show_time", "id")
+
+    if kind == "date":
+        day_start = timezone.make_aware(
+            datetime.combine(datetime.strptime(value, "%Y-%m-%d"), time.min)
+        )
+        return performances.filter(
+            show_time__gte=day_start,
+            show_time__lt=day_start + timedelta(days=1),
+        )
+    return performances.filter(play_id=int(value))
+
+
+def build_rows(scope):
+    """(play id, list row) of every performance in scope, in show order"""
+    performances = scope_queryset(scope).select_related(
+        "play", "theatre_hall"
+    )
+    return [
+        (performance.play_id, row)
+        for performance, row in zip(
+            performances,
+            PerformanceListSerializer(performances, many=True).data,
+        )
+    ]
+
+
+def get_schedule(scope, play_id=None):
+    """
+    List rows of the performances in scope, optionally of one play only.
+    The rows are materialized per date and per play, tickets_available
+    comes from an overlay at most SCHEDULE_AVAILABILITY_TTL seconds old.
+    """
+    key = rows_key(scope)
+    overlay_key = availability_key(scope)
+    cached = cache.get_many([key, overlay_key])
+
+    rows = cached.get(key)
+    if rows is None:
+        rows = build_rows(scope)
+        # add() so a list read before a change cannot replace one built
+        # after refresh_schedule() dropped it
+        cache.add(key, rows, settings.CATALOG_CACHE_TIMEOUT)
+
+    sold = cached.get(overlay_key)
+    if sold is None:
+        sold = dict(scope_queryset(scope).values_list("id", "tickets_sold"))
+        cache.set(overlay_key, sold, settings.SCHEDULE_AVAILABILITY_TTL)
+
+    return [
+        {
+            **row,
+            "tickets_available": (
+                row["theatre_hall_capacity"] - sold.get(row["id"], 0)
+            ),
+        }
+        for row_play_id, row in rows
+        if play_id is None or row_play_id == play_id
+    ]
+
+
+class ScheduleRefresh(threading.local):
+    """
+    Scopes changed by the transactions of this thread, waiting for them
+    to commit. Every change registers the refresh with on_commit, the
+    first call on commit drops all the scopes gathered so far and the
+    others find none left. Scopes of a rolled back transaction go with
+    the next commit, that only costs their lists a rebuild.
+    """
+
+    def __init__(self):
+        self.scopes = set()
+
+    def add(self, scopes):
+        self.scopes |= scopes
+        transaction.on_commit(self)
+
+    def __call__(self):
+        scopes, self.scopes = self.scopes, set()
+        if scopes:
+            cache.delete_many(
+                [rows_key(scope) for scope in scopes]
+                + [availability_key(scope) for scope in scopes]
+            )
+
+
+schedule_refresh = ScheduleRefresh()
+
+
+def refresh_schedule(scopes):
+    """
+    Drop the materialized lists of scopes now and again once the
+    transaction commits, their next reader rebuilds them. The scopes of
+    a whole transaction, a cascade delete included, are dropped at once.
+    """
+    scopes = set(scopes)
+    cache.delete_many([rows_key(scope) for scope in scopes])
+    schedule_refresh.add(scopes)
+
+
+def availability_changed(performances):
+    """Drop the availability overlays showing performances"""
+    scopes = set()
+    for performance in performances:
+        scopes |= performance_scopes(
+            performance.show_time, performance.play_id
+        )
+    transaction.on_commit(
+        lambda: cache.delete_many(
+            [availability_key(scope) for scope in scopes]
+        )
+    )
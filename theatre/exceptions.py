@@ -0,0 +1,52 @@
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+
+class SeatsTaken(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "Some of the requested seats are already taken."
+    default_code = "seats_taken"
+
+    def __init__(self, seats):
+        super().__init__()
+        # kept as plain data so seat numbers are rendered as integers
+        self.detail = {
+            "detail": self.default_detail,
+            "seats": [
+                {"performance": performance_id, "row": row, "seat": seat}
+                for performance_id, row, seat in sorted(seats)
+            ],
+        }
+
+
+class NoAdjacentSeats(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "No row has that many adjacent free seats."
+    default_code = "no_adjacent_seats"
+
+    def __init__(self, count):
+        super().__init__(
+            f"No row has {count} adjacent free seats.", self.default_code
+        )
+
+
+class ScheduleConflict(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "Some of the performances overlap in their halls."
+    default_code = "schedule_conflict"
+
+    def __init__(self, conflicts):
+        super().__init__()
+        self.detail = {
+            "detail": self.default_detail,
+            "conflicts": [
+                {
+                    "theatre_hall": hall_id,
+                    "show_time": show_time,
+                    "overlaps_performance": performance_id,
+                    "overlaps_show_time": overlapped_time,
+                }
+                for (hall_id, show_time, _), performance_id, overlapped_time
+                in sorted(conflicts, key=lambda conflict: conflict[0][:2])
+            ],
+        }
@@ -0,0 +1,122 @@
+import csv
+import json
+from datetime import datetime, time, timedelta
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections
+from django.utils import timezone
+
+from theatre.models import Ticket
+
+# column name -> Ticket.objects.values_list() path
+EXPORT_COLUMNS = {
+    "ticket_id": "id",
+    "row": "row",
+    "seat": "seat",
+    "reservation_id": "reservation_id",
+    "reserved_at": "reservation__created_at",
+    "user_id": "reservation__user_id",
+    "user_email": "reservation__user__email",
+    "performance_id": "performance_id",
+    "show_time": "performance__show_time",
+    "play_id": "performance__play_id",
+    "play_title": "performance__play__title",
+    "theatre_hall": "performance__theatre_hall__name",
+}
+
+EXPORT_CHUNK_SIZE = 5000
+
+# lines joined into one chunk of the streamed body
+LINES_PER_WRITE = 500
+
+encoder = DjangoJSONEncoder()
+
+
+def ticket_export_queryset(date_from=None, date_to=None):
+    """Tickets of performances shown between the two dates, inclusive"""
+    tickets = Ticket.objects.order_by("id")
+
+    if date_from:
+        tickets = tickets.filter(
+            performance__show_time__gte=timezone.make_aware(
+                datetime.combine(date_from, time.min)
+            )
+        )
+    if date_to:
+        tickets = tickets.filter(
+            performance__show_time__lt=timezone.make_aware(
+                datetime.combine(date_to + timedelta(days=1), time.min)
+            )
+        )
+
+    return tickets.values_list(*EXPORT_COLUMNS.values())
+
+
+def iter_export_rows(queryset, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Rows of queryset, at most chunk_size of them in memory at once.
+    Uses a server-side cursor, or keyset batches on ticket id where
+    those are disabled (transaction pooling), since a client-side
+    cursor would load the whole result.
+    """
+    if not connections[queryset.db].settings_dict.get(
+        "DISABLE_SERVER_SIDE_CURSORS"
+    ):
+        yield from queryset.iterator(chunk_size=chunk_size)
+        return
+
+    last_id = 0
+    while True:
+        rows = list(queryset.filter(id__gt=last_id)[:chunk_size])
+        yield from rows
+        if len(rows) < chunk_size:
+            return
+        last_id = rows[-1][0]
+
+
+def export_value(value):
+    if isinstance(value, datetime):
+        return encoder.default(value)
+    return value
+
+
+class Echo:
+    """File-like object handing back what csv.writer writes to it"""
+
+    def write(self, value):
+        return value
+
+
+def batched(lines):
+    batch = []
+    for line in lines:
+        batch.append(line)
+        if len(batch) == LINES_PER_WRITE:
+            yield "".join(batch)
+            batch = []
+    if batch:
+        yield "".join(batch)
+
+
+def stream_csv(rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(EXPORT_COLUMNS)
+    yield from batched(
+        writer.writerow([export_value(value) for value in row])
+        for row in rows
+    )
+
+
+def stream_ndjson(rows):
+    yield from batched(
+        json.dumps(dict(zip(EXPORT_COLUMNS, row)), cls=DjangoJSONEncoder)
+        + "\n"
+        for row in rows
+    )
+
+
+# export format -> (content type, body generator)
+EXPORT_FORMATS = {
+    "csv": ("text/csv; charset=utf-8", stream_csv),
+    "ndjson": ("application/x-ndjson", stream_ndjson),
+}
@@ -0,0 +1,212 @@
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from django.db.models import Q
+from PIL import Image, ImageOps
+
+from theatre.cache import invalidate_catalog
+from theatre.models import Play
+
+logger = logging.getLogger(__name__)
+
+# rendition name -> bounding box (width, height), the poster keeps its ratio
+RENDITIONS = {
+    "thumb": (160, 240),
+    "card": (480, 720),
+    "full": (1200, 1800),
+}
+
+# rendition served where a client does not pick one
+DEFAULT_RENDITION = "thumb"
+
+# file extension -> Pillow format and save options
+RENDITION_FORMATS = {
+    "webp": ("WEBP", {"quality": 80, "method": 4}),
+    "jpg": ("JPEG", {"quality": 82, "optimize": True, "progressive": True}),
+}
+
+RENDITIONS_DIR = "uploads/plays/renditions/"
+
+# largest upload accepted, in pixels. Pillow also refuses to open
+# anything twice as large, so a decompression bomb already in storage
+# fails in the background instead of exhausting the worker's memory.
+MAX_IMAGE_PIXELS = 50_000_000
+Image.MAX_IMAGE_PIXELS = MAX_IMAGE_PIXELS
+
+# Pillow format of an upload -> format, extension and save options of
+# the copy stored in its place, anything else is stored as PNG
+SOURCE_FORMATS = {
+    "JPEG": ("JPEG", "jpg", {"quality": 95}),
+    # phone cameras store several pictures, only the main one is kept
+    "MPO": ("JPEG", "jpg", {"quality": 95}),
+    "PNG": ("PNG", "png", {"optimize": True}),
+    "WEBP": ("WEBP", "webp", {"quality": 95}),
+}
+
+executor = None
+
+
+def rendition_name(image_name, rendition, extension):
+    stem, _ = os.path.splitext(os.path.basename(image_name))
+    return os.path.join(RENDITIONS_DIR, f"{stem}-{rendition}.{extension}")
+
+
+def rendition_names(renditions):
+    """Storage names of every file listed in Play.image_renditions"""
+    return [
+        name
+        for rendition in renditions.get("renditions", {}).values()
+        for extension, name in rendition.items()
+        if extension in RENDITION_FORMATS
+    ]
+
+
+def open_poster(file):
+    """
+    Pixels of an uploaded image, turned upright and flattened to RGB.
+    Only the pixels are kept, so EXIF, ICC and other metadata are gone.
+    """
+    with Image.open(file) as image:
+        image = ImageOps.exif_transpose(image)
+        if image.mode in ("RGBA", "LA", "P"):
+            image = image.convert("RGBA")
+            background = Image.new("RGB", image.size, "white")
+            background.paste(image, mask=image.getchannel("A"))
+            return background
+        return image.convert("RGB")
+
+
+def strip_upload(file):
+    """
+    Copy of an uploaded image holding only its pixels, turned upright,
+    so the stored original leaks no EXIF (GPS, camera), ICC or other
+    metadata. Raises ValueError for an image over MAX_IMAGE_PIXELS.
+    """
+    file.seek(0)
+    with Image.open(file) as image:
+        width, height = image.size
+        if width * height > MAX_IMAGE_PIXELS:
+            raise ValueError(
+                f"The image is {width}x{height} pixels, images up to "
+                f"{MAX_IMAGE_PIXELS} pixels are accepted."
+            )
+        image_format, extension, options = SOURCE_FORMATS.get(
+            image.format, ("PNG", "png", {"optimize": True})
+        )
+        image = ImageOps.exif_transpose(image)
+        if image_format == "JPEG" and image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+
+        content = BytesIO()
+        image.save(content, image_format, **options)
+
+    stem, _ = os.path.splitext(os.path.basename(file.name))
+    return ContentFile(content.getvalue(), name=f"{stem}.{extension}")
+
+
+def build_renditions(image_name, storage=default_storage):
+    """
+    Write every rendition of the stored image in every format and
+    return what Play.image_renditions records about them
+    """
+    with storage.open(image_name) as file:
+        poster = open_poster(file)
+
+    renditions = {}
+    for rendition, size in RENDITIONS.items():
+        image = poster.copy()
+        # never upscale, a small poster gives the same file to all sizes
+        image.thumbnail(size, Image.Resampling.LANCZOS)
+        renditions[rendition] = {"width": image.width, "height": image.height}
+
+        for extension, (image_format, options) in RENDITION_FORMATS.items():
+            content = BytesIO()
+            image.save(content, image_format, **options)
+            name = rendition_name(image_name, rendition, extension)
+            if storage.exists(name):
+                storage.delete(name)
+            renditions[rendition][extension] = storage.save(
+                name, ContentFile(content.getvalue())
+            )
+
+    return {
+        "source": image_name,
+        "width": poster.width,
+        "height": poster.height,
+        "renditions": renditions,
+    }
+
+
+def process_play_image(play_id, force=False):
+    """
+    Bring the renditions of a play in line with its image: build them
+    for a new image, delete the files of a replaced or removed one
+    """
+    play = Play.objects.filter(pk=play_id).only("image", "image_renditions")
+    play = play.first()
+    if play is None:
+        return False
+
+    image_name = play.image.name or None
+    previous = play.image_renditions
+    if image_name == previous.get("source") and not force:
+        return False
+
+    renditions = build_renditions(image_name) if image_name else {}
+    same_image = (
+        Q(image=image_name)
+        if image_name
+        else Q(image__isnull=True) | Q(image="")
+    )
+    updated = Play.objects.filter(same_image, pk=play_id).update(
+        image_renditions=renditions
+    )
+
+    if updated:
+        stale = set(rendition_names(previous)) - set(
+            rendition_names(renditions)
+        )
+    else:
+        # the image was replaced meanwhile, its upload processes it
+        stale = set(rendition_names(renditions))
+    for name in stale:
+        default_storage.delete(name)
+
+    if updated:
+        invalidate_catalog()
+    return bool(updated)
+
+
+def run_in_background(play_id):
+    try:
+        process_play_image(play_id)
+    except Exception:
+        logger.exception("Processing the image of play %s failed", play_id)
+    finally:
+        # connections are per thread, do not leave this one open
+        connection.close()
+
+
+def schedule_image_processing(play_id):
+    """
+    Process the image of a play off the request thread once the
+    transaction saving it commits, or right away with no workers
+    """
+    global executor
+
+    workers = settings.IMAGE_PROCESSING_WORKERS
+    if not workers:
+        transaction.on_commit(lambda: process_play_image(play_id))
+        return
+
+    if executor is None:
+        executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="play-images"
+        )
+    transaction.on_commit(lambda: executor.submit(run_in_background, play_id))
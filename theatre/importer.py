@@ -0,0 +1,429 @@
+import csv
+import json
+import time
+from collections import Counter, defaultdict
+from datetime import timedelta
+from itertools import islice
+
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from theatre.cache import invalidate_catalog
+from theatre.models import (
+    Actor,
+    Genre,
+    Performance,
+    Play,
+    PlayActor,
+    PlayGenre,
+    TheatreHall,
+)
+from theatre.scheduling import find_conflicts, refresh_end_times
+from theatre.search import refresh_search_vectors
+
+RECORD_TYPES = ("hall", "genre", "actor", "play", "performance")
+
+# separator of several genres/actors in one CSV cell
+CSV_LIST_SEPARATOR = "|"
+
+
+class ImportRecordError(ValueError):
+    pass
+
+
+def read_ndjson(file):
+    for line in file:
+        if line.strip():
+            yield json.loads(line)
+
+
+def read_csv(file, record_type=None):
+    """
+    Rows of a CSV file as records. Empty cells are left out, genres and
+    actors cells hold several names separated by CSV_LIST_SEPARATOR.
+    """
+    for row in csv.DictReader(file):
+        record = {name: value for name, value in row.items() if value}
+        for name in ("genres", "actors"):
+            if name in record:
+                record[name] = record[name].split(CSV_LIST_SEPARATOR)
+        if record_type:
+            record["type"] = record_type
+        yield record
+
+
+def actor_key(actor):
+    """(first_name, last_name) of {"first_name", "last_name"} or a name"""
+    if isinstance(actor, dict):
+        return actor["first_name"], actor["last_name"]
+    first_name, _, last_name = actor.strip().partition(" ")
+    return first_name, last_name.strip()
+
+
+class ScheduleImporter:
+    """
+    Insert or update catalog and schedule records in batches, keyed by
+    natural keys: hall name, genre name, actor first and last name,
+    play title, and play + hall + show time for performances.
+    Re-importing the same records changes nothing.
+    """
+
+    def __init__(self, batch_size=1000, progress=None):
+        self.batch_size = batch_size
+        self.progress = progress
+        self.stats = defaultdict(Counter)
+        self.halls = {}
+        self.genres = {}
+        self.actors = {}
+        self.plays = {}
+        self.touched_plays = set()
+
+    def run(self, records):
+        started = time.perf_counter()
+        imported = 0
+        records = iter(records)
+
+        while batch := list(islice(records, self.batch_size)):
+            with transaction.atomic():
+                self.import_batch(batch, imported)
+            imported += len(batch)
+
+            if self.progress:
+                elapsed = time.perf_counter() - started
+                self.progress(
+                    f"{imported} records, {imported / elapsed:.0f} records/s"
+                )
+
+        if self.touched_plays:
+            refresh_search_vectors(self.touched_plays)
+        invalidate_catalog()
+        return imported
+
+    def import_batch(self, batch, offset):
+        grouped = defaultdict(list)
+        for number, record in enumerate(batch, start=offset + 1):
+            record_type = record.get("type")
+            if record_type not in RECORD_TYPES:
+                raise ImportRecordError(
+                    f"Record {number}: type must be one of "
+                    f"{', '.join(RECORD_TYPES)}"
+                )
+            grouped[record_type].append((number, record))
+
+        self.import_halls(grouped["hall"])
+        self.import_genres(
+            [record["name"] for _, record in grouped["genre"]]
+            + [
+                name
+                for _, record in grouped["play"]
+                for name in record.get("genres", ())
+            ]
+        )
+        self.import_actors(
+            [actor_key(record) for _, record in grouped["actor"]]
+            + [
+                actor_key(actor)
+                for _, record in grouped["play"]
+                for actor in record.get("actors", ())
+            ]
+        )
+        self.import_plays(grouped["play"])
+        self.import_performances(grouped["performance"])
+
+    @staticmethod
+    def field(number, record, name, convert=str):
+        try:
+            return convert(record[name])
+        except KeyError:
+            raise ImportRecordError(f"Record {number}: {name} is required")
+        except (TypeError, ValueError):
+            raise ImportRecordError(f"Record {number}: invalid {name}")
+
+    def upsert(self, model, known, key_name, items, stats):
+        """
+        Create the objects of items (key -> field values) missing from
+        the database and update the fields that differ on the others.
+        Ids end up in known (key -> id).
+        """
+        if not items:
+            return [], []
+
+        existing = {}
+        for obj in model.objects.filter(
+            **{f"{key_name}__in": list(items)}
+        ).order_by("-id"):
+            existing[getattr(obj, key_name)] = obj
+
+        changed = []
+        fields = set()
+        for key, obj in existing.items():
+            differ = [
+                name
+                for name, value in items[key].items()
+                if getattr(obj, name) != value
+            ]
+            for name in differ:
+                setattr(obj, name, items[key][name])
+            if differ:
+                changed.append(obj)
+                fields.update(differ)
+            known[key] = obj.id
+        if changed:
+            model.objects.bulk_update(changed, sorted(fields))
+
+        created = model.objects.bulk_create(
+            model(**{key_name: key}, **items[key])
+            for key in items
+            if key not in existing
+        )
+        for obj in created:
+            known[getattr(obj, key_name)] = obj.id
+
+        stats["created"] += len(created)
+        stats["updated"] += len(changed)
+        stats["unchanged"] += len(items) - len(created) - len(changed)
+        return changed, created
+
+    def import_halls(self, records):
+        halls = {
+            self.field(number, record, "name"): {
+                "rows": self.field(number, record, "rows", int),
+                "seats_in_row": self.field(
+                    number, record, "seats_in_row", int
+                ),
+            }
+            for number, record in records
+        }
+        self.upsert(
+            TheatreHall, self.halls, "name", halls, self.stats["hall"]
+        )
+
+    def import_genres(self, names):
+        names = set(names) - set(self.genres)
+        if not names:
+            return
+
+        self.genres.update(
+            Genre.objects.filter(name__in=names).values_list("name", "id")
+        )
+        missing = names - set(self.genres)
+        # names are unique, a genre created meanwhile is skipped
+        Genre.objects.bulk_create(
+            [Genre(name=name) for name in missing], ignore_conflicts=True
+        )
+        self.genres.update(
+            Genre.objects.filter(name__in=missing).values_list("name", "id")
+        )
+        self.stats["genre"]["created"] += len(missing)
+
+    def import_actors(self, keys):
+        keys = set(keys) - set(self.actors)
+        if not keys:
+            return
+
+        existing = Actor.objects.filter(
+            first_name__in={first_name for first_name, _ in keys},
+            last_name__in={last_name for _, last_name in keys},
+        ).order_by("-id")
+        for actor in existing:
+            key = (actor.first_name, actor.last_name)
+            if key in keys:
+                self.actors[key] = actor.id
+
+        created = Actor.objects.bulk_create(
+            Actor(first_name=first_name, last_name=last_name)
+            for first_name, last_name in keys - set(self.actors)
+        )
+        for actor in created:
+            self.actors[actor.first_name, actor.last_name] = actor.id
+        self.stats["actor"]["created"] += len(created)
+
+    def import_plays(self, records):
+        plays = {}
+        people = {}
+        numbers = {}
+        for number, record in records:
+            title = self.field(number, record, "title")
+            numbers[title] = number
+            plays[title] = {
+                "description": record.get("description", ""),
+                "duration": self.field(number, record, "duration", int),
+            }
+            if record.get("image"):
+                plays[title]["image"] = record["image"]
+            people[title] = record
+
+        changed, created = self.upsert(
+            Play, self.plays, "title", plays, self.stats["play"]
+        )
+        self.touched_plays.update(play.id for play in changed + created)
+        if changed:
+            self.check_durations(changed, numbers)
+            refresh_end_times([play.id for play in changed])
+
+        genre_links = [
+            PlayGenre(play_id=self.plays[title], genre_id=self.genres[name])
+            for title, record in people.items()
+            for name in record.get("genres", ())
+        ]
+        actor_links = [
+            PlayActor(
+                play_id=self.plays[title],
+                actor_id=self.actors[actor_key(actor)],
+            )
+            for title, record in people.items()
+            for actor in record.get("actors", ())
+        ]
+        PlayGenre.objects.bulk_create(genre_links, ignore_conflicts=True)
+        PlayActor.objects.bulk_create(actor_links, ignore_conflicts=True)
+        self.touched_plays.update(
+            link.play_id for link in genre_links + actor_links
+        )
+
+    @staticmethod
+    def check_durations(plays, numbers):
+        """
+        Raise ImportRecordError if the performances of updated plays
+        overlap others in their halls with the plays' new durations.
+        numbers maps play titles to record numbers.
+        """
+        by_id = {play.id: play for play in plays}
+        performances = list(
+            Performance.objects.filter(play_id__in=by_id).values_list(
+                "id", "play_id", "theatre_hall_id", "show_time"
+            )
+        )
+        # (hall id, show time, new end time) -> play
+        slots = {
+            (
+                hall_id,
+                show_time,
+                show_time + timedelta(minutes=by_id[play_id].duration),
+            ): by_id[play_id]
+            for _, play_id, hall_id, show_time in performances
+        }
+        conflicts = find_conflicts(
+            list(slots),
+            exclude=[performance_id for performance_id, *_ in performances],
+        )
+        if conflicts:
+            slot, performance_id, other_start = min(
+                conflicts,
+                key=lambda conflict: numbers[slots[conflict[0]].title],
+            )
+            play = slots[slot]
+            raise ImportRecordError(
+                f"Record {numbers[play.title]}: lasting {play.duration} "
+                f"minutes, its performance at {slot[1].isoformat()} "
+                "overlaps "
+                + (
+                    f"performance {performance_id}"
+                    if performance_id
+                    else "another performance of the imported plays"
+                )
+                + f" from {other_start.isoformat()}"
+            )
+
+    def resolve(self, number, known, model, key_name, key):
+        if key not in known:
+            obj = (
+                model.objects.filter(**{key_name: key}).order_by("id").first()
+            )
+            if obj is None:
+                raise ImportRecordError(
+                    f"Record {number}: unknown {model._meta.model_name} {key}"
+                )
+            known[key] = obj.id
+        return known[key]
+
+    def import_performances(self, records):
+        if not records:
+            return
+
+        # (play id, hall id, show time) -> record number
+        performances = {}
+        for number, record in records:
+            show_time = parse_datetime(
+                self.field(number, record, "show_time")
+            )
+            if show_time is None:
+                raise ImportRecordError(f"Record {number}: invalid show_time")
+            if timezone.is_naive(show_time):
+                show_time = timezone.make_aware(show_time)
+
+            performance = (
+                self.resolve(
+                    number,
+                    self.plays,
+                    Play,
+                    "title",
+                    self.field(number, record, "play"),
+                ),
+                self.resolve(
+                    number,
+                    self.halls,
+                    TheatreHall,
+                    "name",
+                    self.field(number, record, "theatre_hall"),
+                ),
+                show_time,
+            )
+            performances.setdefault(performance, number)
+
+        existing = set(
+            Performance.objects.filter(
+                show_time__in={show_time for *_, show_time in performances},
+                theatre_hall_id__in={hall for _, hall, _ in performances},
+            ).values_list("play_id", "theatre_hall_id", "show_time")
+        )
+        durations = dict(
+            Play.objects.filter(
+                pk__in={play_id for play_id, _, _ in performances}
+            ).values_list("pk", "duration")
+        )
+        new = [
+            Performance(
+                play_id=play_id,
+                theatre_hall_id=hall_id,
+                show_time=show_time,
+                end_time=show_time + timedelta(minutes=durations[play_id]),
+            )
+            for play_id, hall_id, show_time in performances.keys() - existing
+        ]
+
+        conflicts = find_conflicts(
+            [
+                (
+                    performance.theatre_hall_id,
+                    performance.show_time,
+                    performance.end_time,
+                )
+                for performance in new
+            ]
+        )
+        if conflicts:
+            numbers = {
+                (hall_id, show_time): number
+                for (_, hall_id, show_time), number in performances.items()
+            }
+            (hall_id, show_time, _), performance_id, other_start = min(
+                conflicts,
+                key=lambda conflict: numbers[conflict[0][:2]],
+            )
+            raise ImportRecordError(
+                f"Record {numbers[hall_id, show_time]}: the hall is taken by "
+                + (
+                    f"performance {performance_id}"
+                    if performance_id
+                    else "another imported performance"
+                )
+                + f" from {other_start.isoformat()}"
+            )
+
+        created = Performance.objects.bulk_create(new)
+
+        self.stats["performance"]["created"] += len(created)
+        self.stats["performance"]["unchanged"] += len(
+            performances.keys() & existing
+        )
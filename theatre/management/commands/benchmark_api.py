@@ -0,0 +1,155 @@
+import json
+import random
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import override_settings
+from rest_framework.test import APIClient
+
+from theatre.benchmark import (
+    BENCHMARKS,
+    DEFAULT_SIZES,
+    BenchmarkClient,
+    compare_results,
+    generate_dataset,
+    run_benchmark,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the API hot paths against a generated dataset and count "
+        "their queries, optionally saving or comparing a JSON baseline. "
+        "Runs on the configured database, all generated rows are rolled "
+        "back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        for name, size in DEFAULT_SIZES.items():
+            parser.add_argument(f"--{name}", type=int, default=size)
+        parser.add_argument(
+            "--benchmark",
+            action="append",
+            dest="benchmarks",
+            choices=list(BENCHMARKS),
+            help="Benchmark to run, repeat for several (default: all)",
+        )
+        parser.add_argument(
+            "--iterations",
+            type=int,
+            help="Requests per benchmark (default: 50, 5 for login)",
+        )
+        parser.add_argument(
+            "--warm-cache",
+            action="store_true",
+            help="Keep the cache between requests instead of clearing it",
+        )
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--save", help="Write the results to this file")
+        parser.add_argument(
+            "--compare",
+            help="Fail on regressions against results saved with --save",
+        )
+        parser.add_argument(
+            "--tolerance",
+            type=float,
+            default=0.25,
+            help="Slowdown of the median tolerated by --compare "
+            "(default: 0.25, i.e. 25%%)",
+        )
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options["compare"]:
+            try:
+                with open(options["compare"], encoding="utf-8") as file:
+                    baseline = json.load(file)
+            except (OSError, ValueError) as error:
+                raise CommandError(f"{options['compare']}: {error}")
+
+        rng = random.Random(options["seed"])
+        sizes = {name: options[name] for name in DEFAULT_SIZES}
+        names = options["benchmarks"] or list(BENCHMARKS)
+
+        # a private cache, so cold reads and throttles leave shared ones be
+        with override_settings(
+            ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"],
+            CACHES={
+                "default": {
+                    "BACKEND": "django.core.cache.backends.locmem."
+                    "LocMemCache",
+                    "LOCATION": "benchmark",
+                },
+                "throttle": {
+                    "BACKEND": "django.core.cache.backends.dummy."
+                    "DummyCache",
+                },
+            },
+            THROTTLE_CACHE="throttle",
+            TOKEN_AUTH_CACHE={
+                **settings.TOKEN_AUTH_CACHE, "SHARED_CACHE": None
+            },
+        ), transaction.atomic():
+            started = time.perf_counter()
+            dataset = generate_dataset(rng, sizes, password="benchmark")
+            self.stdout.write(
+                ", ".join(f"{size} {name}" for name, size in sizes.items())
+                + f", {dataset['tickets']} tickets generated in "
+                f"{time.perf_counter() - started:.2f}s "
+                f"on {connection.vendor}"
+            )
+
+            client = BenchmarkClient(APIClient(), dataset, rng)
+            results = {}
+            for name in names:
+                method, iterations = BENCHMARKS[name]
+                try:
+                    results[name] = run_benchmark(
+                        getattr(client, method),
+                        options["iterations"] or iterations,
+                        warm_cache=options["warm_cache"],
+                    )
+                except RuntimeError as error:
+                    raise CommandError(f"{name}: {error}")
+
+                result = results[name]
+                self.stdout.write(
+                    f"{name}: p50 {result['p50_ms']:.2f}ms, "
+                    f"p95 {result['p95_ms']:.2f}ms, "
+                    f"{result['queries']} queries"
+                )
+
+            transaction.set_rollback(True)
+
+        report = {
+            "database": connection.vendor,
+            "sizes": sizes,
+            "warm_cache": options["warm_cache"],
+            "results": results,
+        }
+        if options["save"]:
+            with open(options["save"], "w", encoding="utf-8") as file:
+                json.dump(report, file, indent=2)
+            self.stdout.write(f"Results saved to {options['save']}")
+
+        if baseline is None:
+            return
+
+        if baseline.get("database") != report["database"]:
+            self.stdout.write(
+                self.style.WARNING(
+                    f"Baseline ran on {baseline.get('database')}, "
+                    f"timings are not comparable"
+                )
+            )
+        regressions = compare_results(
+            baseline.get("results", {}), results, options["tolerance"]
+        )
+        if regressions:
+            raise CommandError(
+                "Regressions against the baseline:\n"
+                + "\n".join(regressions)
+            )
+        self.stdout.write(self.style.SUCCESS("No regressions"))
@@ -0,0 +1,105 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from theatre.models import Actor, Genre, Play
+from theatre.search import (
+    inverted_index,
+    refresh_search_vectors,
+    search_plays,
+    uses_search_vector,
+)
+
+WORDS = (
+    "love war night king queen shadow river winter garden letter storm "
+    "mother father stranger city forest ghost wedding journey secret "
+    "summer house crown sea fire glass silver dream promise island"
+).split()
+
+
+class Command(BaseCommand):
+    help = (
+        "Time play searches against a generated catalog. "
+        "All generated rows are rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--plays", type=int, default=100_000)
+        parser.add_argument("--queries", type=int, default=200)
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+
+        with transaction.atomic():
+            self.generate(rng, options["plays"])
+
+            started = time.perf_counter()
+            refresh_search_vectors()
+            if not uses_search_vector():
+                inverted_index.search("warm up")
+            self.stdout.write(
+                f"Indexed {options['plays']} plays in "
+                f"{time.perf_counter() - started:.2f}s"
+            )
+
+            timings = []
+            for _ in range(options["queries"]):
+                text = " ".join(rng.sample(WORDS, rng.randint(1, 2)))
+                started = time.perf_counter()
+                list(
+                    search_plays(Play.objects.all(), text)
+                    .values_list("id", flat=True)[:20]
+                )
+                timings.append((time.perf_counter() - started) * 1000)
+
+            transaction.set_rollback(True)
+
+        timings.sort()
+        self.stdout.write(
+            f"{len(timings)} queries: "
+            f"p50 {statistics.median(timings):.2f}ms, "
+            f"p95 {timings[int(len(timings) * 0.95) - 1]:.2f}ms, "
+            f"max {timings[-1]:.2f}ms"
+        )
+
+    def generate(self, rng, count):
+        genres = Genre.objects.bulk_create(
+            Genre(name=f"benchmark {word}") for word in WORDS[:10]
+        )
+        actors = Actor.objects.bulk_create(
+            Actor(
+                first_name=rng.choice(WORDS).title(),
+                last_name=rng.choice(WORDS).title(),
+            )
+            for _ in range(500)
+        )
+        plays = Play.objects.bulk_create(
+            (
+                Play(
+                    title=" ".join(rng.sample(WORDS, 3)).title(),
+                    description=" ".join(rng.choices(WORDS, k=30)),
+                    duration=rng.randint(60, 180),
+                )
+                for _ in range(count)
+            ),
+            batch_size=5000,
+        )
+        Play.genres.through.objects.bulk_create(
+            (
+                Play.genres.through(play=play, genre=rng.choice(genres))
+                for play in plays
+            ),
+            batch_size=5000,
+        )
+        Play.actors.through.objects.bulk_create(
+            (
+                Play.actors.through(play=play, actor=actor)
+                for play in plays
+                for actor in rng.sample(actors, 3)
+            ),
+            batch_size=5000,
+        )
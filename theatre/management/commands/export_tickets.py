@@ -0,0 +1,58 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from theatre.export import (
+    EXPORT_CHUNK_SIZE,
+    EXPORT_FORMATS,
+    iter_export_rows,
+    ticket_export_queryset,
+)
+from theatre.serializers import TicketExportSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        "Write tickets of performances between two show dates, joined "
+        "with performance, play, hall and user, as CSV or NDJSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--from", dest="date_from")
+        parser.add_argument("--to", dest="date_to")
+        parser.add_argument(
+            "--format", choices=sorted(EXPORT_FORMATS), default="csv"
+        )
+        parser.add_argument(
+            "--output", help="File to write to (default: stdout)"
+        )
+        parser.add_argument(
+            "--chunk-size", type=int, default=EXPORT_CHUNK_SIZE
+        )
+
+    def handle(self, *args, **options):
+        params = TicketExportSerializer(
+            data={
+                name: options[name]
+                for name in ("date_from", "date_to")
+                if options[name]
+            }
+        )
+        if not params.is_valid():
+            raise CommandError(params.errors)
+
+        rows = iter_export_rows(
+            ticket_export_queryset(
+                params.validated_data.get("date_from"),
+                params.validated_data.get("date_to"),
+            ),
+            chunk_size=options["chunk_size"],
+        )
+        _, stream = EXPORT_FORMATS[options["format"]]
+
+        if not options["output"]:
+            for chunk in stream(rows):
+                self.stdout.write(chunk, ending="")
+            return
+
+        with open(options["output"], "w", newline="") as output:
+            for chunk in stream(rows):
+                output.write(chunk)
@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from theatre.images import process_play_image
+from theatre.models import Play
+
+
+class Command(BaseCommand):
+    help = (
+        "Resize the images of plays uploaded before renditions existed, "
+        "or whose renditions are missing or out of date."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Rebuild the renditions of every play image",
+        )
+
+    def handle(self, *args, **options):
+        plays = (
+            Play.objects.exclude(Q(image__isnull=True) | Q(image=""))
+            .order_by("id")
+            .values_list("id", flat=True)
+        )
+
+        processed = failed = 0
+        for play_id in plays.iterator():
+            try:
+                processed += process_play_image(
+                    play_id, force=options["force"]
+                )
+            except (OSError, ValueError) as error:
+                failed += 1
+                self.stderr.write(f"Play {play_id}: {error}")
+
+        self.stdout.write(
+            self.style.SUCCESS(f"{processed} play images resized")
+        )
+        if failed:
+            self.stdout.write(f"{failed} play images could not be read")
@@ -0,0 +1,61 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from theatre.importer import (
+    RECORD_TYPES,
+    ImportRecordError,
+    ScheduleImporter,
+    read_csv,
+    read_ndjson,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Import halls, genres, actors, plays and performances from NDJSON "
+        "or CSV files. Records are matched on natural keys, so importing "
+        "the same file again changes nothing."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("files", nargs="+")
+        parser.add_argument(
+            "--type",
+            choices=RECORD_TYPES,
+            help="Record type of CSV files without a type column",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        importer = ScheduleImporter(
+            batch_size=options["batch_size"], progress=self.stdout.write
+        )
+
+        for path in options["files"]:
+            _, extension = os.path.splitext(path)
+            if extension not in (".ndjson", ".jsonl", ".csv"):
+                raise CommandError(f"{path}: expected .ndjson or .csv")
+
+            self.stdout.write(f"Importing {path}")
+            with open(path, newline="", encoding="utf-8") as file:
+                if extension == ".csv":
+                    records = read_csv(file, options["type"])
+                else:
+                    records = read_ndjson(file)
+
+                try:
+                    importer.run(records)
+                except (ImportRecordError, ValueError) as error:
+                    raise CommandError(f"{path}: {error}")
+
+        for record_type in RECORD_TYPES:
+            stats = importer.stats[record_type]
+            if any(stats.values()):
+                self.stdout.write(
+                    f"{record_type}: "
+                    + ", ".join(
+                        f"{count} {name}" for name, count in stats.items()
+                    )
+                )
+        self.stdout.write(self.style.SUCCESS("Import finished"))
@@ -0,0 +1,107 @@
+import asyncio
+import statistics
+import time
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+DEFAULT_PATHS = (
+    "/api/theatre/performances/",
+    "/api/theatre/plays/",
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Hit read endpoints of a running server with many concurrent "
+        "clients, e.g. the WSGI and the ASGI service of docker-compose, "
+        "and report throughput and latency."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("base_url", help="e.g. http://localhost:8001")
+        parser.add_argument("--concurrency", type=int, default=100)
+        parser.add_argument("--duration", type=float, default=10.0)
+        parser.add_argument(
+            "--path",
+            action="append",
+            dest="paths",
+            help="Path to request, repeat for several (default: "
+            "performance and play lists)",
+        )
+        parser.add_argument(
+            "--auth",
+            default="",
+            help='Authorization header value, e.g. "Bearer <access>"',
+        )
+
+    def handle(self, *args, **options):
+        url = urlsplit(options["base_url"])
+        if url.scheme != "http" or not url.hostname:
+            raise CommandError("base_url must be an http:// URL")
+
+        results = asyncio.run(
+            self.run(
+                url.hostname,
+                url.port or 80,
+                options["paths"] or DEFAULT_PATHS,
+                options["auth"],
+                options["concurrency"],
+                options["duration"],
+            )
+        )
+
+        timings = sorted(timing for ok, timing in results if ok)
+        errors = sum(1 for ok, _ in results if not ok)
+        if not timings:
+            raise CommandError(f"No successful requests, {errors} errors")
+
+        def percentile(share):
+            return timings[max(int(len(timings) * share) - 1, 0)]
+
+        self.stdout.write(
+            f"{len(timings)} requests, {errors} errors, "
+            f"{len(timings) / options['duration']:.1f} req/s, "
+            f"p50 {statistics.median(timings):.1f}ms, "
+            f"p95 {percentile(0.95):.1f}ms, "
+            f"p99 {percentile(0.99):.1f}ms"
+        )
+
+    async def run(self, host, port, paths, auth, concurrency, duration):
+        deadline = time.monotonic() + duration
+        results = []
+
+        async def client(number):
+            path = paths[number % len(paths)]
+            while time.monotonic() < deadline:
+                started = time.perf_counter()
+                try:
+                    ok = await self.request(host, port, path, auth)
+                except OSError:
+                    ok = False
+                results.append((ok, (time.perf_counter() - started) * 1000))
+
+        await asyncio.gather(*(client(n) for n in range(concurrency)))
+        return results
+
+    @staticmethod
+    async def request(host, port, path, auth):
+        reader, writer = await asyncio.open_connection(host, port)
+        headers = [
+            f"GET {path} HTTP/1.1",
+            f"Host: {host}",
+            "Accept: application/json",
+            "Connection: close",
+        ]
+        if auth:
+            headers.append(f"Authorization: {auth}")
+        writer.write(("\r\n".join(headers) + "\r\n\r\n").encode())
+
+        try:
+            await writer.drain()
+            status_line = await reader.readline()
+            await reader.read()
+        finally:
+            writer.close()
+
+        return status_line.split(b" ")[1:2] == [b"200"]
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from theatre.search import refresh_search_vectors, uses_search_vector
+
+
+class Command(BaseCommand):
+    help = "Recompute the full-text search data of every play"
+
+    def handle(self, *args, **options):
+        refresh_search_vectors()
+
+        if uses_search_vector():
+            self.stdout.write(self.style.SUCCESS("Search vectors rebuilt"))
+        else:
+            self.stdout.write(
+                "No tsvector support, plays are indexed in-process on demand"
+            )
@@ -0,0 +1,57 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from theatre.models import Performance, Ticket
+
+
+class Command(BaseCommand):
+    help = "Rebuild Performance.tickets_sold counters from the Ticket table"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Only report drifted counters without fixing them",
+        )
+
+    def handle(self, *args, **options):
+        sold = (
+            Ticket.objects.filter(performance=OuterRef("pk"))
+            .order_by()
+            .values("performance")
+            .annotate(count=Count("id"))
+            .values("count")
+        )
+
+        with transaction.atomic():
+            drifted = (
+                Performance.objects.select_for_update()
+                .annotate(actual_sold=Coalesce(Subquery(sold), 0))
+                .exclude(tickets_sold=F("actual_sold"))
+                .values_list("id", "tickets_sold", "actual_sold")
+            )
+            drifted = list(drifted)
+
+            for performance_id, stored, actual in drifted:
+                self.stdout.write(
+                    f"Performance {performance_id}: "
+                    f"stored {stored}, actual {actual}"
+                )
+
+            if drifted and not options["check"]:
+                Performance.objects.filter(
+                    pk__in=[performance_id for performance_id, *_ in drifted]
+                ).update(tickets_sold=Coalesce(Subquery(sold), 0))
+
+        if not drifted:
+            self.stdout.write(self.style.SUCCESS("All counters are in sync"))
+        elif options["check"]:
+            self.stdout.write(
+                self.style.WARNING(f"{len(drifted)} counters drifted")
+            )
+        else:
+            self.stdout.write(
+                self.style.SUCCESS(f"Rebuilt {len(drifted)} counters")
+            )
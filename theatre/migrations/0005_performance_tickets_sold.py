@@ -0,0 +1,37 @@
+# Generated by Django 4.1 on 2026-10-18 11:18
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_tickets_sold(apps, schema_editor):
+    Performance = apps.get_model("theatre", "Performance")
+    Ticket = apps.get_model("theatre", "Ticket")
+
+    sold = (
+        Ticket.objects.filter(performance=OuterRef("pk"))
+        .order_by()
+        .values("performance")
+        .annotate(count=Count("id"))
+        .values("count")
+    )
+    Performance.objects.update(tickets_sold=Coalesce(Subquery(sold), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("theatre", "0004_alter_play_actors_alter_play_genres"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="performance",
+            name="tickets_sold",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(
+            backfill_tickets_sold, migrations.RunPython.noop
+        ),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 4.1 on 2026-10-18 11:25
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+BACKFILL_SQL = """
+UPDATE theatre_play AS play SET search_vector =
+    setweight(to_tsvector('english', COALESCE(play.title, '')), 'A')
+    || setweight(to_tsvector('english',
+        COALESCE((
+            SELECT string_agg(actor.first_name || ' ' || actor.last_name, ' ')
+            FROM theatre_play_actors AS play_actor
+            JOIN theatre_actor AS actor ON actor.id = play_actor.actor_id
+            WHERE play_actor.play_id = play.id
+        ), '')
+        || ' ' ||
+        COALESCE((
+            SELECT string_agg(genre.name, ' ')
+            FROM theatre_play_genres AS play_genre
+            JOIN theatre_genre AS genre ON genre.id = play_genre.genre_id
+            WHERE play_genre.play_id = play.id
+        ), '')
+    ), 'B')
+    || setweight(to_tsvector('english', COALESCE(play.description, '')), 'C')
+"""
+
+
+def create_search_index(apps, schema_editor):
+    """The GIN index and tsvector data only exist on PostgreSQL"""
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    schema_editor.execute(
+        "CREATE INDEX theatre_play_search_vector_gin "
+        "ON theatre_play USING gin (search_vector)"
+    )
+    schema_editor.execute(BACKFILL_SQL)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    schema_editor.execute(
+        "DROP INDEX IF EXISTS theatre_play_search_vector_gin"
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("theatre", "0006_seathold"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="play",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True
+            ),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,120 @@
+# Generated by Django 4.1 on 2026-10-18 11:34
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    """
+    Turn the auto-created play genres/actors tables into explicit through
+    models. The tables already exist with the same columns, so only the
+    migration state changes before the reverse (genre/actor, play)
+    indexes are added.
+    """
+
+    dependencies = [
+        ("theatre", "0007_play_search_vector"),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.CreateModel(
+                    name="PlayGenre",
+                    fields=[
+                        (
+                            "id",
+                            models.BigAutoField(
+                                auto_created=True,
+                                primary_key=True,
+                                serialize=False,
+                                verbose_name="ID",
+                            ),
+                        ),
+                        (
+                            "genre",
+                            models.ForeignKey(
+                                on_delete=django.db.models.deletion.CASCADE,
+                                to="theatre.genre",
+                            ),
+                        ),
+                        (
+                            "play",
+                            models.ForeignKey(
+                                on_delete=django.db.models.deletion.CASCADE,
+                                to="theatre.play",
+                            ),
+                        ),
+                    ],
+                    options={
+                        "db_table": "theatre_play_genres",
+                        "unique_together": {("play", "genre")},
+                    },
+                ),
+                migrations.CreateModel(
+                    name="PlayActor",
+                    fields=[
+                        (
+                            "id",
+                            models.BigAutoField(
+                                auto_created=True,
+                                primary_key=True,
+                                serialize=False,
+                                verbose_name="ID",
+                            ),
+                        ),
+                        (
+                            "actor",
+                            models.ForeignKey(
+                                on_delete=django.db.models.deletion.CASCADE,
+                                to="theatre.actor",
+                            ),
+                        ),
+                        (
+                            "play",
+                            models.ForeignKey(
+                                on_delete=django.db.models.deletion.CASCADE,
+                                to="theatre.play",
+                            ),
+                        ),
+                    ],
+                    options={
+                        "db_table": "theatre_play_actors",
+                        "unique_together": {("play", "actor")},
+                    },
+                ),
+                migrations.AlterField(
+                    model_name="play",
+                    name="genres",
+                    field=models.ManyToManyField(
+                        blank=True,
+                        related_name="plays",
+                        through="theatre.PlayGenre",
+                        to="theatre.genre",
+                    ),
+                ),
+                migrations.AlterField(
+                    model_name="play",
+                    name="actors",
+                    field=models.ManyToManyField(
+                        blank=True,
+                        related_name="plays",
+                        through="theatre.PlayActor",
+                        to="theatre.actor",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="playgenre",
+            index=models.Index(
+                fields=["genre", "play"], name="theatre_play_genre_play_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="playactor",
+            index=models.Index(
+                fields=["actor", "play"], name="theatre_play_actor_play_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 4.1 on 2026-10-18 11:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("theatre", "0009_pagination_indexes"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="performance",
+            index=models.Index(
+                fields=["play", "show_time"], name="performance_play_time_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="ticket",
+            index=models.Index(
+                fields=["performance", "row", "seat"],
+                name="ticket_performance_seat_idx",
+            ),
+        ),
+    ]
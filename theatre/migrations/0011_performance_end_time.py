@@ -0,0 +1,69 @@
+# Generated by Django 4.1 on 2026-10-18 12:05
+
+from datetime import timedelta
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def fill_end_times(apps, schema_editor):
+    Play = apps.get_model("theatre", "Play")
+    Performance = apps.get_model("theatre", "Performance")
+
+    for play_id, duration in Play.objects.values_list("pk", "duration"):
+        Performance.objects.filter(play_id=play_id).update(
+            end_time=F("show_time") + timedelta(minutes=duration)
+        )
+
+
+def create_overlap_constraint(apps, schema_editor):
+    """
+    Exclusion constraints need PostgreSQL, and btree_gist for the
+    equality on the hall id. Other backends rely on the overlap checks
+    of theatre.scheduling.
+    """
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS btree_gist")
+    schema_editor.execute(
+        "ALTER TABLE theatre_performance "
+        "ADD CONSTRAINT performance_hall_no_overlap "
+        "EXCLUDE USING gist ("
+        "theatre_hall_id WITH =, tstzrange(show_time, end_time) WITH &&"
+        ")"
+    )
+
+
+def drop_overlap_constraint(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    schema_editor.execute(
+        "ALTER TABLE theatre_performance "
+        "DROP CONSTRAINT IF EXISTS performance_hall_no_overlap"
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("theatre", "0010_query_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="performance",
+            name="end_time",
+            field=models.DateTimeField(editable=False, null=True),
+        ),
+        migrations.RunPython(fill_end_times, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="performance",
+            name="end_time",
+            field=models.DateTimeField(editable=False),
+        ),
+        migrations.RunPython(
+            create_overlap_constraint, drop_overlap_constraint
+        ),
+    ]
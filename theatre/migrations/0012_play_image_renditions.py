@@ -0,0 +1,18 @@
+# Generated by Django 4.1 on 2026-10-18 12:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("theatre", "0011_performance_end_time"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="play",
+            name="image_renditions",
+            field=models.JSONField(default=dict, editable=False),
+        ),
+    ]
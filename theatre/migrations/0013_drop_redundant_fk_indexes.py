@@ -0,0 +1,45 @@
+# Generated by Django 4.1 on 2026-10-18 12:45
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("theatre", "0012_play_image_renditions"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="performance",
+            name="play",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="performances",
+                to="theatre.play",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="reservation",
+            name="user",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="ticket",
+            name="performance",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="tickets",
+                to="theatre.performance",
+            ),
+        ),
+    ]
@@ -1,6 +1,8 @@
 import os
 import uuid
+from datetime import timedelta
 
+from django.contrib.postgres.search import SearchVectorField
 from django.core.exceptions import ValidationError
 from django.db import models
 
@@ -51,22 +53,84 @@ class Play(models.Model):
     title = models.CharField(max_length=255)
     description = models.TextField()
     duration = models.IntegerField()
-    genres = models.ManyToManyField(Genre, blank=True, related_name="plays")
-    actors = models.ManyToManyField(Actor, blank=True, related_name="plays")
+    genres = models.ManyToManyField(
+        Genre, blank=True, related_name="plays", through="PlayGenre"
+    )
+    actors = models.ManyToManyField(
+        Actor, blank=True, related_name="plays", through="PlayActor"
+    )
     image = models.ImageField(null=True, blank=True, upload_to=play_image_path)
+    # sizes of the image and its resized copies, see theatre.images
+    image_renditions = models.JSONField(default=dict, editable=False)
+    search_vector = SearchVectorField(null=True, editable=False)
 
     class Meta:
         ordering = ["title"]
+        indexes = [
+            models.Index(fields=["title", "id"], name="play_title_id_idx"),
+        ]
+
+    def clean(self):
+        if self.pk is None or self.duration is None:
+            return
+
+        from theatre.scheduling import play_duration_conflicts
+
+        conflicts = play_duration_conflicts(self.pk, self.duration)
+        if conflicts:
+            (_, show_time, _), performance_id, other_start = conflicts[0]
+            overlapped = (
+                f"performance {performance_id}"
+                if performance_id
+                else "another performance of the play"
+            )
+            raise ValidationError(
+                {
+                    "duration": f"The performance at "
+                    f"{show_time.isoformat()} would overlap {overlapped} "
+                    f"from {other_start.isoformat()}"
+                }
+            )
 
     def __str__(self):
         return self.title
 
 
+class PlayGenre(models.Model):
+    play = models.ForeignKey(Play, on_delete=models.CASCADE)
+    genre = models.ForeignKey(Genre, on_delete=models.CASCADE)
+
+    class Meta:
+        db_table = "theatre_play_genres"
+        unique_together = ("play", "genre")
+        indexes = [
+            models.Index(
+                fields=["genre", "play"], name="theatre_play_genre_play_idx"
+            ),
+        ]
+
+
+class PlayActor(models.Model):
+    play = models.ForeignKey(Play, on_delete=models.CASCADE)
+    actor = models.ForeignKey(Actor, on_delete=models.CASCADE)
+
+    class Meta:
+        db_table = "theatre_play_actors"
+        unique_together = ("play", "actor")
+        indexes = [
+            models.Index(
+                fields=["actor", "play"], name="theatre_play_actor_play_idx"
+            ),
+        ]
+
+
 class Performance(models.Model):
+    # indexed by performance_play_time_idx
     play = models.ForeignKey(
         Play,
         related_name="performances",
-        on_delete=models.CASCADE
+        on_delete=models.CASCADE,
+        db_index=False,
     )
     theatre_hall = models.ForeignKey(
         TheatreHall,
@@ -74,13 +138,61 @@ class Performance(models.Model):
         on_delete=models.CASCADE
     )
     show_time = models.DateTimeField()
+    # show_time + play.duration, halls are booked by [show_time, end_time)
+    end_time = models.DateTimeField(editable=False)
+    tickets_sold = models.PositiveIntegerField(default=0, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["show_time", "id"], name="performance_show_time_id_idx"
+            ),
+            models.Index(
+                fields=["play", "show_time"], name="performance_play_time_idx"
+            ),
+        ]
+
+    @property
+    def tickets_available(self) -> int:
+        return self.theatre_hall.capacity - self.tickets_sold
+
+    def get_end_time(self):
+        show_time = self._meta.get_field("show_time").to_python(
+            self.show_time
+        )
+        return show_time + timedelta(minutes=self.play.duration)
+
+    def clean(self):
+        if not (self.show_time and self.play_id and self.theatre_hall_id):
+            return
+
+        from theatre.scheduling import find_conflicts
+
+        conflicts = find_conflicts(
+            [(self.theatre_hall_id, self.show_time, self.get_end_time())],
+            exclude=[self.pk] if self.pk else (),
+        )
+        if conflicts:
+            _, performance_id, show_time = conflicts[0]
+            raise ValidationError(
+                {
+                    "show_time": f"The hall is taken by performance "
+                    f"{performance_id} from {show_time.isoformat()}"
+                }
+            )
+
+    def save(self, *args, **kwargs):
+        self.end_time = self.get_end_time()
+        super().save(*args, **kwargs)
 
 
 class Reservation(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
+    # indexed by reservation_user_created_idx
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
-        on_delete=models.CASCADE
+        on_delete=models.CASCADE,
+        db_index=False,
     )
 
     def __str__(self):
@@ -88,15 +200,49 @@ class Reservation(models.Model):
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(
+                fields=["user", "created_at", "id"],
+                name="reservation_user_created_idx"
+            ),
+        ]
+
+
+class SeatHold(models.Model):
+    row = models.IntegerField()
+    seat = models.IntegerField()
+    performance = models.ForeignKey(
+        Performance,
+        related_name="holds",
+        on_delete=models.CASCADE
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        related_name="seat_holds",
+        on_delete=models.CASCADE
+    )
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        unique_together = ("row", "seat", "performance")
+        ordering = ["row", "seat"]
+
+    def __str__(self):
+        return (
+            f"{str(self.performance)} (row: {self.row}, seat: {self.seat}) "
+            f"held until {self.expires_at}"
+        )
 
 
 class Ticket(models.Model):
     row = models.IntegerField()
     seat = models.IntegerField()
+    # indexed by ticket_performance_seat_idx
     performance = models.ForeignKey(
         Performance,
         related_name="tickets",
-        on_delete=models.CASCADE
+        on_delete=models.CASCADE,
+        db_index=False,
     )
     reservation = models.ForeignKey(
         Reservation,
@@ -107,6 +253,13 @@ class Ticket(models.Model):
     class Meta:
         unique_together = ("row", "seat", "performance")
         ordering = ["row", "seat"]
+        indexes = [
+            # serves seat lookups of a performance from the index alone
+            models.Index(
+                fields=["performance", "row", "seat"],
+                name="ticket_performance_seat_idx"
+            ),
+        ]
 
     @staticmethod
     def validate_ticket(row, seat, theatre_hall, error_to_raise):
@@ -0,0 +1,244 @@
+import base64
+import binascii
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, LimitOffsetPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset pagination over an ordering of a field and a unique one,
+    ("title", "id") or ("-created_at", "-id"). A page seeks past the
+    last row of the previous one, (field, id) > (value, id) or < for
+    descending orderings, so every page is an index range scan. The
+    cursor is an opaque encoding of that position and the direction.
+    """
+
+    ordering = None
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = "limit"
+    max_page_size = 100
+    cursor_query_param = "cursor"
+    invalid_cursor_message = _("Invalid cursor")
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        position, self.backwards = self.decode_cursor(request)
+
+        ordering = self.ordering
+        if self.backwards:
+            ordering = [
+                name[1:] if name.startswith("-") else f"-{name}"
+                for name in ordering
+            ]
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            try:
+                queryset = queryset.filter(self.seek(position))
+            except ValidationError:
+                raise NotFound(self.invalid_cursor_message)
+
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if self.backwards:
+            results.reverse()
+            self.has_next, self.has_previous = position is not None, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+
+        self.first = self.get_position(results[0]) if results else position
+        self.last = self.get_position(results[-1]) if results else position
+        return results
+
+    def seek(self, position):
+        """Rows after position in the direction of the page"""
+        (field, unique), (value, unique_value) = self.fields(), position
+        descending = self.ordering[0].startswith("-")
+        lookup = "lt" if descending != self.backwards else "gt"
+        return Q(**{f"{field}__{lookup}": value}) | Q(
+            **{field: value, f"{unique}__{lookup}": unique_value}
+        )
+
+    def fields(self):
+        return [name.lstrip("-") for name in self.ordering]
+
+    def get_position(self, obj):
+        return [
+            value.isoformat() if hasattr(value, "isoformat") else value
+            for value in (getattr(obj, name) for name in self.fields())
+        ]
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def decode_cursor(self, request):
+        """(position or None, backwards) of the requested page"""
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None, False
+
+        try:
+            *position, backwards = json.loads(
+                base64.urlsafe_b64decode(encoded.encode())
+            )
+            if (
+                len(position) != 2
+                or not isinstance(backwards, bool)
+                or not all(isinstance(value, (str, int)) for value in position)
+            ):
+                raise ValueError
+        except (TypeError, ValueError, binascii.Error):
+            raise NotFound(self.invalid_cursor_message)
+        return position, backwards
+
+    def encode_cursor(self, position, backwards):
+        cursor = base64.urlsafe_b64encode(
+            json.dumps([*position, backwards]).encode()
+        ).decode()
+        return replace_query_param(
+            self.request.build_absolute_uri(),
+            self.cursor_query_param,
+            cursor,
+        )
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self.encode_cursor(self.last, False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        return self.encode_cursor(self.first, True)
+
+    def get_paginated_response(self, data):
+        return Response(
+            {
+                "next": self.get_next_link(),
+                "previous": self.get_previous_link(),
+                "results": data,
+            }
+        )
+
+
+class TheatrePagination(LimitOffsetPagination):
+    """
+    Limit/offset pagination, with two per-request opt-ins:
+    ?pagination=cursor switches to keyset pagination over cursor_ordering
+    (the returned next/previous links carry the cursor),
+    ?count=false skips the COUNT(*) query of offset pages.
+    """
+
+    cursor_ordering = None
+    pagination_query_param = "pagination"
+    count_query_param = "count"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+
+        if self.cursor_ordering and self.wants_cursor(request):
+            self.keyset = KeysetPagination()
+            self.keyset.ordering = self.cursor_ordering
+            return self.keyset.paginate_queryset(queryset, request, view)
+
+        if request.query_params.get(self.count_query_param) != "false":
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        self.limit = self.get_limit(request)
+        if self.limit is None:
+            return None
+
+        self.count = None
+        self.offset = self.get_offset(request)
+        results = list(queryset[self.offset:self.offset + self.limit + 1])
+        self.has_next = len(results) > self.limit
+        return results[:self.limit]
+
+    def wants_cursor(self, request):
+        return (
+            request.query_params.get(self.pagination_query_param) == "cursor"
+            or KeysetPagination.cursor_query_param in request.query_params
+        )
+
+    def get_schema_operation_parameters(self, view):
+        parameters = super().get_schema_operation_parameters(view)
+        parameters.append(
+            {
+                "name": self.count_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Set to false to skip counting all results",
+                "schema": {"type": "boolean"},
+            }
+        )
+        if self.cursor_ordering:
+            parameters += [
+                {
+                    "name": self.pagination_query_param,
+                    "required": False,
+                    "in": "query",
+                    "description": "Set to cursor for keyset pagination",
+                    "schema": {"type": "string", "enum": ["cursor"]},
+                },
+                {
+                    "name": KeysetPagination.cursor_query_param,
+                    "required": False,
+                    "in": "query",
+                    "description": "Cursor from a previous keyset page",
+                    "schema": {"type": "string"},
+                },
+            ]
+        return parameters
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def get_next_link(self):
+        if self.count is not None:
+            return super().get_next_link()
+
+        if not self.has_next:
+            return None
+
+        url = self.request.build_absolute_uri()
+        url = replace_query_param(url, self.limit_query_param, self.limit)
+        return replace_query_param(
+            url, self.offset_query_param, self.offset + self.limit
+        )
+
+
+class PerformancePagination(TheatrePagination):
+    cursor_ordering = ("show_time", "id")
+
+
+class ReservationPagination(TheatrePagination):
+    cursor_ordering = ("-created_at", "-id")
+
+
+class PlayPagination(TheatrePagination):
+    cursor_ordering = ("title", "id")
+
+    def wants_cursor(self, request):
+        # search results are ordered by rank, which a cursor over
+        # cursor_ordering would replace, so they keep offset pages
+        if request.query_params.get("search"):
+            return False
+        return super().wants_cursor(request)
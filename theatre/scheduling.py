@@ -0,0 +1,202 @@
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from django.db.models import F
+from django.utils import timezone
+
+from theatre.exceptions import ScheduleConflict
+from theatre.models import Performance, Play, TheatreHall
+
+# Upper bounds of what one bulk scheduling request may create
+MAX_BULK_PERFORMANCES = 5000
+MAX_RECURRENCE_DAYS = 366
+
+
+def lock_halls(hall_ids):
+    """
+    Serialize scheduling per hall, the way lock_performances() does for
+    seats, so two batches cannot both pass the overlap check.
+    Must be called inside a transaction.
+    """
+    list(
+        TheatreHall.objects.select_for_update()
+        .filter(pk__in=hall_ids)
+        .order_by("pk")
+        .values_list("pk", flat=True)
+    )
+
+
+def expand_recurrence(start_date, end_date, weekdays, times):
+    """
+    Show times of every given weekday (0 is Monday) between the two
+    dates, inclusive, at each of times in the current time zone
+    """
+    show_times = []
+    day = start_date
+    while day <= end_date:
+        if day.weekday() in weekdays:
+            show_times.extend(
+                timezone.make_aware(datetime.combine(day, show_time))
+                for show_time in sorted(times)
+            )
+        day += timedelta(days=1)
+    return show_times
+
+
+def refresh_end_times(play_ids):
+    """Recompute Performance.end_time after plays changed duration"""
+    durations = Play.objects.filter(pk__in=play_ids).values_list(
+        "pk", "duration"
+    )
+    for play_id, duration in durations:
+        Performance.objects.filter(play_id=play_id).update(
+            end_time=F("show_time") + timedelta(minutes=duration)
+        )
+
+
+def play_duration_conflicts(play_id, duration):
+    """find_conflicts() of the performances of a play lasting duration"""
+    performances = list(
+        Performance.objects.filter(play_id=play_id).values_list(
+            "id", "theatre_hall_id", "show_time"
+        )
+    )
+    return find_conflicts(
+        [
+            (hall_id, show_time, show_time + timedelta(minutes=duration))
+            for _, hall_id, show_time in performances
+        ],
+        exclude=[performance_id for performance_id, _, _ in performances],
+    )
+
+
+def check_play_duration(play_id, duration):
+    """
+    Raise ScheduleConflict unless the performances of a play still fit
+    in their halls once it lasts duration minutes. Locks the halls, call
+    it inside a transaction.
+    """
+    lock_halls(
+        Performance.objects.filter(play_id=play_id)
+        .order_by()
+        .values("theatre_hall_id")
+    )
+    conflicts = play_duration_conflicts(play_id, duration)
+    if conflicts:
+        raise ScheduleConflict(conflicts)
+
+
+class HallIntervals:
+    """
+    Performances of one hall sorted by start, with the running maximum
+    of their ends, so the ones overlapping an interval are found with
+    two bisections
+    """
+
+    def __init__(self):
+        self.starts = []
+        self.max_ends = []
+        self.intervals = []
+
+    def __len__(self):
+        return len(self.intervals)
+
+    def overlapping(self, start, end):
+        """(start, end, key) of the intervals overlapping [start, end)"""
+        first = bisect_right(self.max_ends, start)
+        last = bisect_left(self.starts, end)
+        return [
+            interval
+            for interval in self.intervals[first:last]
+            if interval[1] > start
+        ]
+
+    def add(self, start, end, key):
+        position = bisect_right(self.starts, start)
+        max_end = end
+        if position:
+            max_end = max(max_end, self.max_ends[position - 1])
+
+        self.starts.insert(position, start)
+        self.intervals.insert(position, (start, end, key))
+        self.max_ends.insert(position, max_end)
+        # the maximum only moves further when this interval overlaps
+        # the ones after it, which the index is there to prevent
+        for following in range(position + 1, len(self.max_ends)):
+            if self.max_ends[following] >= max_end:
+                break
+            self.max_ends[following] = max_end
+
+
+class IntervalIndex:
+    """
+    In-memory schedule of halls, a lookup costs O(log n) in the number
+    of performances of the hall. Overlaps are checked with it on every
+    backend, PostgreSQL also enforces them with an exclusion constraint.
+    """
+
+    def __init__(self):
+        self.halls = defaultdict(HallIntervals)
+
+    @classmethod
+    def load(cls, hall_ids, start, end, exclude=()):
+        """Index of the halls' performances overlapping [start, end)"""
+        index = cls()
+        scheduled = (
+            Performance.objects.filter(
+                theatre_hall_id__in=hall_ids,
+                show_time__lt=end,
+                end_time__gt=start,
+            )
+            .exclude(pk__in=exclude)
+            .order_by("show_time")
+            .values_list("theatre_hall_id", "show_time", "end_time", "id")
+        )
+        for hall_id, show_time, end_time, performance_id in scheduled:
+            index.add(hall_id, show_time, end_time, performance_id)
+        return index
+
+    def overlapping(self, hall_id, start, end):
+        if hall_id not in self.halls:
+            return []
+        return self.halls[hall_id].overlapping(start, end)
+
+    def add(self, hall_id, start, end, key=None):
+        self.halls[hall_id].add(start, end, key)
+
+
+def find_conflicts(slots, exclude=()):
+    """
+    Overlaps of slots (hall id, start, end) with each other and with the
+    performances already scheduled in their halls, but the excluded
+    ones. Each conflict is (slot, id of the performance it overlaps or
+    None for another slot, start of what it overlaps).
+    """
+    if not slots:
+        return []
+
+    index = IntervalIndex.load(
+        {hall_id for hall_id, _, _ in slots},
+        min(start for _, start, _ in slots),
+        max(end for _, _, end in slots),
+        exclude,
+    )
+
+    conflicts = []
+    for slot in sorted(slots, key=lambda slot: slot[1:]):
+        hall_id, start, end = slot
+        overlapping = index.overlapping(hall_id, start, end)
+        if overlapping:
+            other_start, _, performance_id = overlapping[0]
+            conflicts.append((slot, performance_id, other_start))
+        else:
+            index.add(hall_id, start, end)
+    return conflicts
+
+
+def check_schedule(slots, exclude=()):
+    """Raise ScheduleConflict unless slots fit in their halls"""
+    conflicts = find_conflicts(slots, exclude)
+    if conflicts:
+        raise ScheduleConflict(conflicts)
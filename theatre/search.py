@@ -0,0 +1,205 @@
+import re
+import threading
+from collections import defaultdict
+
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchRank,
+    SearchVector,
+)
+from django.db import connection
+from django.db.models import (
+    Case,
+    CharField,
+    F,
+    OuterRef,
+    Subquery,
+    Value,
+    When,
+)
+from django.db.models.functions import Concat
+
+from theatre.models import Play
+
+SEARCH_CONFIG = "english"
+
+# Same weights PostgreSQL gives to the A, B and C labels
+TITLE_WEIGHT = 1.0
+PEOPLE_WEIGHT = 0.4
+DESCRIPTION_WEIGHT = 0.2
+
+# A search returns at most this many best matches, on PostgreSQL and
+# in the in-process fallback alike. Pages past them are empty.
+SEARCH_RESULTS_LIMIT = 200
+
+TOKEN_RE = re.compile(r"\w+")
+
+
+def tokenize(text):
+    return TOKEN_RE.findall((text or "").lower())
+
+
+def uses_search_vector():
+    return connection.vendor == "postgresql"
+
+
+def play_search_vector():
+    """
+    tsvector of a play: title weighted A, actor full names and genre
+    names weighted B, description weighted C
+    """
+    actors = (
+        Play.actors.through.objects.filter(play=OuterRef("pk"))
+        .order_by()
+        .values("play")
+        .annotate(
+            names=StringAgg(
+                Concat(
+                    "actor__first_name",
+                    Value(" "),
+                    "actor__last_name",
+                    output_field=CharField(),
+                ),
+                " ",
+            )
+        )
+        .values("names")
+    )
+    genres = (
+        Play.genres.through.objects.filter(play=OuterRef("pk"))
+        .order_by()
+        .values("play")
+        .annotate(names=StringAgg("genre__name", " "))
+        .values("names")
+    )
+    return (
+        SearchVector("title", weight="A", config=SEARCH_CONFIG)
+        + SearchVector(
+            Subquery(actors),
+            Subquery(genres),
+            weight="B",
+            config=SEARCH_CONFIG,
+        )
+        + SearchVector("description", weight="C", config=SEARCH_CONFIG)
+    )
+
+
+class InvertedIndex:
+    """
+    In-process token -> {play id: score} index used where there is no
+    tsvector support (SQLite in tests and local runs). Rebuilt lazily
+    on the first search after the catalog changed.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.postings = {}
+        self.stale = True
+
+    def mark_stale(self):
+        self.stale = True
+
+    def build(self):
+        postings = defaultdict(lambda: defaultdict(float))
+
+        def add(play_id, text, weight):
+            for token in tokenize(text):
+                postings[token][play_id] += weight
+
+        for play_id, title, description in Play.objects.values_list(
+            "id", "title", "description"
+        ):
+            add(play_id, title, TITLE_WEIGHT)
+            add(play_id, description, DESCRIPTION_WEIGHT)
+
+        actors = Play.actors.through.objects.values_list(
+            "play_id", "actor__first_name", "actor__last_name"
+        )
+        for play_id, first_name, last_name in actors:
+            add(play_id, f"{first_name} {last_name}", PEOPLE_WEIGHT)
+
+        genres = Play.genres.through.objects.values_list(
+            "play_id", "genre__name"
+        )
+        for play_id, name in genres:
+            add(play_id, name, PEOPLE_WEIGHT)
+
+        self.postings = {
+            token: dict(plays) for token, plays in postings.items()
+        }
+
+    def search(self, text):
+        """Ids of plays matching every token of text, best match first"""
+        with self.lock:
+            if self.stale:
+                self.stale = False
+                self.build()
+            postings = self.postings
+
+        tokens = tokenize(text)
+        if not tokens:
+            return []
+
+        matches = [postings.get(token, {}) for token in tokens]
+        play_ids = set(matches[0]).intersection(*matches[1:])
+        scores = {
+            play_id: sum(match[play_id] for match in matches)
+            for play_id in play_ids
+        }
+        return sorted(scores, key=lambda play_id: (-scores[play_id], play_id))
+
+
+inverted_index = InvertedIndex()
+
+
+def refresh_search_vectors(play_ids=None):
+    """Recompute the search data of the given plays (all when None)"""
+    if not uses_search_vector():
+        inverted_index.mark_stale()
+        return
+
+    plays = Play.objects.all()
+    if play_ids is not None:
+        plays = plays.filter(pk__in=play_ids)
+    plays.update(search_vector=play_search_vector())
+
+
+def search_plays(queryset, text):
+    """
+    Filter queryset down to its SEARCH_RESULTS_LIMIT plays best matching
+    text, ordered by rank
+    """
+    if uses_search_vector():
+        query = SearchQuery(
+            text, config=SEARCH_CONFIG, search_type="websearch"
+        )
+        ranked = (
+            queryset.filter(search_vector=query)
+            .annotate(rank=SearchRank(F("search_vector"), query))
+            .order_by("-rank", "title", "id")
+        )
+        # a subquery rather than a slice, pagination still filters
+        # and orders the result
+        best = ranked.values("pk")[:SEARCH_RESULTS_LIMIT]
+        return ranked.filter(pk__in=best)
+
+    play_ids = inverted_index.search(text)
+    if len(play_ids) > SEARCH_RESULTS_LIMIT:
+        # the best matches among the plays queryset keeps
+        kept = set(
+            queryset.prefetch_related(None).values_list("pk", flat=True)
+        )
+        play_ids = [play_id for play_id in play_ids if play_id in kept]
+    play_ids = play_ids[:SEARCH_RESULTS_LIMIT]
+    if not play_ids:
+        return queryset.none()
+
+    return queryset.filter(pk__in=play_ids).order_by(
+        Case(
+            *[
+                When(pk=play_id, then=Value(position))
+                for position, play_id in enumerate(play_ids)
+            ]
+        )
+    )
@@ -0,0 +1,223 @@
+import asyncio
+import json
+import logging
+import threading
+from collections import Counter, defaultdict
+from contextlib import asynccontextmanager
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+# event telling a subscriber it missed changes and needs a new snapshot
+RESYNC = {"resync": True}
+
+
+class LocalBroker:
+    """
+    Pub/sub between the threads and event loops of one process. Enough
+    when reservations and streams are served by the same ASGI process.
+    """
+
+    # changes a slow subscriber may lag behind before it is resynced
+    queue_size = 1000
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.subscribers = defaultdict(set)
+
+    def publish(self, performance_id, event):
+        with self.lock:
+            subscribers = list(self.subscribers.get(performance_id, ()))
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(self.deliver, queue, event)
+            except RuntimeError:
+                # the loop of a finished stream is closed
+                pass
+
+    def deliver(self, queue, event):
+        try:
+            queue.put_nowait(event)
+        except asyncio.QueueFull:
+            while not queue.empty():
+                queue.get_nowait()
+            queue.put_nowait(RESYNC)
+
+    @asynccontextmanager
+    async def subscribe(self, performance_id):
+        """Yield a coroutine function returning the next event"""
+        subscriber = (
+            asyncio.get_running_loop(),
+            asyncio.Queue(maxsize=self.queue_size),
+        )
+        with self.lock:
+            self.subscribers[performance_id].add(subscriber)
+        try:
+            yield subscriber[1].get
+        finally:
+            with self.lock:
+                self.subscribers[performance_id].discard(subscriber)
+                if not self.subscribers[performance_id]:
+                    del self.subscribers[performance_id]
+
+
+class RedisBroker:
+    """
+    Pub/sub over Redis channels, for several processes or nodes: seats
+    sold by any worker reach the streams of every ASGI server.
+    The streams of a process share one Redis connection, subscribed to
+    the channels of the performances they follow, and get its events
+    through a LocalBroker. Expects one event loop per process, as ASGI
+    servers run.
+    """
+
+    channel_prefix = "seats:"
+    # seconds between attempts to restore a lost subscription
+    reconnect_delay = 1
+
+    def __init__(self):
+        import redis
+
+        self.url = settings.SEAT_EVENTS_REDIS_URL
+        self.client = redis.Redis.from_url(self.url)
+        self.local = LocalBroker()
+        # performance id -> streams of this process following it
+        self.channels = Counter()
+        self.channels_lock = asyncio.Lock()
+        self.async_client = None
+        self.pubsub = None
+        self.listener = None
+
+    def channel(self, performance_id):
+        return f"{self.channel_prefix}{performance_id}"
+
+    def publish(self, performance_id, event):
+        self.client.publish(self.channel(performance_id), json.dumps(event))
+
+    async def connect(self):
+        """
+        New connection subscribed to the followed channels, listen()
+        stops once there are none
+        """
+        from redis import asyncio as aioredis
+
+        if self.pubsub is not None:
+            try:
+                await self.pubsub.aclose()
+            except Exception:
+                pass
+            self.pubsub = None
+
+        if self.channels:
+            if self.async_client is None:
+                self.async_client = aioredis.Redis.from_url(self.url)
+            pubsub = self.async_client.pubsub()
+            await pubsub.subscribe(
+                *[
+                    self.channel(performance_id)
+                    for performance_id in self.channels
+                ]
+            )
+            self.pubsub = pubsub
+
+    async def listen(self):
+        """Hand the events of every subscribed channel to local streams"""
+        while self.pubsub is not None:
+            try:
+                message = await self.pubsub.get_message(
+                    ignore_subscribe_messages=True, timeout=None
+                )
+            except Exception:
+                logger.exception("Seat events subscription lost")
+                await asyncio.sleep(self.reconnect_delay)
+                async with self.channels_lock:
+                    try:
+                        await self.connect()
+                    except Exception:
+                        continue
+                # events published meanwhile are lost
+                for performance_id in list(self.channels):
+                    self.local.publish(performance_id, RESYNC)
+                continue
+
+            if message is not None:
+                performance_id = int(
+                    message["channel"][len(self.channel_prefix):]
+                )
+                self.local.publish(performance_id, json.loads(message["data"]))
+        self.listener = None
+
+    async def follow(self, performance_id):
+        async with self.channels_lock:
+            self.channels[performance_id] += 1
+            try:
+                if self.pubsub is None:
+                    await self.connect()
+                elif self.channels[performance_id] == 1:
+                    await self.pubsub.subscribe(self.channel(performance_id))
+            except Exception:
+                self.channels[performance_id] -= 1
+                if not self.channels[performance_id]:
+                    del self.channels[performance_id]
+                raise
+
+            if self.listener is None:
+                self.listener = asyncio.ensure_future(self.listen())
+
+    async def unfollow(self, performance_id):
+        async with self.channels_lock:
+            self.channels[performance_id] -= 1
+            if self.channels[performance_id]:
+                return
+
+            del self.channels[performance_id]
+            try:
+                await self.pubsub.unsubscribe(self.channel(performance_id))
+            except Exception:
+                # listen() restores a lost connection with the channels
+                # still followed only
+                pass
+
+    @asynccontextmanager
+    async def subscribe(self, performance_id):
+        async with self.local.subscribe(performance_id) as next_event:
+            await self.follow(performance_id)
+            try:
+                yield next_event
+            finally:
+                await self.unfollow(performance_id)
+
+
+broker = None
+broker_lock = threading.Lock()
+
+
+def get_broker():
+    global broker
+
+    with broker_lock:
+        if broker is None:
+            broker = import_string(settings.SEAT_EVENTS_BROKER)()
+    return broker
+
+
+def publish_seats(performance_id, taken=(), released=()):
+    """Tell the seat streams of a performance once the transaction commits"""
+    event = {
+        "taken": sorted([row, seat] for row, seat in taken),
+        "released": sorted([row, seat] for row, seat in released),
+    }
+
+    def publish():
+        try:
+            get_broker().publish(performance_id, event)
+        except Exception:
+            # the sale stands, streams show it in their next snapshot
+            logger.exception(
+                "Publishing seats of performance %s failed", performance_id
+            )
+
+    transaction.on_commit(publish)
@@ -0,0 +1,88 @@
+import numpy as np
+from django.utils import timezone
+
+from theatre.models import SeatHold, Ticket
+
+# fraction of the hall depth where the best row sits, 0 is the front row
+PREFERRED_ROW_POSITION = 0.4
+
+# one row away from the preferred row costs as much as this many seats
+# off centre
+ROW_WEIGHT = 2.0
+
+
+def occupancy_matrix(performance, user_id):
+    """
+    rows x seats_in_row booleans of the performance, True where a seat
+    is sold or held by somebody other than the user
+    """
+    theatre_hall = performance.theatre_hall
+    occupied = np.zeros(
+        (theatre_hall.rows, theatre_hall.seats_in_row), dtype=bool
+    )
+
+    sold = (
+        Ticket.objects.filter(performance=performance)
+        .order_by()
+        .values_list("row", "seat")
+    )
+    held = (
+        SeatHold.objects.filter(
+            performance=performance, expires_at__gt=timezone.now()
+        )
+        .exclude(user_id=user_id)
+        .order_by()
+        .values_list("row", "seat")
+    )
+    seats = np.array(sold.union(held), dtype=np.intp).reshape(-1, 2)
+    # seats outside of a hall shrunk after the sale hold no place in it
+    seats = seats[
+        (seats[:, 0] >= 1)
+        & (seats[:, 0] <= theatre_hall.rows)
+        & (seats[:, 1] >= 1)
+        & (seats[:, 1] <= theatre_hall.seats_in_row)
+    ]
+    occupied[seats[:, 0] - 1, seats[:, 1] - 1] = True
+    return occupied
+
+
+def seat_scores(rows, seats_in_row, count):
+    """
+    rows x (seats_in_row - count + 1) scores of every run of count
+    seats by the run's first seat, lower is better: the distance of the
+    row from the preferred row plus how far the run is off centre
+    """
+    preferred_row = (rows - 1) * PREFERRED_ROW_POSITION
+    row_distance = np.abs(np.arange(rows) - preferred_row)
+
+    run_centres = np.arange(seats_in_row - count + 1) + (count - 1) / 2
+    centre_distance = np.abs(run_centres - (seats_in_row - 1) / 2)
+
+    return ROW_WEIGHT * row_distance[:, np.newaxis] + centre_distance
+
+
+def find_best_seats(occupied, count):
+    """
+    The best run of count free adjacent seats in a row as (row, seat)
+    pairs numbered from 1, or None when no row has one
+    """
+    rows, seats_in_row = occupied.shape
+    if count > seats_in_row:
+        return None
+
+    # taken seats in every window of count seats, by prefix sums per row
+    taken = np.zeros((rows, seats_in_row + 1), dtype=np.int32)
+    np.cumsum(occupied, axis=1, out=taken[:, 1:])
+    taken_in_run = taken[:, count:] - taken[:, :-count]
+
+    scores = np.where(
+        taken_in_run == 0, seat_scores(rows, seats_in_row, count), np.inf
+    )
+    row, first_seat = np.unravel_index(np.argmin(scores), scores.shape)
+    if scores[row, first_seat] == np.inf:
+        return None
+
+    return [
+        (int(row) + 1, int(first_seat) + seat)
+        for seat in range(1, count + 1)
+    ]
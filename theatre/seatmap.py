@@ -0,0 +1,40 @@
+import base64
+
+from theatre.models import Ticket
+
+
+def seat_index(row, seat, seats_in_row):
+    """Position of a seat in the row-major seat map (rows and seats from 1)"""
+    return (row - 1) * seats_in_row + (seat - 1)
+
+
+def build_seat_bitmap(performance):
+    """
+    Build a bitset of taken seats for the performance.
+    One bit per seat of the hall in row-major order, the most significant
+    bit of the first byte is row 1, seat 1.
+    """
+    theatre_hall = performance.theatre_hall
+    bitmap = bytearray((theatre_hall.capacity + 7) // 8)
+
+    # seats outside of a hall shrunk after the sale hold no place in it
+    taken = (
+        Ticket.objects.filter(
+            performance=performance,
+            row__gte=1,
+            row__lte=theatre_hall.rows,
+            seat__gte=1,
+            seat__lte=theatre_hall.seats_in_row,
+        )
+        .order_by()
+        .values_list("row", "seat")
+    )
+    for row, seat in taken:
+        index = seat_index(row, seat, theatre_hall.seats_in_row)
+        bitmap[index >> 3] |= 0x80 >> (index & 7)
+
+    return bytes(bitmap)
+
+
+def encode_seat_bitmap(bitmap):
+    return base64.b64encode(bitmap).decode("ascii")
@@ -1,4 +1,12 @@
-from django.db import transaction
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.core.files.storage import default_storage
+from django.db.models import F
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema_field
 from rest_framework import serializers
 from theatre.models import (
     TheatreHall,
@@ -9,36 +17,150 @@ from theatre.models import (
     Reservation,
     Ticket
 )
+from theatre.booking import (
+    lock_performances,
+    release_holds,
+    taken_seats,
+    hold_seats,
+)
+from theatre.exceptions import NoAdjacentSeats, SeatsTaken
+from theatre.images import (
+    DEFAULT_RENDITION,
+    RENDITION_FORMATS,
+    RENDITIONS,
+    strip_upload,
+)
+from theatre.scheduling import (
+    MAX_BULK_PERFORMANCES,
+    MAX_RECURRENCE_DAYS,
+    check_play_duration,
+    check_schedule,
+    expand_recurrence,
+    lock_halls,
+)
+from theatre.seat_events import publish_seats
+from theatre.seat_finder import find_best_seats, occupancy_matrix
+from theatre.seatmap import build_seat_bitmap, encode_seat_bitmap
+from theatre_service_api.metrics import TimedModelSerializer
 
 
-class TheatreHallSerializer(serializers.ModelSerializer):
+class TheatreHallSerializer(TimedModelSerializer):
     class Meta:
         model = TheatreHall
         fields = ("id", "name", "rows", "seats_in_row", "capacity")
 
 
-class ActorSerializer(serializers.ModelSerializer):
+class ActorSerializer(TimedModelSerializer):
     class Meta:
         model = Actor
         fields = ("id", "first_name", "last_name", "full_name")
 
 
-class GenreSerializer(serializers.ModelSerializer):
+class GenreSerializer(TimedModelSerializer):
     class Meta:
         model = Genre
         fields = ("id", "name")
 
 
-class PlaySerializer(serializers.ModelSerializer):
+def media_url(name, request=None):
+    url = default_storage.url(name)
+    if request is not None:
+        return request.build_absolute_uri(url)
+    return url
+
+
+@extend_schema_field(OpenApiTypes.URI)
+class PlayImageRenditionField(serializers.Field):
+    """
+    URL of a resized WebP copy of the play image, the size picked with
+    ?image_size=thumb|card|full. The uploaded file until it is resized.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs["read_only"] = True
+        kwargs.setdefault("source", "*")
+        super().__init__(**kwargs)
+
+    def to_representation(self, play):
+        request = self.context.get("request")
+        rendition = DEFAULT_RENDITION
+        if request is not None:
+            rendition = request.query_params.get("image_size", rendition)
+            if rendition not in RENDITIONS:
+                rendition = DEFAULT_RENDITION
+
+        resized = play.image_renditions.get("renditions", {}).get(rendition)
+        name = resized["webp"] if resized else play.image.name
+        if not name:
+            return None
+        return media_url(name, request)
+
+
+@extend_schema_field(OpenApiTypes.OBJECT)
+class PlayImagesField(serializers.Field):
+    """Every resized copy of the play image with its size and file URLs"""
+
+    def __init__(self, **kwargs):
+        kwargs["read_only"] = True
+        kwargs.setdefault("source", "*")
+        super().__init__(**kwargs)
+
+    def to_representation(self, play):
+        request = self.context.get("request")
+        return {
+            rendition: {
+                key: media_url(value, request)
+                if key in RENDITION_FORMATS
+                else value
+                for key, value in resized.items()
+            }
+            for rendition, resized in play.image_renditions.get(
+                "renditions", {}
+            ).items()
+        }
+
+
+class PlaySerializer(TimedModelSerializer):
+    # declared explicitly because DRF leaves m2m fields
+    # with a custom through model read-only
+    genres = serializers.PrimaryKeyRelatedField(
+        many=True, queryset=Genre.objects.all(), required=False
+    )
+    actors = serializers.PrimaryKeyRelatedField(
+        many=True, queryset=Actor.objects.all(), required=False
+    )
+
     class Meta:
         model = Play
         fields = ("id", "title", "duration", "description", "genres", "actors")
 
+    def update(self, instance, validated_data):
+        duration = validated_data.get("duration", instance.duration)
+        if duration <= instance.duration:
+            return super().update(instance, validated_data)
+
+        # the halls stay locked until the play is saved, so nothing is
+        # scheduled meanwhile in the time its performances now take
+        with transaction.atomic():
+            check_play_duration(instance.pk, duration)
+            return super().update(instance, validated_data)
+
+
+class PlayImageSerializer(TimedModelSerializer):
+    # filled in once the upload is resized in the background
+    images = PlayImagesField()
 
-class PlayImageSerializer(serializers.ModelSerializer):
     class Meta:
         model = Play
-        fields = ("id", "image")
+        fields = ("id", "image", "images")
+
+    def validate_image(self, image):
+        if image is None:
+            return image
+        try:
+            return strip_upload(image)
+        except ValueError as error:
+            raise serializers.ValidationError(str(error))
 
 
 class PlayListSerializer(PlaySerializer):
@@ -52,6 +174,7 @@ class PlayListSerializer(PlaySerializer):
         read_only=True,
         slug_field="full_name"
     )
+    image = PlayImageRenditionField()
 
     class Meta:
         model = Play
@@ -66,9 +189,10 @@ class PlayListSerializer(PlaySerializer):
         )
 
 
-class PlayDetailSerializer(serializers.ModelSerializer):
+class PlayDetailSerializer(TimedModelSerializer):
     genres = GenreSerializer(many=True, read_only=True)
     actors = ActorSerializer(many=True, read_only=True)
+    images = PlayImagesField()
 
     class Meta:
         model = Play
@@ -80,16 +204,42 @@ class PlayDetailSerializer(serializers.ModelSerializer):
             "genres",
             "actors",
             "image",
+            "images",
         )
 
 
-class PerformanceSerializer(serializers.ModelSerializer):
+class PerformanceSerializer(TimedModelSerializer):
     class Meta:
         model = Performance
         fields = ("id", "play", "theatre_hall", "show_time")
 
+    def save(self, **kwargs):
+        """Book the hall, unless another performance has it at the time"""
+        data = {**self.validated_data, **kwargs}
+        play = data.get("play", getattr(self.instance, "play", None))
+        theatre_hall = data.get(
+            "theatre_hall", getattr(self.instance, "theatre_hall", None)
+        )
+        show_time = data.get(
+            "show_time", getattr(self.instance, "show_time", None)
+        )
 
-class PerformanceListSerializer(serializers.ModelSerializer):
+        with transaction.atomic():
+            lock_halls([theatre_hall.id])
+            check_schedule(
+                [
+                    (
+                        theatre_hall.id,
+                        show_time,
+                        show_time + timedelta(minutes=play.duration),
+                    )
+                ],
+                exclude=[self.instance.id] if self.instance else (),
+            )
+            return super().save(**kwargs)
+
+
+class PerformanceListSerializer(TimedModelSerializer):
     play_title = serializers.CharField(source="play.title", read_only=True)
     theatre_hall = serializers.CharField(
         source="theatre_hall.name",
@@ -100,7 +250,7 @@ class PerformanceListSerializer(serializers.ModelSerializer):
         read_only=True
     )
     tickets_available = serializers.IntegerField(read_only=True)
-    play_image = serializers.ImageField(source="play.image", read_only=True)
+    play_image = PlayImageRenditionField(source="play")
 
     class Meta:
         model = Performance
@@ -115,19 +265,79 @@ class PerformanceListSerializer(serializers.ModelSerializer):
         )
 
 
-class TicketSerializer(serializers.ModelSerializer):
+class TicketPerformanceField(serializers.PrimaryKeyRelatedField):
+    """Resolve performances from the batch prefetched by the list parent"""
+
+    def to_internal_value(self, data):
+        batch = getattr(self.parent.parent, "performances", None)
+        if batch is not None:
+            try:
+                return batch[int(data)]
+            except (KeyError, TypeError, ValueError):
+                pass
+        return super().to_internal_value(data)
+
+
+class TicketBatchSerializer(serializers.ListSerializer):
+    """
+    Validate a batch of tickets at once: each distinct performance
+    with its hall is fetched a single time and repeated seats
+    are rejected before anything is written.
+    """
+
+    def to_internal_value(self, data):
+        if isinstance(data, list):
+            performance_ids = set()
+            for item in data:
+                if isinstance(item, dict):
+                    try:
+                        performance_ids.add(int(item.get("performance")))
+                    except (TypeError, ValueError):
+                        pass
+            self.performances = Performance.objects.select_related(
+                "theatre_hall"
+            ).in_bulk(performance_ids)
+        return super().to_internal_value(data)
+
+    def validate(self, attrs):
+        seats = set()
+        duplicates = set()
+        for ticket in attrs:
+            seat = (ticket["performance"].id, ticket["row"], ticket["seat"])
+            if seat in seats:
+                duplicates.add(seat)
+            seats.add(seat)
+
+        if duplicates:
+            raise serializers.ValidationError(
+                "Seats are repeated in the reservation: "
+                + "; ".join(
+                    f"row {row}, seat {seat} (performance {performance_id})"
+                    for performance_id, row, seat in sorted(duplicates)
+                )
+            )
+        return attrs
+
+
+class TicketSerializer(TimedModelSerializer):
+    performance = TicketPerformanceField(
+        queryset=Performance.objects.select_related("theatre_hall")
+    )
 
     class Meta:
         model = Ticket
         fields = ("id", "row", "seat", "performance")
+        list_serializer_class = TicketBatchSerializer
+        # taken seats are checked for the whole batch at once
+        validators = []
 
     def validate(self, attrs):
         data = super(TicketSerializer, self).validate(attrs=attrs)
         Ticket.validate_ticket(
             attrs["row"],
             attrs["seat"],
-            attrs["performance"],
-            attrs["error_to_raise"]
+            attrs["performance"].theatre_hall,
+            serializers.ValidationError
         )
         return data
 
@@ -138,6 +348,84 @@ class TicketSeatSerializer(TicketSerializer):
         fields = ("row", "seat")
 
 
+class SeatSerializer(serializers.Serializer):
+    row = serializers.IntegerField()
+    seat = serializers.IntegerField()
+
+
+class SeatHoldSerializer(serializers.Serializer):
+    seats = SeatSerializer(many=True, allow_empty=False)
+    expires_at = serializers.DateTimeField(read_only=True)
+
+    def validate_seats(self, seats):
+        if len(seats) > settings.MAX_HELD_SEATS:
+            raise serializers.ValidationError(
+                f"At most {settings.MAX_HELD_SEATS} seats can be held."
+            )
+        theatre_hall = self.context["performance"].theatre_hall
+        for seat in seats:
+            Ticket.validate_ticket(
+                seat["row"],
+                seat["seat"],
+                theatre_hall,
+                serializers.ValidationError
+            )
+        return seats
+
+    def create(self, validated_data):
+        seats = [
+            (seat["row"], seat["seat"]) for seat in validated_data["seats"]
+        ]
+        with transaction.atomic():
+            holds = hold_seats(
+                self.context["request"].user.pk,
+                self.context["performance"],
+                seats
+            )
+        return {"seats": holds, "expires_at": holds[0].expires_at}
+
+
+class BestSeatsSerializer(serializers.Serializer):
+    count = serializers.IntegerField(min_value=1, write_only=True)
+    seats = SeatSerializer(many=True, read_only=True)
+    expires_at = serializers.DateTimeField(read_only=True, allow_null=True)
+
+    def validate_count(self, count):
+        seats_in_row = self.context["performance"].theatre_hall.seats_in_row
+        if count > seats_in_row:
+            raise serializers.ValidationError(
+                f"Rows of this hall have {seats_in_row} seats."
+            )
+        if count > settings.MAX_HELD_SEATS:
+            raise serializers.ValidationError(
+                f"At most {settings.MAX_HELD_SEATS} seats can be held."
+            )
+        return count
+
+    def find(self):
+        """The best free (row, seat) pairs for the requested count"""
+        count = self.validated_data["count"]
+        seats = find_best_seats(
+            occupancy_matrix(
+                self.context["performance"], self.context["request"].user.pk
+            ),
+            count,
+        )
+        if seats is None:
+            raise NoAdjacentSeats(count)
+        return seats
+
+    def create(self, validated_data):
+        performance = self.context["performance"]
+        with transaction.atomic():
+            # nobody takes the seats between finding and holding them
+            lock_performances([performance.id])
+            holds = hold_seats(
+                self.context["request"].user.pk, performance, self.find()
+            )
+        return {"seats": holds, "expires_at": holds[0].expires_at}
+
+
 class PerformanceDetailSerializer(PerformanceSerializer):
     play = PlayListSerializer(many=False, read_only=True)
     theatre_hall = TheatreHallSerializer(many=False, read_only=True)
@@ -149,7 +437,25 @@ class PerformanceDetailSerializer(PerformanceSerializer):
         fields = ("id", "show_time", "play", "theatre_hall", "taken_places")
 
 
-class ReservationSerializer(serializers.ModelSerializer):
+class PerformanceSeatMapSerializer(PerformanceSerializer):
+    play = PlayListSerializer(many=False, read_only=True)
+    theatre_hall = TheatreHallSerializer(many=False, read_only=True)
+    seat_map = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Performance
+        fields = ("id", "show_time", "play", "theatre_hall", "seat_map")
+
+    def get_seat_map(self, performance) -> dict:
+        return {
+            "encoding": "bitmap",
+            "rows": performance.theatre_hall.rows,
+            "seats_in_row": performance.theatre_hall.seats_in_row,
+            "taken": encode_seat_bitmap(build_seat_bitmap(performance)),
+        }
+
+
+class ReservationSerializer(TimedModelSerializer):
     tickets = TicketSerializer(many=True, read_only=False, allow_empty=False)
 
     class Meta:
@@ -159,9 +465,45 @@ class ReservationSerializer(serializers.ModelSerializer):
     def create(self, validated_data):
         with transaction.atomic():
             tickets_data = validated_data.pop('tickets')
+            seats = {
+                (ticket_data["performance"].id,
+                 ticket_data["row"],
+                 ticket_data["seat"])
+                for ticket_data in tickets_data
+            }
+            user_id = validated_data["user_id"]
+
+            lock_performances({seat[0] for seat in seats})
+            taken = taken_seats(seats, user_id)
+            if taken:
+                raise SeatsTaken(taken)
+            release_holds(user_id, seats)
+
             reservation = Reservation.objects.create(**validated_data)
-            for ticket_data in tickets_data:
-                Ticket.objects.create(reservation=reservation, **ticket_data)
+            try:
+                with transaction.atomic():
+                    Ticket.objects.bulk_create(
+                        Ticket(reservation=reservation, **ticket_data)
+                        for ticket_data in tickets_data
+                    )
+            except IntegrityError:
+                raise SeatsTaken(taken_seats(seats, user_id) or seats)
+
+            sold = Counter(
+                ticket_data["performance"].id for ticket_data in tickets_data
+            )
+            for performance_id, count in sold.items():
+                Performance.objects.filter(pk=performance_id).update(
+                    tickets_sold=F("tickets_sold") + count
+                )
+                publish_seats(
+                    performance_id,
+                    taken=[
+                        (row, seat)
+                        for seat_performance_id, row, seat in seats
+                        if seat_performance_id == performance_id
+                    ],
+                )
             return reservation
 
 
@@ -171,3 +513,166 @@ class TicketListSerializer(TicketSerializer):
 
 class ReservationListSerializer(ReservationSerializer):
     tickets = TicketListSerializer(many=True, read_only=True)
+
+
+class TicketExportSerializer(serializers.Serializer):
+    date_from = serializers.DateField(required=False)
+    date_to = serializers.DateField(required=False)
+
+    def validate(self, attrs):
+        date_from = attrs.get("date_from")
+        date_to = attrs.get("date_to")
+        if date_from and date_to and date_from > date_to:
+            raise serializers.ValidationError(
+                {"date_to": "date_to must not be before date_from"}
+            )
+        return attrs
+
+
+class PerformanceBulkItemSerializer(serializers.Serializer):
+    play = serializers.IntegerField()
+    theatre_hall = serializers.IntegerField()
+    show_time = serializers.DateTimeField()
+
+
+class PerformanceRecurrenceSerializer(serializers.Serializer):
+    play = serializers.IntegerField()
+    theatre_hall = serializers.IntegerField()
+    start_date = serializers.DateField()
+    end_date = serializers.DateField()
+    weekdays = serializers.ListField(
+        child=serializers.ChoiceField(choices=range(7)),
+        allow_empty=False,
+        help_text="Days of the week, 0 is Monday",
+    )
+    times = serializers.ListField(
+        child=serializers.TimeField(), allow_empty=False
+    )
+
+    def validate(self, attrs):
+        days = (attrs["end_date"] - attrs["start_date"]).days
+        if days < 0:
+            raise serializers.ValidationError(
+                {"end_date": "end_date must not be before start_date"}
+            )
+        if days >= MAX_RECURRENCE_DAYS:
+            raise serializers.ValidationError(
+                {
+                    "end_date": "A rule may span at most "
+                    f"{MAX_RECURRENCE_DAYS} days"
+                }
+            )
+        return attrs
+
+
+class PerformanceBulkSerializer(serializers.Serializer):
+    """
+    Performances listed one by one and/or expanded from recurrence
+    rules, created together or not at all. Plays and halls are fetched
+    once for the whole request.
+    """
+
+    performances = PerformanceBulkItemSerializer(many=True, required=False)
+    recurrences = PerformanceRecurrenceSerializer(many=True, required=False)
+
+    def validate(self, attrs):
+        performances = attrs.get("performances", [])
+        recurrences = attrs.get("recurrences", [])
+        if not performances and not recurrences:
+            raise serializers.ValidationError(
+                "Provide performances or recurrences"
+            )
+
+        items = performances + recurrences
+        plays = Play.objects.only("id", "duration").in_bulk(
+            {item["play"] for item in items}
+        )
+        halls = TheatreHall.objects.only("id").in_bulk(
+            {item["theatre_hall"] for item in items}
+        )
+        errors = {}
+        unknown_plays = {item["play"] for item in items} - set(plays)
+        if unknown_plays:
+            errors["play"] = f"Unknown plays: {sorted(unknown_plays)}"
+        unknown_halls = {item["theatre_hall"] for item in items} - set(halls)
+        if unknown_halls:
+            errors["theatre_hall"] = f"Unknown halls: {sorted(unknown_halls)}"
+        if errors:
+            raise serializers.ValidationError(errors)
+
+        schedule = [
+            (item["play"], item["theatre_hall"], item["show_time"])
+            for item in performances
+        ]
+        for rule in recurrences:
+            schedule.extend(
+                (rule["play"], rule["theatre_hall"], show_time)
+                for show_time in expand_recurrence(
+                    rule["start_date"],
+                    rule["end_date"],
+                    set(rule["weekdays"]),
+                    rule["times"],
+                )
+            )
+            if len(schedule) > MAX_BULK_PERFORMANCES:
+                break
+        if len(schedule) > MAX_BULK_PERFORMANCES:
+            raise serializers.ValidationError(
+                "At most "
+                f"{MAX_BULK_PERFORMANCES} performances can be created at once"
+            )
+        if not schedule:
+            raise serializers.ValidationError(
+                "The recurrences produce no performances"
+            )
+
+        attrs["schedule"] = schedule
+        attrs["durations"] = {
+            play_id: play.duration for play_id, play in plays.items()
+        }
+        return attrs
+
+    def create(self, validated_data):
+        schedule = validated_data["schedule"]
+        durations = validated_data["durations"]
+
+        performances = [
+            Performance(
+                play_id=play_id,
+                theatre_hall_id=hall_id,
+                show_time=show_time,
+                end_time=show_time + timedelta(minutes=durations[play_id]),
+            )
+            for play_id, hall_id, show_time in schedule
+        ]
+
+        with transaction.atomic():
+            lock_halls({hall_id for _, hall_id, _ in schedule})
+            check_schedule(
+                [
+                    (
+                        performance.theatre_hall_id,
+                        performance.show_time,
+                        performance.end_time,
+                    )
+                    for performance in performances
+                ]
+            )
+            created = Performance.objects.bulk_create(performances)
+
+        show_times = [performance.show_time for performance in created]
+        return {
+            "created": len(created),
+            "first_show_time": min(show_times),
+            "last_show_time": max(show_times),
+            "plays": sorted(durations),
+            "theatre_halls": sorted({hall_id for _, hall_id, _ in schedule}),
+        }
+
+
+class PerformanceBulkSummarySerializer(serializers.Serializer):
+    created = serializers.IntegerField()
+    first_show_time = serializers.DateTimeField()
+    last_show_time = serializers.DateTimeField()
+    plays = serializers.ListField(child=serializers.IntegerField())
+    theatre_halls = serializers.ListField(child=serializers.IntegerField())
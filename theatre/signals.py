@@ -0,0 +1,183 @@
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import F, QuerySet
+from django.db.models.functions import Greatest
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+    pre_save,
+)
+from django.dispatch import receiver
+
+from theatre.cache import invalidate_catalog
+from theatre.daily_schedule import performance_scopes, refresh_schedule
+from theatre.images import schedule_image_processing
+from theatre.models import (
+    Actor,
+    Genre,
+    Performance,
+    Play,
+    Reservation,
+    TheatreHall,
+    Ticket,
+)
+from theatre.scheduling import refresh_end_times
+from theatre.search import refresh_search_vectors
+from theatre.seat_events import publish_seats
+
+
+@receiver(post_delete, sender=Ticket)
+def release_sold_seat(sender, instance, origin=None, **kwargs):
+    """
+    Keep Performance.tickets_sold in step with tickets deleted directly,
+    the tickets of a deleted reservation are released all at once
+    """
+    model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    if origin is not None and model is not Ticket:
+        return
+
+    Performance.objects.filter(
+        pk=instance.performance_id, tickets_sold__gt=0
+    ).update(tickets_sold=F("tickets_sold") - 1)
+    publish_seats(
+        instance.performance_id, released=[(instance.row, instance.seat)]
+    )
+
+
+@receiver(pre_delete, sender=Reservation)
+def reservation_deleting(sender, instance, **kwargs):
+    """Remember the seats of a reservation, its tickets go first"""
+    instance.released_seats = defaultdict(list)
+    for performance_id, row, seat in Ticket.objects.filter(
+        reservation=instance
+    ).values_list("performance_id", "row", "seat"):
+        instance.released_seats[performance_id].append((row, seat))
+
+
+@receiver(post_delete, sender=Reservation)
+def release_reservation_seats(sender, instance, **kwargs):
+    """One tickets_sold update and seats event per performance"""
+    for performance_id, seats in getattr(
+        instance, "released_seats", {}
+    ).items():
+        Performance.objects.filter(pk=performance_id).update(
+            tickets_sold=Greatest(F("tickets_sold") - len(seats), 0)
+        )
+        publish_seats(performance_id, released=seats)
+
+
+@receiver(pre_save, sender=Performance)
+def performance_moving(sender, instance, raw=False, **kwargs):
+    """Remember the lists a performance leaves when it is moved"""
+    instance.previous_schedule_scopes = set()
+    if raw or instance.pk is None:
+        return
+
+    previous = (
+        Performance.objects.filter(pk=instance.pk)
+        .values_list("show_time", "play_id")
+        .first()
+    )
+    if previous:
+        instance.previous_schedule_scopes = performance_scopes(*previous)
+
+
+@receiver(post_save, sender=Performance)
+@receiver(post_delete, sender=Performance)
+def performance_changed(sender, instance, **kwargs):
+    """Refresh the daily schedule of the dates and play it is shown on"""
+    show_time = sender._meta.get_field("show_time").to_python(
+        instance.show_time
+    )
+    refresh_schedule(
+        performance_scopes(show_time, instance.play_id)
+        | getattr(instance, "previous_schedule_scopes", set())
+    )
+
+
+@receiver(post_save, sender=Play)
+@receiver(post_save, sender=Genre)
+@receiver(post_save, sender=Actor)
+@receiver(post_save, sender=TheatreHall)
+@receiver(post_delete, sender=Play)
+@receiver(post_delete, sender=Genre)
+@receiver(post_delete, sender=Actor)
+@receiver(post_delete, sender=TheatreHall)
+@receiver(m2m_changed, sender=Play.genres.through)
+@receiver(m2m_changed, sender=Play.actors.through)
+def catalog_changed(sender, **kwargs):
+    """
+    Retire cached plays, genres, actors and halls responses on commit,
+    moved earlier a request reading the old rows meanwhile would cache
+    them under the new version
+    """
+    if kwargs.get("action", "post_").startswith("post_"):
+        transaction.on_commit(invalidate_catalog)
+
+
+@receiver(pre_save, sender=Play)
+def play_changing(sender, instance, raw=False, **kwargs):
+    """
+    Remember the duration a play had, its end times are refreshed when
+    it changes. Play.clean() and PlaySerializer check it still fits.
+    """
+    instance.previous_duration = None
+    if raw or instance.pk is None:
+        return
+
+    instance.previous_duration = (
+        Play.objects.filter(pk=instance.pk)
+        .values_list("duration", flat=True)
+        .first()
+    )
+
+
+@receiver(post_save, sender=Play)
+def play_saved(sender, instance, raw=False, **kwargs):
+    """
+    Fixtures are indexed with rebuild_search_index and their images
+    resized with generate_image_renditions once loaded
+    """
+    if not raw:
+        refresh_search_vectors([instance.pk])
+        if getattr(instance, "previous_duration", None) not in (
+            None,
+            instance.duration,
+        ):
+            refresh_end_times([instance.pk])
+        if (instance.image.name or None) != (
+            instance.image_renditions.get("source")
+        ):
+            schedule_image_processing(instance.pk)
+
+
+@receiver(m2m_changed, sender=Play.genres.through)
+@receiver(m2m_changed, sender=Play.actors.through)
+def play_people_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if not action.startswith("post_"):
+        return
+
+    if not reverse:
+        refresh_search_vectors([instance.pk])
+    elif pk_set:
+        refresh_search_vectors(pk_set)
+    else:
+        refresh_search_vectors(instance.plays.values_list("pk", flat=True))
+
+
+@receiver(post_save, sender=Genre)
+@receiver(post_save, sender=Actor)
+def play_people_renamed(sender, instance, raw=False, **kwargs):
+    if not raw:
+        refresh_search_vectors(instance.plays.values_list("pk", flat=True))
+
+
+@receiver(pre_delete, sender=Genre)
+@receiver(pre_delete, sender=Actor)
+def play_people_deleted(sender, instance, **kwargs):
+    play_ids = list(instance.plays.values_list("pk", flat=True))
+    if play_ids:
+        transaction.on_commit(lambda: refresh_search_vectors(play_ids))
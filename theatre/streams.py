@@ -0,0 +1,187 @@
+import asyncio
+import json
+import re
+from io import BytesIO
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core import signals
+from django.core.handlers.asgi import ASGIRequest
+from rest_framework import exceptions
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from theatre.models import Performance
+from theatre.seat_events import RESYNC, get_broker
+from theatre.seatmap import build_seat_bitmap, encode_seat_bitmap
+
+SEAT_STREAM_PATH = re.compile(
+    r"^/api/theatre/performances/(?P<pk>\d+)/seats/stream/?$"
+)
+
+
+def sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n".encode()
+
+
+async def send_json(send, status, data):
+    body = json.dumps(data).encode()
+    await send(
+        {
+            "type": "http.response.start",
+            "status": status,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+            ],
+        }
+    )
+    await send({"type": "http.response.body", "body": body})
+
+
+def in_request_cycle(func):
+    """
+    func run in the ORM thread between request_started and
+    request_finished, as a view would be, so broken connections and
+    those past CONN_MAX_AGE are closed rather than kept by a stream
+    """
+
+    def run(*args, **kwargs):
+        signals.request_started.send(sender=SeatStreamRouter)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            signals.request_finished.send(sender=SeatStreamRouter)
+
+    return sync_to_async(run)
+
+
+async def seat_snapshot(performance):
+    bitmap = await in_request_cycle(build_seat_bitmap)(performance)
+    return {
+        "encoding": "bitmap",
+        "rows": performance.theatre_hall.rows,
+        "seats_in_row": performance.theatre_hall.seats_in_row,
+        "taken": encode_seat_bitmap(bitmap),
+    }
+
+
+def open_stream(scope, performance_id):
+    """
+    Performance of a stream its user may follow, the user authenticated
+    by the API's own authentication classes
+    """
+    request = Request(
+        ASGIRequest(scope, BytesIO()),
+        authenticators=[
+            authenticator()
+            for authenticator in api_settings.DEFAULT_AUTHENTICATION_CLASSES
+        ],
+    )
+    if not request.user.is_authenticated:
+        raise exceptions.NotAuthenticated()
+
+    try:
+        return Performance.objects.select_related("theatre_hall").get(
+            pk=performance_id
+        )
+    except Performance.DoesNotExist:
+        raise exceptions.NotFound()
+
+
+async def seat_stream(scope, receive, send, performance_id):
+    """
+    Server-sent events of one performance: a "snapshot" seat map like
+    ?seatmap=bitmap, then "seats" events listing seats taken and
+    released since. A new snapshot follows when the stream fell behind.
+    """
+    try:
+        performance = await in_request_cycle(open_stream)(
+            scope, performance_id
+        )
+    except exceptions.APIException as error:
+        await send_json(send, error.status_code, {"detail": error.detail})
+        return
+
+    # subscribed before the snapshot, so no change falls in between
+    async with get_broker().subscribe(performance.id) as next_event:
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [
+                    (b"content-type", b"text/event-stream"),
+                    (b"cache-control", b"no-cache"),
+                    (b"x-accel-buffering", b"no"),
+                ],
+            }
+        )
+        snapshot = await seat_snapshot(performance)
+        await send(
+            {
+                "type": "http.response.body",
+                "body": sse_event("snapshot", snapshot),
+                "more_body": True,
+            }
+        )
+
+        disconnected = asyncio.ensure_future(wait_for_disconnect(receive))
+        event = asyncio.ensure_future(next_event())
+        try:
+            while True:
+                done, _ = await asyncio.wait(
+                    {disconnected, event},
+                    timeout=settings.SEAT_STREAM_KEEPALIVE,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                if disconnected in done:
+                    return
+
+                if event in done:
+                    data = event.result()
+                    if data == RESYNC:
+                        body = sse_event(
+                            "snapshot", await seat_snapshot(performance)
+                        )
+                    else:
+                        body = sse_event("seats", data)
+                    event = asyncio.ensure_future(next_event())
+                else:
+                    # comment line, keeps proxies from closing the stream
+                    body = b": keepalive\n\n"
+
+                await send(
+                    {
+                        "type": "http.response.body",
+                        "body": body,
+                        "more_body": True,
+                    }
+                )
+        finally:
+            disconnected.cancel()
+            event.cancel()
+
+
+async def wait_for_disconnect(receive):
+    while (await receive())["type"] != "http.disconnect":
+        pass
+
+
+class SeatStreamRouter:
+    """
+    ASGI application answering seat streams itself and passing every
+    other request to Django. Streams stay open for as long as clients
+    listen, which a Django view would tie to a worker thread.
+    """
+
+    def __init__(self, application):
+        self.application = application
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["method"] == "GET":
+            match = SEAT_STREAM_PATH.match(scope["path"])
+            if match:
+                await seat_stream(scope, receive, send, int(match["pk"]))
+                return
+
+        await self.application(scope, receive, send)
@@ -0,0 +1,141 @@
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import include, path
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+
+from theatre.models import Actor, Genre, Reservation, Ticket
+from theatre.tests.tests_reservation_api import sample_performance
+from theatre.urls import async_urlpatterns
+from user.authentication import token_cache
+from user.serializers import JWTObtainPairSerializer
+
+urlpatterns = [
+    path("async/", include((async_urlpatterns, "async"))),
+    path("api/theatre/", include("theatre.urls")),
+]
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class AsyncReadViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        token_cache.clear()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com", password="testpassword"
+        )
+        access = JWTObtainPairSerializer.get_token(self.user).access_token
+        self.auth = {"AUTHORIZATION": f"Bearer {access}"}
+
+        self.performance = sample_performance()
+        play = self.performance.play
+        play.genres.add(Genre.objects.create(name="Drama"))
+        play.actors.add(
+            Actor.objects.create(first_name="George", last_name="Clooney")
+        )
+        reservation = Reservation.objects.create(user=self.user)
+        for seat in (1, 2):
+            Ticket.objects.create(
+                row=1,
+                seat=seat,
+                performance=self.performance,
+                reservation=reservation,
+            )
+        self.performance.tickets_sold = 2
+        self.performance.save()
+
+    def async_request(self, method, *args, **kwargs):
+        async def request():
+            return await getattr(self.async_client, method)(*args, **kwargs)
+
+        return async_to_sync(request)()
+
+    def get_both(self, path, data=None, **headers):
+        """Same GET through the async view and the router's viewset"""
+        headers = {**self.auth, **headers}
+        async_res = self.async_request(
+            "get", f"/async/{path}", data, **headers
+        )
+        sync_res = self.client.get(
+            f"/api/theatre/{path}",
+            data,
+            **{f"HTTP_{name}": value for name, value in headers.items()},
+        )
+        return async_res, sync_res
+
+    def test_play_list_matches_sync_view(self):
+        async_res, sync_res = self.get_both("plays/")
+
+        self.assertEqual(async_res.status_code, status.HTTP_200_OK)
+        self.assertEqual(async_res.json(), sync_res.json())
+        self.assertEqual(async_res.json()["results"][0]["genres"], ["Drama"])
+
+    def test_play_detail_matches_sync_view(self):
+        async_res, sync_res = self.get_both(
+            f"plays/{self.performance.play_id}/"
+        )
+
+        self.assertEqual(async_res.status_code, status.HTTP_200_OK)
+        self.assertEqual(async_res.json(), sync_res.json())
+        self.assertIn("ETag", async_res)
+
+    def test_performance_list_matches_sync_view(self):
+        async_res, sync_res = self.get_both(
+            "performances/", {"date": "2022-06-02", "count": "false"}
+        )
+
+        self.assertEqual(async_res.status_code, status.HTTP_200_OK)
+        self.assertEqual(async_res.json(), sync_res.json())
+        self.assertEqual(
+            async_res.json()["results"][0]["tickets_available"], 118
+        )
+
+    def test_performance_detail_matches_sync_view(self):
+        async_res, sync_res = self.get_both(
+            f"performances/{self.performance.id}/"
+        )
+
+        self.assertEqual(async_res.status_code, status.HTTP_200_OK)
+        self.assertEqual(async_res.json(), sync_res.json())
+        self.assertEqual(len(async_res.json()["taken_places"]), 2)
+
+    def test_seat_map_and_cursor_pages_use_sync_view(self):
+        async_res, sync_res = self.get_both(
+            f"performances/{self.performance.id}/", {"seatmap": "bitmap"}
+        )
+        self.assertEqual(async_res.json(), sync_res.json())
+
+        async_res, sync_res = self.get_both(
+            "performances/", {"pagination": "cursor"}
+        )
+        self.assertEqual(async_res.json(), sync_res.json())
+
+    def test_missing_performance(self):
+        async_res, _ = self.get_both("performances/0/")
+
+        self.assertEqual(async_res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_authentication_required(self):
+        res = self.async_request("get", "/async/plays/")
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_token_authentication(self):
+        token = Token.objects.create(user=self.user)
+
+        for _ in range(2):
+            async_res, _ = self.get_both(
+                "plays/", AUTHORIZATION=f"Token {token.key}"
+            )
+            self.assertEqual(async_res.status_code, status.HTTP_200_OK)
+
+        self.assertEqual(token_cache.stats()["misses"], 1)
+
+    def test_writes_use_sync_view(self):
+        res = self.async_request(
+            "post", "/async/plays/", {"title": "New play"}, **self.auth
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
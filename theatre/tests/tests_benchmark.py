@@ -0,0 +1,137 @@
+import json
+import os
+import random
+import tempfile
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from theatre.benchmark import compare_results, generate_dataset
+from theatre.models import Performance, Play, Ticket
+from theatre.scheduling import find_conflicts
+
+SIZES = {
+    "halls": 2,
+    "genres": 3,
+    "actors": 10,
+    "plays": 5,
+    "performances": 20,
+    "users": 4,
+    "reservations": 30,
+}
+
+
+def size_options(sizes):
+    return [
+        argument
+        for name, size in sizes.items()
+        for argument in (f"--{name}", str(size))
+    ]
+
+
+class GenerateDatasetTests(TestCase):
+    def test_generated_rows(self):
+        dataset = generate_dataset(random.Random(1), SIZES, "password")
+
+        self.assertEqual(Play.objects.count(), 5)
+        self.assertEqual(Performance.objects.count(), 20)
+        self.assertEqual(Ticket.objects.count(), dataset["tickets"])
+        self.assertEqual(
+            sum(
+                Performance.objects.values_list("tickets_sold", flat=True)
+            ),
+            dataset["tickets"],
+        )
+        slots = list(
+            Performance.objects.values_list(
+                "theatre_hall_id", "show_time", "end_time"
+            )
+        )
+        self.assertEqual(
+            find_conflicts(
+                slots,
+                exclude=list(
+                    Performance.objects.values_list("id", flat=True)
+                ),
+            ),
+            [],
+        )
+
+
+class BenchmarkCommandTests(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.baseline = os.path.join(self.directory.name, "baseline.json")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def benchmark(self, *args):
+        out = StringIO()
+        call_command(
+            "benchmark_api",
+            *size_options(SIZES),
+            "--iterations",
+            "2",
+            *args,
+            stdout=out,
+        )
+        return out.getvalue()
+
+    def test_benchmark_saves_results_and_rolls_back(self):
+        out = self.benchmark("--save", self.baseline)
+
+        with open(self.baseline, encoding="utf-8") as file:
+            report = json.load(file)
+        self.assertEqual(report["sizes"], SIZES)
+        self.assertEqual(
+            set(report["results"]),
+            {
+                "play-list",
+                "play-detail",
+                "performance-list",
+                "performance-detail",
+                "reservation-create",
+                "reservation-list",
+                "login",
+            },
+        )
+        self.assertGreater(report["results"]["play-list"]["queries"], 0)
+        self.assertIn("reservation-create: p50", out)
+        self.assertFalse(Play.objects.exists())
+
+    def test_compare_fails_on_extra_queries(self):
+        self.benchmark("--benchmark", "play-list", "--save", self.baseline)
+        with open(self.baseline, encoding="utf-8") as file:
+            report = json.load(file)
+        report["results"]["play-list"]["queries"] -= 1
+        report["results"]["play-list"]["p50_ms"] = 1000
+        with open(self.baseline, "w", encoding="utf-8") as file:
+            json.dump(report, file)
+
+        with self.assertRaisesMessage(CommandError, "play-list: "):
+            self.benchmark(
+                "--benchmark", "play-list", "--compare", self.baseline
+            )
+
+
+class CompareResultsTests(TestCase):
+    def test_regressions(self):
+        baseline = {
+            "play-list": {"p50_ms": 2.0, "queries": 3},
+            "login": {"p50_ms": 100.0, "queries": 1},
+        }
+        results = {
+            "play-list": {"p50_ms": 3.0, "queries": 3},
+            "login": {"p50_ms": 110.0, "queries": 2},
+            "play-detail": {"p50_ms": 1.0, "queries": 2},
+        }
+
+        self.assertEqual(
+            compare_results(baseline, results, tolerance=0.25),
+            [
+                "play-list: p50 3.00ms, baseline 2.00ms",
+                "login: 2 queries, baseline 1",
+            ],
+        )
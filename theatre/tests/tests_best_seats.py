@@ -0,0 +1,180 @@
+from datetime import timedelta
+
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from theatre.models import Reservation, SeatHold, Ticket, TheatreHall
+from theatre.seat_finder import find_best_seats, occupancy_matrix
+from theatre.tests.tests_reservation_api import sample_performance
+
+
+def best_seats_url(performance_id):
+    return reverse("theatre:performance-best-seats", args=[performance_id])
+
+
+class FindBestSeatsTests(TestCase):
+    def test_empty_hall_gives_middle_of_preferred_row(self):
+        occupied = np.zeros((10, 12), dtype=bool)
+
+        self.assertEqual(find_best_seats(occupied, 2), [(5, 6), (5, 7)])
+        self.assertEqual(
+            find_best_seats(occupied, 3), [(5, 5), (5, 6), (5, 7)]
+        )
+
+    def test_runs_skip_taken_seats(self):
+        occupied = np.zeros((10, 12), dtype=bool)
+        occupied[4, 5] = True
+
+        self.assertEqual(find_best_seats(occupied, 1), [(5, 7)])
+        self.assertEqual(
+            find_best_seats(occupied, 4), [(4, 5), (4, 6), (4, 7), (4, 8)]
+        )
+
+    def test_full_row_moves_to_next_best_row(self):
+        occupied = np.zeros((10, 12), dtype=bool)
+        occupied[4] = True
+
+        self.assertEqual(find_best_seats(occupied, 2), [(4, 6), (4, 7)])
+
+    def test_no_run_long_enough(self):
+        occupied = np.zeros((3, 6), dtype=bool)
+        occupied[:, 2] = True
+
+        self.assertIsNone(find_best_seats(occupied, 4))
+        self.assertIsNone(find_best_seats(occupied, 7))
+
+
+class BestSeatsApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com", password="testpassword"
+        )
+        self.other_user = get_user_model().objects.create_user(
+            email="other@test.com", password="testpassword"
+        )
+        self.client.force_authenticate(self.user)
+        self.performance = sample_performance()
+
+    def take(self, *seats, user=None):
+        reservation = Reservation.objects.create(user=user or self.other_user)
+        for row, seat in seats:
+            Ticket.objects.create(
+                row=row,
+                seat=seat,
+                performance=self.performance,
+                reservation=reservation,
+            )
+
+    def test_find_best_seats(self):
+        self.take((5, 6))
+
+        res = self.client.get(
+            best_seats_url(self.performance.id), {"count": 2}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            res.data,
+            {
+                "seats": [{"row": 4, "seat": 6}, {"row": 4, "seat": 7}],
+                "expires_at": None,
+            },
+        )
+        self.assertFalse(SeatHold.objects.exists())
+
+    def test_find_and_hold_best_seats(self):
+        res = self.client.post(
+            best_seats_url(self.performance.id), {"count": 2}, format="json"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            res.data["seats"], [{"row": 5, "seat": 6}, {"row": 5, "seat": 7}]
+        )
+        self.assertIsNotNone(res.data["expires_at"])
+        self.assertEqual(
+            list(
+                SeatHold.objects.filter(user=self.user).values_list(
+                    "row", "seat"
+                )
+            ),
+            [(5, 6), (5, 7)],
+        )
+
+    def test_seats_held_by_others_are_skipped(self):
+        self.client.force_authenticate(self.other_user)
+        self.client.post(
+            best_seats_url(self.performance.id), {"count": 2}, format="json"
+        )
+        self.client.force_authenticate(self.user)
+
+        res = self.client.get(
+            best_seats_url(self.performance.id), {"count": 2}
+        )
+
+        self.assertNotIn({"row": 5, "seat": 6}, res.data["seats"])
+        self.assertNotIn({"row": 5, "seat": 7}, res.data["seats"])
+
+    def test_count_longer_than_row_is_rejected(self):
+        res = self.client.get(
+            best_seats_url(self.performance.id), {"count": 13}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(MAX_HELD_SEATS=3)
+    def test_count_above_hold_limit_is_rejected(self):
+        res = self.client.post(
+            best_seats_url(self.performance.id), {"count": 4}, format="json"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(SeatHold.objects.exists())
+
+    def test_no_adjacent_seats(self):
+        self.take(*((row, 6) for row in range(1, 11)))
+
+        res = self.client.get(
+            best_seats_url(self.performance.id), {"count": 7}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+
+    def test_occupancy_matrix_query_count(self):
+        self.take((1, 1), (10, 12))
+        SeatHold.objects.create(
+            performance=self.performance,
+            user=self.other_user,
+            row=2,
+            seat=2,
+            expires_at=timezone.now() + timedelta(minutes=5),
+        )
+
+        with self.assertNumQueries(1):
+            occupied = occupancy_matrix(self.performance, self.user.pk)
+
+        self.assertEqual(
+            [tuple(seat) for seat in np.argwhere(occupied)],
+            [(0, 0), (1, 1), (9, 11)],
+        )
+
+    def test_large_hall(self):
+        theatre_hall = TheatreHall.objects.create(
+            name="Grand", rows=40, seats_in_row=50
+        )
+        performance = sample_performance(
+            theatre_hall=theatre_hall, show_time="2022-06-03T14:00:00Z"
+        )
+
+        res = self.client.get(best_seats_url(performance.id), {"count": 4})
+
+        self.assertEqual(
+            res.data["seats"],
+            [{"row": 17, "seat": seat} for seat in range(24, 28)],
+        )
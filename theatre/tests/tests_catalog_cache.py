@@ -0,0 +1,90 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from theatre.models import Genre, Play
+
+GENRE_URL = reverse("theatre:genre-list")
+PLAY_URL = reverse("theatre:play-list")
+
+
+class CatalogCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com", password="testpassword"
+        )
+        self.client.force_authenticate(self.user)
+        Genre.objects.create(name="Drama")
+
+    def test_repeated_list_is_served_from_cache(self):
+        first = self.client.get(GENRE_URL)
+
+        with self.assertNumQueries(0):
+            second = self.client.get(GENRE_URL)
+
+        self.assertEqual(first.data, second.data)
+        self.assertEqual(first["ETag"], second["ETag"])
+
+    def test_query_params_are_part_of_the_key(self):
+        self.client.get(GENRE_URL, {"limit": 1})
+
+        with self.assertNumQueries(2):
+            self.client.get(GENRE_URL, {"limit": 2})
+
+    def test_write_invalidates_cached_list(self):
+        self.client.get(GENRE_URL)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Genre.objects.create(name="Comedy")
+        res = self.client.get(GENRE_URL)
+
+        self.assertEqual(res.data["count"], 2)
+
+    def test_m2m_change_invalidates_cached_detail(self):
+        play = Play.objects.create(
+            title="Sample play", description="Sample", duration=90
+        )
+        url = reverse("theatre:play-detail", args=[play.id])
+        self.client.get(url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            play.genres.add(Genre.objects.get())
+        res = self.client.get(url)
+
+        self.assertEqual(res.data["genres"][0]["name"], "Drama")
+
+    def test_if_none_match_returns_not_modified(self):
+        etag = self.client.get(GENRE_URL)["ETag"]
+
+        res = self.client.get(GENRE_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res["ETag"], etag)
+
+    def test_stale_etag_gets_fresh_response(self):
+        etag = self.client.get(GENRE_URL)["ETag"]
+        with self.captureOnCommitCallbacks(execute=True):
+            Genre.objects.create(name="Comedy")
+
+        res = self.client.get(GENRE_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res["ETag"], etag)
+
+    def test_cache_is_retired_on_commit(self):
+        self.client.get(GENRE_URL)
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            Genre.objects.create(name="Comedy")
+            stale = self.client.get(GENRE_URL)
+        for callback in callbacks:
+            callback()
+        res = self.client.get(GENRE_URL)
+
+        self.assertEqual(stale.data["count"], 1)
+        self.assertEqual(res.data["count"], 2)
@@ -0,0 +1,220 @@
+from datetime import datetime, timezone
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from theatre.daily_schedule import availability_key, build_rows, rows_key
+from theatre.models import Performance, Play
+from theatre.tests.tests_reservation_api import sample_performance
+
+PERFORMANCE_URL = reverse("theatre:performance-list")
+RESERVATION_URL = reverse("theatre:reservation-list")
+
+
+class DailyScheduleTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.admin = get_user_model().objects.create_user(
+            email="admin@test.com", password="testpassword", is_staff=True
+        )
+        self.client.force_authenticate(self.admin)
+        with self.captureOnCommitCallbacks(execute=True):
+            # 90 minutes in hall Blue (120 seats) on 2022-06-02 at 14:00
+            self.performance = sample_performance()
+            self.play = self.performance.play
+            self.other_play = Play.objects.create(
+                title="Other play", description="", duration=60
+            )
+            Performance.objects.create(
+                play=self.other_play,
+                theatre_hall=self.performance.theatre_hall,
+                show_time=datetime(2022, 6, 2, 10, tzinfo=timezone.utc),
+            )
+
+    def get_day(self, **params):
+        params = {"date": "2022-06-02", **params}
+        res = self.client.get(PERFORMANCE_URL, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res.data
+
+    def test_day_is_materialized(self):
+        first = self.get_day()
+
+        with self.assertNumQueries(0):
+            second = self.get_day()
+
+        self.assertEqual(first, second)
+        self.assertEqual(first["count"], 2)
+        self.assertEqual(
+            [row["play_title"] for row in first["results"]],
+            ["Other play", "Sample play"],
+        )
+
+    def test_rows_match_the_queryset_list(self):
+        rows = self.get_day()["results"]
+
+        res = self.client.get(PERFORMANCE_URL, {"limit": 10})
+
+        self.assertEqual(
+            sorted(rows, key=lambda row: row["id"]),
+            sorted(res.data["results"], key=lambda row: row["id"]),
+        )
+
+    def test_date_and_play_filters(self):
+        rows = self.get_day(play=self.play.id)["results"]
+        self.assertEqual([row["id"] for row in rows], [self.performance.id])
+
+        res = self.client.get(PERFORMANCE_URL, {"play": self.other_play.id})
+        self.assertEqual(res.data["count"], 1)
+        self.assertEqual(res.data["results"][0]["play_title"], "Other play")
+
+        self.assertEqual(self.get_day(play=0)["count"], 0)
+        self.assertEqual(self.get_day(play="")["count"], 2)
+
+    def test_performance_changes_refresh_the_days(self):
+        self.get_day()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            res = self.client.patch(
+                reverse(
+                    "theatre:performance-detail", args=[self.performance.id]
+                ),
+                {"show_time": "2022-06-03T14:00:00Z"},
+            )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        self.assertEqual(self.get_day()["count"], 1)
+        self.assertEqual(self.get_day(date="2022-06-03")["count"], 1)
+
+    def test_cascade_delete_refreshes_once(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Performance.objects.create(
+                play=self.play,
+                theatre_hall=self.performance.theatre_hall,
+                show_time=datetime(2022, 6, 3, 14, tzinfo=timezone.utc),
+            )
+        self.get_day()
+        expected = {
+            key(scope)
+            for key in (rows_key, availability_key)
+            for scope in (
+                "date:2022-06-02",
+                "date:2022-06-03",
+                f"play:{self.play.id}",
+            )
+        }
+
+        with mock.patch.object(
+            cache, "delete_many", wraps=cache.delete_many
+        ) as delete_many:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.play.delete()
+
+        # the lists dropped on commit, as opposed to right away
+        [keys] = [
+            call.args[0]
+            for call in delete_many.call_args_list
+            if availability_key("date:2022-06-02") in call.args[0]
+        ]
+        self.assertLessEqual(expected, set(keys))
+        self.assertEqual(self.get_day()["count"], 1)
+
+    def test_list_read_before_commit_is_dropped(self):
+        stale = build_rows("date:2022-06-02")
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.performance.delete()
+            # a reader that loaded the rows before the delete committed
+            cache.add(rows_key("date:2022-06-02"), stale)
+        for callback in callbacks:
+            callback()
+
+        self.assertEqual(self.get_day()["count"], 1)
+
+    def test_bulk_scheduling_refreshes_the_days(self):
+        self.get_day(date="2022-06-06")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                reverse("theatre:performance-bulk"),
+                {
+                    "performances": [
+                        {
+                            "play": self.play.id,
+                            "theatre_hall": (
+                                self.performance.theatre_hall_id
+                            ),
+                            "show_time": "2022-06-06T19:00:00Z",
+                        }
+                    ]
+                },
+                format="json",
+            )
+
+        self.assertEqual(self.get_day(date="2022-06-06")["count"], 1)
+
+    def test_play_change_is_shown(self):
+        self.get_day()
+
+        self.play.title = "Renamed play"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.play.save()
+
+        self.assertIn(
+            "Renamed play",
+            [row["play_title"] for row in self.get_day()["results"]],
+        )
+
+    def test_sales_update_availability(self):
+        self.get_day()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                RESERVATION_URL,
+                {
+                    "tickets": [
+                        {
+                            "row": 1,
+                            "seat": 1,
+                            "performance": self.performance.id,
+                        }
+                    ]
+                },
+                format="json",
+            )
+
+        row = self.get_day(play=self.play.id)["results"][0]
+        self.assertEqual(row["tickets_available"], 119)
+
+    def test_availability_may_lag_for_the_configured_time(self):
+        self.get_day()
+        Performance.objects.filter(pk=self.performance.pk).update(
+            tickets_sold=20
+        )
+
+        row = self.get_day(play=self.play.id)["results"][0]
+        self.assertEqual(row["tickets_available"], 120)
+
+        with override_settings(SCHEDULE_AVAILABILITY_TTL=0):
+            cache.clear()
+            self.get_day()
+            Performance.objects.filter(pk=self.performance.pk).update(
+                tickets_sold=30
+            )
+
+            row = self.get_day(play=self.play.id)["results"][0]
+            self.assertEqual(row["tickets_available"], 90)
+
+    def test_cursor_pages_use_the_queryset(self):
+        res = self.client.get(
+            PERFORMANCE_URL, {"date": "2022-06-02", "pagination": "cursor"}
+        )
+
+        self.assertEqual(len(res.data["results"]), 2)
+        self.assertNotIn("count", res.data)
@@ -0,0 +1,212 @@
+import json
+import os
+import tempfile
+from datetime import datetime, timedelta, timezone
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from theatre.importer import ScheduleImporter
+from theatre.models import Actor, Genre, Performance, Play, TheatreHall
+
+RECORDS = [
+    {"type": "hall", "name": "Blue", "rows": 10, "seats_in_row": 12},
+    {
+        "type": "play",
+        "title": "Hamlet",
+        "description": "Prince of Denmark",
+        "duration": 180,
+        "genres": ["Drama", "Tragedy"],
+        "actors": [
+            {"first_name": "Ian", "last_name": "McKellen"},
+            "Judi Dench",
+        ],
+    },
+    {
+        "type": "performance",
+        "play": "Hamlet",
+        "theatre_hall": "Blue",
+        "show_time": "2024-05-01T19:00:00Z",
+    },
+    {
+        "type": "performance",
+        "play": "Hamlet",
+        "theatre_hall": "Blue",
+        "show_time": "2024-05-02T19:00:00Z",
+    },
+]
+
+
+def performance_records(count):
+    first = datetime(2024, 6, 1, 19, tzinfo=timezone.utc)
+    return [
+        {
+            "type": "performance",
+            "play": "Hamlet",
+            "theatre_hall": "Blue",
+            "show_time": (first + timedelta(days=day)).isoformat(),
+        }
+        for day in range(count)
+    ]
+
+
+class ImportScheduleTests(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, name, content):
+        path = os.path.join(self.directory.name, name)
+        with open(path, "w", newline="") as file:
+            file.write(content)
+        return path
+
+    def import_records(self, records):
+        path = self.write(
+            "schedule.ndjson",
+            "\n".join(json.dumps(record) for record in records),
+        )
+        out = StringIO()
+        call_command("import_schedule", path, stdout=out)
+        return out.getvalue()
+
+    def test_import_ndjson(self):
+        out = self.import_records(RECORDS)
+
+        play = Play.objects.get(title="Hamlet")
+        self.assertEqual(
+            sorted(play.genres.values_list("name", flat=True)),
+            ["Drama", "Tragedy"],
+        )
+        self.assertEqual(
+            sorted(actor.full_name for actor in play.actors.all()),
+            ["Ian McKellen", "Judi Dench"],
+        )
+        self.assertEqual(play.performances.count(), 2)
+        self.assertIn("performance: 2 created", out)
+        self.assertIn("records/s", out)
+
+    def test_reimport_changes_nothing(self):
+        self.import_records(RECORDS)
+
+        out = self.import_records(RECORDS)
+
+        self.assertEqual(Play.objects.count(), 1)
+        self.assertEqual(Genre.objects.count(), 2)
+        self.assertEqual(Actor.objects.count(), 2)
+        self.assertEqual(Performance.objects.count(), 2)
+        self.assertIn("play: 0 created, 0 updated, 1 unchanged", out)
+        self.assertIn("performance: 0 created, 2 unchanged", out)
+
+    def test_reimport_updates_changed_fields(self):
+        self.import_records(RECORDS)
+        records = [dict(record) for record in RECORDS]
+        records[0]["rows"] = 20
+        records[1]["duration"] = 200
+
+        self.import_records(records)
+
+        self.assertEqual(TheatreHall.objects.get().rows, 20)
+        self.assertEqual(Play.objects.get().duration, 200)
+        performance = Performance.objects.earliest("show_time")
+        self.assertEqual(
+            performance.end_time - performance.show_time,
+            timedelta(minutes=200),
+        )
+
+    def test_longer_play_must_fit_in_halls(self):
+        self.import_records(RECORDS[:3])
+        Performance.objects.create(
+            play=Play.objects.create(
+                title="Macbeth", description="", duration=120
+            ),
+            theatre_hall=TheatreHall.objects.get(),
+            show_time=datetime(2024, 5, 1, 22, 30, tzinfo=timezone.utc),
+        )
+        records = [dict(record) for record in RECORDS[:2]]
+        records[1]["duration"] = 240
+
+        with self.assertRaisesMessage(
+            CommandError,
+            "Record 2: lasting 240 minutes, its performance at "
+            "2024-05-01T19:00:00+00:00 overlaps performance",
+        ):
+            self.import_records(records)
+
+        self.assertEqual(Play.objects.get(title="Hamlet").duration, 180)
+
+    def test_import_csv(self):
+        path = self.write(
+            "plays.csv",
+            "title,description,duration,genres,actors\r\n"
+            "Hamlet,Prince,180,Drama|Tragedy,Ian McKellen|Judi Dench\r\n",
+        )
+
+        call_command(
+            "import_schedule", path, "--type", "play", stdout=StringIO()
+        )
+
+        play = Play.objects.get()
+        self.assertEqual(play.genres.count(), 2)
+        self.assertEqual(play.actors.count(), 2)
+
+    def test_unknown_play_is_rejected(self):
+        with self.assertRaisesMessage(CommandError, "unknown play Macbeth"):
+            self.import_records(
+                [
+                    RECORDS[0],
+                    {
+                        "type": "performance",
+                        "play": "Macbeth",
+                        "theatre_hall": "Blue",
+                        "show_time": "2024-05-01T19:00:00Z",
+                    },
+                ]
+            )
+
+    def test_overlapping_performance_is_rejected(self):
+        self.import_records(RECORDS)
+
+        with self.assertRaisesMessage(
+            CommandError, "Record 2: the hall is taken by performance"
+        ):
+            self.import_records(
+                [
+                    RECORDS[1],
+                    {
+                        "type": "performance",
+                        "play": "Hamlet",
+                        "theatre_hall": "Blue",
+                        "show_time": "2024-05-01T21:00:00Z",
+                    },
+                ]
+            )
+        self.assertEqual(Performance.objects.count(), 2)
+
+    def test_query_count_does_not_depend_on_size(self):
+        self.import_records(RECORDS[:2])
+
+        with CaptureQueriesContext(connection) as small:
+            ScheduleImporter().run(performance_records(10))
+        with CaptureQueriesContext(connection) as large:
+            ScheduleImporter().run(performance_records(200))
+
+        self.assertEqual(len(small), len(large))
+        self.assertEqual(Performance.objects.count(), 200)
+
+    def test_bundled_schedule(self):
+        call_command(
+            "import_schedule",
+            os.path.join(settings.BASE_DIR, "schedule.ndjson"),
+            stdout=StringIO(),
+        )
+
+        self.assertEqual(Play.objects.count(), 4)
+        self.assertEqual(Performance.objects.count(), 4)
+        self.assertEqual(TheatreHall.objects.count(), 4)
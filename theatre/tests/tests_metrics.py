@@ -0,0 +1,126 @@
+import re
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from theatre.models import Genre, Play
+from theatre.serializers import PlayListSerializer
+from theatre_service_api.metrics import (
+    Histogram,
+    RequestTiming,
+    metrics,
+    request_timing,
+)
+
+GENRE_URL = reverse("theatre:genre-list")
+METRICS_URL = reverse("metrics")
+
+
+class RequestMetricsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        metrics.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com", password="testpassword"
+        )
+        self.admin = get_user_model().objects.create_superuser(
+            email="admin@test.com", password="testpassword"
+        )
+        self.client.force_authenticate(self.user)
+        Genre.objects.create(name="Drama")
+
+    def test_server_timing_header(self):
+        res = self.client.get(GENRE_URL)
+
+        timings = dict(
+            re.match(r"(\w+);dur=([\d.]+)", metric).groups()
+            for metric in res["Server-Timing"].split(", ")
+        )
+        self.assertEqual(
+            set(timings), {"db", "serialize", "render", "app", "total"}
+        )
+        self.assertGreaterEqual(
+            float(timings["total"]), float(timings["db"])
+        )
+        self.assertRegex(res["Server-Timing"], r'desc="[1-9]\d* queries"')
+
+    def test_request_is_logged(self):
+        with self.assertLogs("theatre_service_api.metrics", "INFO") as logs:
+            self.client.get(GENRE_URL)
+
+        [record] = logs.records
+        self.assertIn(
+            "route=theatre:genre-list method=GET status=200",
+            record.getMessage(),
+        )
+        self.assertIn("serialize_ms=", record.getMessage())
+
+    def test_serializers_are_timed_once(self):
+        play = Play.objects.create(
+            title="Sample play", description="Sample", duration=90
+        )
+        play.genres.add(Genre.objects.get())
+        timing = RequestTiming()
+        token = request_timing.set(timing)
+        try:
+            PlayListSerializer(Play.objects.all(), many=True).data
+        finally:
+            request_timing.reset(token)
+
+        self.assertGreater(timing.serialize_time, 0)
+        self.assertFalse(timing.serializing)
+
+    def test_metrics_by_route(self):
+        for _ in range(3):
+            self.client.get(GENRE_URL)
+        self.client.get("/api/no-such-route/")
+        self.client.force_authenticate(self.admin)
+
+        res = self.client.get(METRICS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res["Content-Type"].startswith("text/plain"))
+        body = res.content.decode()
+        self.assertIn(
+            'http_requests_total{route="theatre:genre-list",method="GET",'
+            'status="200"} 3',
+            body,
+        )
+        self.assertIn(
+            'http_request_duration_seconds_count{route="theatre:genre-list",'
+            'method="GET"} 3',
+            body,
+        )
+        self.assertIn('route="unmatched"', body)
+        self.assertIn("http_request_db_queries_bucket", body)
+        self.assertIn("http_request_serialize_duration_seconds_sum", body)
+        self.assertIn('token_auth_cache_lookups_total{result="misses"}', body)
+
+    def test_metrics_are_admin_only(self):
+        res = self.client.get(METRICS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class HistogramTests(TestCase):
+    def test_buckets_are_cumulative(self):
+        histogram = Histogram("latency", "Latency.", (0.1, 1))
+        labels = (("route", "a"),)
+        for value in (0.05, 0.1, 0.5, 2):
+            histogram.observe(labels, value)
+
+        self.assertEqual(
+            histogram.exposition()[2:],
+            [
+                'latency_bucket{route="a",le="0.1"} 2',
+                'latency_bucket{route="a",le="1"} 3',
+                'latency_bucket{route="a",le="+Inf"} 4',
+                'latency_sum{route="a"} 2.65',
+                'latency_count{route="a"} 4',
+            ],
+        )
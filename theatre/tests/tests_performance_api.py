@@ -0,0 +1,194 @@
+import base64
+from datetime import datetime, timedelta, timezone
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from theatre.models import Performance, Reservation, Ticket
+from theatre.seatmap import build_seat_bitmap
+from theatre.tests.tests_reservation_api import sample_performance
+
+
+PERFORMANCE_URL = reverse("theatre:performance-list")
+
+
+def detail_url(performance_id):
+    return reverse("theatre:performance-detail", args=[performance_id])
+
+
+class PerformanceSeatMapTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com", password="testpassword"
+        )
+        self.client.force_authenticate(self.user)
+        self.performance = sample_performance()
+        reservation = Reservation.objects.create(user=self.user)
+        for row, seat in [(1, 1), (1, 12), (10, 12)]:
+            Ticket.objects.create(
+                row=row,
+                seat=seat,
+                performance=self.performance,
+                reservation=reservation,
+            )
+
+    def test_bitmap_marks_taken_seats(self):
+        bitmap = build_seat_bitmap(self.performance)
+
+        self.assertEqual(len(bitmap), 15)
+        self.assertEqual(bitmap[0], 0b10000000)
+        self.assertEqual(bitmap[1], 0b00010000)
+        self.assertEqual(bitmap[-1], 0b00000001)
+        self.assertEqual(sum(bin(byte).count("1") for byte in bitmap), 3)
+
+    def test_bitmap_skips_seats_outside_shrunk_hall(self):
+        theatre_hall = self.performance.theatre_hall
+        theatre_hall.rows = 9
+        theatre_hall.seats_in_row = 11
+        theatre_hall.save()
+
+        res = self.client.get(
+            detail_url(self.performance.id), {"seatmap": "bitmap"}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        bitmap = base64.b64decode(res.data["seat_map"]["taken"])
+        self.assertEqual(len(bitmap), 13)
+        self.assertEqual(bitmap[0], 0b10000000)
+        self.assertEqual(sum(bin(byte).count("1") for byte in bitmap), 1)
+
+    def test_detail_lists_taken_places_by_default(self):
+        res = self.client.get(detail_url(self.performance.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data["taken_places"]), 3)
+        self.assertNotIn("seat_map", res.data)
+
+    def test_detail_with_bitmap_seat_map(self):
+        res = self.client.get(
+            detail_url(self.performance.id), {"seatmap": "bitmap"}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotIn("taken_places", res.data)
+        seat_map = res.data["seat_map"]
+        self.assertEqual(seat_map["encoding"], "bitmap")
+        self.assertEqual(seat_map["rows"], 10)
+        self.assertEqual(seat_map["seats_in_row"], 12)
+        self.assertEqual(
+            base64.b64decode(seat_map["taken"]),
+            build_seat_bitmap(self.performance),
+        )
+
+
+class PerformancePaginationTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com", password="testpassword"
+        )
+        self.client.force_authenticate(self.user)
+        first = sample_performance()
+        start = datetime(2024, 5, 1, 19, tzinfo=timezone.utc)
+        for day in range(7):
+            Performance.objects.create(
+                play=first.play,
+                theatre_hall=first.theatre_hall,
+                show_time=start + timedelta(days=day // 2),
+            )
+
+    def test_offset_pagination_is_default(self):
+        res = self.client.get(PERFORMANCE_URL, {"limit": 3, "offset": 3})
+
+        self.assertEqual(res.data["count"], 8)
+        self.assertEqual(len(res.data["results"]), 3)
+
+    def test_cursor_pagination_walks_all_performances(self):
+        seen = []
+        res = self.client.get(
+            PERFORMANCE_URL, {"pagination": "cursor", "limit": 3}
+        )
+        while True:
+            self.assertNotIn("count", res.data)
+            seen.extend(
+                (performance["show_time"], performance["id"])
+                for performance in res.data["results"]
+            )
+            if not res.data["next"]:
+                break
+            res = self.client.get(res.data["next"])
+
+        self.assertEqual(len(seen), 8)
+        self.assertEqual(seen, sorted(seen))
+
+    def walk(self, url, params=None, link="next"):
+        """Ids of every page following link, pages in the order seen"""
+        pages = []
+        res = self.client.get(url, params)
+        while True:
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            pages.append([row["id"] for row in res.data["results"]])
+            if not res.data[link]:
+                return pages, res
+            res = self.client.get(res.data[link])
+
+    def test_cursor_pages_seek_past_ties(self):
+        forward, last_page = self.walk(
+            PERFORMANCE_URL, {"pagination": "cursor", "limit": 3}
+        )
+        expected = list(
+            Performance.objects.order_by("show_time", "id").values_list(
+                "id", flat=True
+            )
+        )
+
+        self.assertEqual(sum(forward, []), expected)
+
+        backward, _ = self.walk(last_page.data["previous"], link="previous")
+        self.assertEqual(
+            sum(reversed(backward), []) + forward[-1], expected
+        )
+
+    def test_descending_cursor_pages(self):
+        created_at = datetime(2024, 5, 1, 12, tzinfo=timezone.utc)
+        for _ in range(5):
+            Reservation.objects.create(user=self.user)
+        Reservation.objects.update(created_at=created_at)
+
+        pages, _ = self.walk(
+            reverse("theatre:reservation-list"),
+            {"pagination": "cursor", "limit": 2},
+        )
+
+        self.assertEqual(
+            sum(pages, []),
+            list(
+                Reservation.objects.order_by("-id").values_list(
+                    "id", flat=True
+                )
+            ),
+        )
+
+    def test_invalid_cursor(self):
+        for cursor in ("not base64!", "W10=", "WzEsIDIsIDNd"):
+            res = self.client.get(PERFORMANCE_URL, {"cursor": cursor})
+
+            self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_count_can_be_skipped(self):
+        with self.assertNumQueries(1):
+            res = self.client.get(
+                PERFORMANCE_URL, {"count": "false", "limit": 5}
+            )
+
+        self.assertIsNone(res.data["count"])
+        self.assertEqual(len(res.data["results"]), 5)
+        self.assertIn("offset=5", res.data["next"])
+
+        res = self.client.get(res.data["next"])
+        self.assertEqual(len(res.data["results"]), 3)
+        self.assertIsNone(res.data["next"])
@@ -0,0 +1,373 @@
+from datetime import datetime, timezone
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.test import Client, SimpleTestCase, TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from theatre.models import Performance, Play
+from theatre.scheduling import HallIntervals
+from theatre.tests.tests_reservation_api import sample_performance
+
+
+BULK_URL = reverse("theatre:performance-bulk")
+PERFORMANCE_URL = reverse("theatre:performance-list")
+
+
+def at(hour, minute=0):
+    return datetime(2022, 6, 2, hour, minute, tzinfo=timezone.utc)
+
+
+class PerformanceBulkTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = get_user_model().objects.create_user(
+            email="admin@test.com", password="testpassword", is_staff=True
+        )
+        self.client.force_authenticate(self.admin)
+        # Sample play (90 minutes) in hall Blue on 2022-06-02 at 14:00
+        self.performance = sample_performance()
+        self.play_id = self.performance.play_id
+        self.hall_id = self.performance.theatre_hall_id
+
+    def rule(self, **params):
+        rule = {
+            "play": self.play_id,
+            "theatre_hall": self.hall_id,
+            "start_date": "2022-06-06",
+            "end_date": "2022-06-19",
+            "weekdays": [0, 2, 4],
+            "times": ["14:00", "19:00"],
+        }
+        rule.update(params)
+        return rule
+
+    def test_recurrence_is_expanded(self):
+        res = self.client.post(
+            BULK_URL, {"recurrences": [self.rule()]}, format="json"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data["created"], 12)
+        self.assertEqual(res.data["plays"], [self.play_id])
+        self.assertEqual(res.data["theatre_halls"], [self.hall_id])
+        self.assertEqual(
+            res.data["first_show_time"], "2022-06-06T14:00:00Z"
+        )
+        self.assertEqual(res.data["last_show_time"], "2022-06-17T19:00:00Z")
+        self.assertEqual(Performance.objects.count(), 13)
+        self.assertEqual(
+            {
+                show_time.weekday()
+                for show_time in Performance.objects.exclude(
+                    pk=self.performance.pk
+                ).values_list("show_time", flat=True)
+            },
+            {0, 2, 4},
+        )
+
+    def test_listed_performances_and_recurrences_together(self):
+        res = self.client.post(
+            BULK_URL,
+            {
+                "performances": [
+                    {
+                        "play": self.play_id,
+                        "theatre_hall": self.hall_id,
+                        "show_time": "2022-06-02T16:00:00Z",
+                    }
+                ],
+                "recurrences": [self.rule(weekdays=[0], times=["19:00"])],
+            },
+            format="json",
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data["created"], 3)
+
+    def test_overlap_with_scheduled_performance_creates_nothing(self):
+        res = self.client.post(
+            BULK_URL,
+            {
+                "performances": [
+                    {
+                        "play": self.play_id,
+                        "theatre_hall": self.hall_id,
+                        "show_time": "2022-06-03T14:00:00Z",
+                    },
+                    {
+                        "play": self.play_id,
+                        "theatre_hall": self.hall_id,
+                        "show_time": "2022-06-02T15:00:00Z",
+                    },
+                ]
+            },
+            format="json",
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+        conflicts = res.data["conflicts"]
+        self.assertEqual(len(conflicts), 1)
+        self.assertEqual(
+            conflicts[0]["overlaps_performance"], self.performance.id
+        )
+        self.assertEqual(
+            conflicts[0]["show_time"],
+            datetime(2022, 6, 2, 15, tzinfo=timezone.utc),
+        )
+        self.assertEqual(Performance.objects.count(), 1)
+
+    def test_overlap_within_batch_is_rejected(self):
+        res = self.client.post(
+            BULK_URL,
+            {"recurrences": [self.rule(times=["14:00", "15:00"])]},
+            format="json",
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(len(res.data["conflicts"]), 6)
+        self.assertIsNone(res.data["conflicts"][0]["overlaps_performance"])
+        self.assertEqual(Performance.objects.count(), 1)
+
+    def test_back_to_back_performances_do_not_conflict(self):
+        res = self.client.post(
+            BULK_URL,
+            {
+                "performances": [
+                    {
+                        "play": self.play_id,
+                        "theatre_hall": self.hall_id,
+                        "show_time": "2022-06-02T15:30:00Z",
+                    }
+                ]
+            },
+            format="json",
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+    def test_invalid_requests(self):
+        for data in (
+            {},
+            {"recurrences": [self.rule(play=0)]},
+            {"recurrences": [self.rule(weekdays=[7])]},
+            {"recurrences": [self.rule(end_date="2022-06-01")]},
+            {"recurrences": [self.rule(end_date="2024-06-01")]},
+            {"recurrences": [self.rule(end_date="2022-06-06", weekdays=[1])]},
+        ):
+            res = self.client.post(BULK_URL, data, format="json")
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Performance.objects.count(), 1)
+
+    def test_size_limit(self):
+        res = self.client.post(
+            BULK_URL,
+            {
+                "recurrences": [
+                    self.rule(
+                        start_date="2023-01-01",
+                        end_date="2023-12-31",
+                        weekdays=list(range(7)),
+                        times=[f"{hour:02}:00" for hour in range(14)],
+                    )
+                ]
+            },
+            format="json",
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_requires_admin(self):
+        user = get_user_model().objects.create_user(
+            email="user@test.com", password="testpassword"
+        )
+        self.client.force_authenticate(user)
+
+        res = self.client.post(
+            BULK_URL, {"recurrences": [self.rule()]}, format="json"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class HallIntervalsTests(SimpleTestCase):
+    def test_overlapping(self):
+        hall = HallIntervals()
+        for start, end, key in [
+            (at(10), at(12), 1),
+            (at(14), at(16), 2),
+            (at(18), at(20), 3),
+        ]:
+            hall.add(start, end, key)
+
+        def keys(start, end):
+            return [key for _, _, key in hall.overlapping(start, end)]
+
+        self.assertEqual(keys(at(12), at(14)), [])
+        self.assertEqual(keys(at(11), at(15)), [1, 2])
+        self.assertEqual(keys(at(15), at(21)), [2, 3])
+        self.assertEqual(keys(at(8), at(9)), [])
+        self.assertEqual(keys(at(20), at(23)), [])
+
+    def test_long_interval_spanning_later_ones(self):
+        hall = HallIntervals()
+        hall.add(at(8), at(22), 1)
+        hall.add(at(10), at(11), 2)
+
+        self.assertEqual(
+            [key for _, _, key in hall.overlapping(at(20), at(21))], [1]
+        )
+
+    def test_added_out_of_order(self):
+        hall = HallIntervals()
+        hall.add(at(18), at(20), 2)
+        hall.add(at(10), at(12), 1)
+
+        self.assertEqual(hall.starts, [at(10), at(18)])
+        self.assertEqual(hall.max_ends, [at(12), at(20)])
+
+
+class PerformanceOverlapTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = get_user_model().objects.create_user(
+            email="admin@test.com", password="testpassword", is_staff=True
+        )
+        self.client.force_authenticate(self.admin)
+        # Sample play (90 minutes) in hall Blue on 2022-06-02 at 14:00
+        self.performance = sample_performance()
+
+    def test_end_time_follows_show_time_and_duration(self):
+        self.assertEqual(self.performance.end_time, at(15, 30))
+
+        play = self.performance.play
+        play.duration = 120
+        play.save()
+
+        self.performance.refresh_from_db()
+        self.assertEqual(self.performance.end_time, at(16))
+
+    def test_create_overlapping_performance(self):
+        res = self.client.post(
+            PERFORMANCE_URL,
+            {
+                "play": self.performance.play_id,
+                "theatre_hall": self.performance.theatre_hall_id,
+                "show_time": "2022-06-02T13:00:00Z",
+            },
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(
+            res.data["conflicts"][0]["overlaps_performance"],
+            self.performance.id,
+        )
+
+    def test_move_performance(self):
+        other = Performance.objects.create(
+            play=self.performance.play,
+            theatre_hall=self.performance.theatre_hall,
+            show_time=at(18),
+        )
+        url = reverse("theatre:performance-detail", args=[other.id])
+
+        res = self.client.patch(url, {"show_time": "2022-06-02T15:00:00Z"})
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+
+        # the performance does not conflict with itself
+        res = self.client.patch(url, {"show_time": "2022-06-02T17:00:00Z"})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        other.refresh_from_db()
+        self.assertEqual(other.end_time, at(18, 30))
+
+    def test_longer_play_must_fit_in_halls(self):
+        Performance.objects.create(
+            play=self.performance.play,
+            theatre_hall=self.performance.theatre_hall,
+            show_time=at(16),
+        )
+        url = reverse("theatre:play-detail", args=[self.performance.play_id])
+
+        res = self.client.patch(url, {"duration": 150})
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(Play.objects.get().duration, 90)
+
+        res = self.client.patch(url, {"duration": 120})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_longer_play_model_validation(self):
+        other = Performance.objects.create(
+            play=self.performance.play,
+            theatre_hall=self.performance.theatre_hall,
+            show_time=at(16),
+        )
+        play = Play.objects.get()
+        play.duration = 150
+
+        with self.assertRaisesMessage(ValidationError, "another performance"):
+            play.full_clean()
+
+        Performance.objects.filter(pk=other.pk).update(
+            play=Play.objects.create(
+                title="Macbeth", description="Scotland", duration=90
+            )
+        )
+        with self.assertRaisesMessage(
+            ValidationError, f"overlap performance {other.id}"
+        ):
+            play.full_clean()
+
+        play.duration = 120
+        play.full_clean()
+
+    def test_longer_play_in_admin(self):
+        Performance.objects.create(
+            play=self.performance.play,
+            theatre_hall=self.performance.theatre_hall,
+            show_time=at(16),
+        )
+        self.admin.is_superuser = True
+        self.admin.save()
+        django_client = Client()
+        django_client.force_login(self.admin)
+
+        url = reverse(
+            "admin:theatre_play_change", args=[self.performance.play_id]
+        )
+
+        res = django_client.post(
+            url,
+            {
+                "title": "Sample play",
+                "description": "Sample description",
+                "duration": 150,
+            },
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertContains(res, "would overlap")
+        self.assertEqual(Play.objects.get().duration, 90)
+
+    def test_end_times_are_kept_unless_duration_changes(self):
+        play = self.performance.play
+        play.title = "Renamed play"
+
+        with mock.patch("theatre.signals.refresh_end_times") as refresh:
+            play.save()
+
+        refresh.assert_not_called()
+
+    def test_model_validation(self):
+        performance = Performance(
+            play=self.performance.play,
+            theatre_hall=self.performance.theatre_hall,
+            show_time=at(15),
+        )
+
+        with self.assertRaises(ValidationError):
+            performance.full_clean()
+        self.performance.full_clean()
@@ -0,0 +1,182 @@
+import os
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+from unittest import mock
+
+from PIL import Image
+from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from theatre.images import RENDITIONS
+from theatre.models import Play
+from theatre.tests.tests_theatre_api import (
+    PERFORMANCE_URL,
+    PLAY_URL,
+    image_upload_url,
+    sample_performance,
+    sample_play,
+)
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+FORMATS = (("webp", "WEBP"), ("jpg", "JPEG"))
+
+
+def poster_file(size=(900, 1350), image_format="JPEG", **options):
+    file = BytesIO()
+    Image.new("RGB", size, "red").save(file, image_format, **options)
+    file.seek(0)
+    file.name = f"poster.{image_format.lower()}"
+    return file
+
+
+def rotated_exif():
+    exif = Image.Exif()
+    exif[0x0110] = "Camera model"
+    # Orientation: rotated 90 degrees clockwise
+    exif[0x0112] = 6
+    return exif
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, IMAGE_PROCESSING_WORKERS=0)
+class PlayImageRenditionTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = get_user_model().objects.create_superuser(
+            "admin@myproject.com", "password"
+        )
+        self.client.force_authenticate(self.admin)
+        self.play = sample_play()
+
+    def upload(self, file):
+        with self.captureOnCommitCallbacks(execute=True):
+            res = self.client.post(
+                image_upload_url(self.play.id),
+                {"image": file},
+                format="multipart",
+            )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.play.refresh_from_db()
+        return res
+
+    def test_renditions_fit_their_boxes_without_metadata(self):
+        self.upload(poster_file(exif=rotated_exif()))
+
+        renditions = self.play.image_renditions
+        self.assertEqual(renditions["source"], self.play.image.name)
+        # upright once the EXIF orientation is applied
+        self.assertEqual(
+            (renditions["width"], renditions["height"]), (1350, 900)
+        )
+        for name, (width, height) in RENDITIONS.items():
+            rendition = renditions["renditions"][name]
+            self.assertLessEqual(rendition["width"], width)
+            self.assertLessEqual(rendition["height"], height)
+            for extension, image_format in FORMATS:
+                with default_storage.open(rendition[extension]) as file:
+                    image = Image.open(file)
+                    self.assertEqual(image.format, image_format)
+                    self.assertEqual(
+                        image.size, (rendition["width"], rendition["height"])
+                    )
+                    self.assertFalse(image.getexif())
+
+    def test_stored_original_has_no_metadata(self):
+        self.upload(poster_file(exif=rotated_exif()))
+
+        with default_storage.open(self.play.image.name) as file:
+            image = Image.open(file)
+            self.assertEqual(image.format, "JPEG")
+            self.assertEqual(image.size, (1350, 900))
+            self.assertFalse(image.getexif())
+        self.assertTrue(self.play.image.name.endswith(".jpg"))
+
+    def test_oversized_image_is_rejected(self):
+        with mock.patch("theatre.images.MAX_IMAGE_PIXELS", 100 * 150):
+            res = self.client.post(
+                image_upload_url(self.play.id),
+                {"image": poster_file()},
+                format="multipart",
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("900x1350", str(res.data["image"]))
+        self.play.refresh_from_db()
+        self.assertFalse(self.play.image)
+
+    def test_small_image_is_not_upscaled(self):
+        self.upload(poster_file(size=(100, 150)))
+
+        for rendition in self.play.image_renditions["renditions"].values():
+            self.assertEqual(
+                (rendition["width"], rendition["height"]), (100, 150)
+            )
+
+    def test_lists_link_the_thumbnail(self):
+        self.upload(poster_file())
+        sample_performance(play=self.play)
+        thumb = self.play.image_renditions["renditions"]["thumb"]["webp"]
+        card = self.play.image_renditions["renditions"]["card"]["webp"]
+
+        res = self.client.get(PLAY_URL)
+        self.assertTrue(res.data["results"][0]["image"].endswith(thumb))
+
+        res = self.client.get(PLAY_URL, {"image_size": "card"})
+        self.assertTrue(res.data["results"][0]["image"].endswith(card))
+
+        res = self.client.get(PERFORMANCE_URL)
+        self.assertTrue(res.data["results"][0]["play_image"].endswith(thumb))
+
+    def test_detail_lists_every_rendition(self):
+        self.upload(poster_file())
+
+        res = self.client.get(
+            reverse("theatre:play-detail", args=[self.play.id])
+        )
+
+        self.assertTrue(res.data["image"].endswith(self.play.image.name))
+        self.assertEqual(set(res.data["images"]), set(RENDITIONS))
+        self.assertTrue(
+            res.data["images"]["full"]["jpg"].startswith("http://testserver/")
+        )
+
+    def test_replaced_image_renditions_are_deleted(self):
+        self.upload(poster_file())
+        old_files = [
+            rendition["webp"]
+            for rendition in self.play.image_renditions["renditions"].values()
+        ]
+
+        self.upload(poster_file(image_format="PNG"))
+
+        for name in old_files:
+            self.assertFalse(default_storage.exists(name))
+        self.assertEqual(
+            self.play.image_renditions["source"], self.play.image.name
+        )
+
+    def test_backfill_command(self):
+        self.upload(poster_file())
+        Play.objects.filter(pk=self.play.pk).update(image_renditions={})
+        out = StringIO()
+
+        call_command("generate_image_renditions", stdout=out)
+
+        self.assertIn("1 play images resized", out.getvalue())
+        self.play.refresh_from_db()
+        self.assertEqual(
+            self.play.image_renditions["source"], self.play.image.name
+        )
+        thumb = self.play.image_renditions["renditions"]["thumb"]["jpg"]
+        self.assertTrue(os.path.exists(os.path.join(MEDIA_ROOT, thumb)))
@@ -0,0 +1,94 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from theatre.models import Actor, Genre, Play
+
+PLAY_URL = reverse("theatre:play-list")
+
+
+class PlaySearchTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com", password="testpassword"
+        )
+        self.client.force_authenticate(self.user)
+
+        self.hamlet = Play.objects.create(
+            title="Hamlet",
+            description="The prince of Denmark seeks revenge",
+            duration=180,
+        )
+        self.revenge = Play.objects.create(
+            title="Revenge of the witch",
+            description="A dark tale from the Carpathians",
+            duration=90,
+        )
+        self.comedy = Play.objects.create(
+            title="Summer wedding",
+            description="A light comedy",
+            duration=100,
+        )
+        self.actor = Actor.objects.create(
+            first_name="Bohdan", last_name="Stupka"
+        )
+        self.hamlet.actors.add(self.actor)
+        self.comedy.genres.add(Genre.objects.create(name="Comedy"))
+
+    def search(self, text):
+        res = self.client.get(PLAY_URL, {"search": text})
+        return [play["title"] for play in res.data["results"]]
+
+    def test_search_by_title_and_description_ranks_title_first(self):
+        self.assertEqual(
+            self.search("revenge"), ["Revenge of the witch", "Hamlet"]
+        )
+
+    def test_cursor_pagination_keeps_rank_order(self):
+        res = self.client.get(
+            PLAY_URL, {"search": "revenge", "pagination": "cursor"}
+        )
+
+        self.assertEqual(
+            [play["title"] for play in res.data["results"]],
+            ["Revenge of the witch", "Hamlet"],
+        )
+        self.assertEqual(res.data["count"], 2)
+
+    def test_search_by_actor_and_genre(self):
+        self.assertEqual(self.search("stupka"), ["Hamlet"])
+        self.assertEqual(self.search("comedy"), ["Summer wedding"])
+
+    def test_search_requires_every_word(self):
+        self.assertEqual(self.search("revenge denmark"), ["Hamlet"])
+        self.assertEqual(self.search("revenge wedding"), [])
+
+    @mock.patch("theatre.search.SEARCH_RESULTS_LIMIT", 1)
+    def test_results_are_capped_after_filters(self):
+        res = self.client.get(PLAY_URL, {"search": "revenge"})
+        self.assertEqual(res.data["count"], 1)
+        self.assertEqual(
+            [play["title"] for play in res.data["results"]],
+            ["Revenge of the witch"],
+        )
+
+        res = self.client.get(
+            PLAY_URL, {"search": "revenge", "title": "hamlet"}
+        )
+        self.assertEqual(
+            [play["title"] for play in res.data["results"]], ["Hamlet"]
+        )
+
+    def test_search_follows_catalog_changes(self):
+        self.actor.last_name = "Hirniak"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.actor.save()
+
+        self.assertEqual(self.search("stupka"), [])
+        self.assertEqual(self.search("hirniak"), ["Hamlet"])
@@ -0,0 +1,84 @@
+import random
+from datetime import datetime, timedelta, timezone
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+
+from theatre.benchmark import generate_dataset
+from theatre.models import Performance, Reservation, Ticket
+from theatre.tests.tests_reservation_api import sample_performance
+
+
+# enough rows for PostgreSQL to prefer the indexes under default settings
+DATASET_SIZES = {
+    "halls": 5,
+    "genres": 5,
+    "actors": 20,
+    "plays": 50,
+    "performances": 2000,
+    "users": 50,
+    "reservations": 1000,
+}
+
+
+class QueryPlanTests(TestCase):
+    """The hot queries must be served by their indexes"""
+
+    @classmethod
+    def setUpTestData(cls):
+        generate_dataset(random.Random(1), DATASET_SIZES, "password")
+        cls.user = get_user_model().objects.create_user(
+            email="test@test.com", password="testpassword"
+        )
+        cls.performance = sample_performance()
+        reservation = Reservation.objects.create(user=cls.user)
+        Ticket.objects.create(
+            row=1,
+            seat=1,
+            performance=cls.performance,
+            reservation=reservation,
+        )
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "ANALYZE theatre_performance, theatre_reservation, "
+                    "theatre_ticket"
+                )
+
+    def assert_uses_index(self, queryset, index):
+        plan = queryset.explain()
+        self.assertIn(index, plan)
+
+    def test_performances_of_play_on_date(self):
+        day_start = datetime(2022, 6, 2, tzinfo=timezone.utc)
+        queryset = Performance.objects.filter(
+            play_id=self.performance.play_id,
+            show_time__gte=day_start,
+            show_time__lt=day_start + timedelta(days=1),
+        )
+
+        self.assert_uses_index(queryset, "performance_play_time_idx")
+
+    def test_performances_on_date(self):
+        day_start = datetime(2022, 6, 2, tzinfo=timezone.utc)
+        queryset = Performance.objects.filter(
+            show_time__gte=day_start,
+            show_time__lt=day_start + timedelta(days=1),
+        ).order_by("show_time", "id")
+
+        self.assert_uses_index(queryset, "performance_show_time_id_idx")
+
+    def test_reservations_of_user(self):
+        queryset = Reservation.objects.filter(user=self.user)
+
+        self.assert_uses_index(queryset, "reservation_user_created_idx")
+
+    def test_taken_seats_of_performance(self):
+        queryset = (
+            Ticket.objects.filter(performance=self.performance)
+            .order_by()
+            .values_list("row", "seat")
+        )
+
+        self.assert_uses_index(queryset, "ticket_performance_seat_idx")
@@ -0,0 +1,378 @@
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from theatre.models import (
+    Play,
+    TheatreHall,
+    Performance,
+    Reservation,
+    SeatHold,
+    Ticket,
+)
+
+RESERVATION_URL = reverse("theatre:reservation-list")
+PERFORMANCE_URL = reverse("theatre:performance-list")
+
+
+def sample_performance(**params):
+    theatre_hall = TheatreHall.objects.create(
+        name="Blue",
+        rows=10,
+        seats_in_row=12
+    )
+    play = Play.objects.create(
+        title="Sample play",
+        description="Sample description",
+        duration=90,
+    )
+
+    defaults = {
+        "show_time": "2022-06-02T14:00:00Z",
+        "play": play,
+        "theatre_hall": theatre_hall,
+    }
+    defaults.update(params)
+
+    return Performance.objects.create(**defaults)
+
+
+class TicketsSoldCounterTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com", password="testpassword"
+        )
+        self.client.force_authenticate(self.user)
+        self.performance = sample_performance()
+
+    def reserve(self, *seats):
+        return self.client.post(
+            RESERVATION_URL,
+            {
+                "tickets": [
+                    {
+                        "row": row,
+                        "seat": seat,
+                        "performance": self.performance.id
+                    }
+                    for row, seat in seats
+                ]
+            },
+            format="json",
+        )
+
+    def test_reservation_increments_tickets_sold(self):
+        res = self.reserve((1, 1), (1, 2), (2, 5))
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.performance.refresh_from_db()
+        self.assertEqual(self.performance.tickets_sold, 3)
+        self.assertEqual(self.performance.tickets_available, 117)
+
+    def test_deleting_reservation_releases_seats(self):
+        self.reserve((1, 1), (1, 2))
+        reservation = Reservation.objects.get(user=self.user)
+
+        reservation.delete()
+
+        self.performance.refresh_from_db()
+        self.assertEqual(self.performance.tickets_sold, 0)
+
+    def test_deleting_reservation_releases_seats_at_once(self):
+        self.reserve((1, 1), (1, 2), (2, 5))
+        reservation = Reservation.objects.get(user=self.user)
+        url = reverse("theatre:reservation-detail", args=[reservation.id])
+
+        with mock.patch("theatre.signals.publish_seats") as publish:
+            with CaptureQueriesContext(connection) as queries:
+                res = self.client.delete(url)
+
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+
+        updates = [
+            query["sql"]
+            for query in queries.captured_queries
+            if query["sql"].startswith('UPDATE "theatre_performance"')
+        ]
+        self.assertEqual(len(updates), 1)
+        publish.assert_called_once_with(
+            self.performance.id, released=[(1, 1), (1, 2), (2, 5)]
+        )
+        self.performance.refresh_from_db()
+        self.assertEqual(self.performance.tickets_sold, 0)
+
+    def test_deleting_ticket_releases_seat(self):
+        self.reserve((1, 1), (1, 2))
+
+        Ticket.objects.filter(row=1, seat=1).delete()
+
+        self.performance.refresh_from_db()
+        self.assertEqual(self.performance.tickets_sold, 1)
+
+    def test_performance_list_reads_counter(self):
+        self.reserve((3, 3))
+
+        with self.assertNumQueries(2):
+            res = self.client.get(PERFORMANCE_URL)
+
+        self.assertEqual(res.data["results"][0]["tickets_available"], 119)
+
+    def test_rebuild_tickets_sold_fixes_drift(self):
+        self.reserve((1, 1), (1, 2))
+        Performance.objects.update(tickets_sold=7)
+
+        out = StringIO()
+        call_command("rebuild_tickets_sold", "--check", stdout=out)
+        self.performance.refresh_from_db()
+        self.assertEqual(self.performance.tickets_sold, 7)
+        self.assertIn("1 counters drifted", out.getvalue())
+
+        call_command("rebuild_tickets_sold", stdout=StringIO())
+        self.performance.refresh_from_db()
+        self.assertEqual(self.performance.tickets_sold, 2)
+
+
+class ReservationCreateTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com", password="testpassword"
+        )
+        self.client.force_authenticate(self.user)
+        self.performance = sample_performance()
+
+    def reserve(self, seats):
+        return self.client.post(
+            RESERVATION_URL,
+            {
+                "tickets": [
+                    {
+                        "row": row,
+                        "seat": seat,
+                        "performance": self.performance.id
+                    }
+                    for row, seat in seats
+                ]
+            },
+            format="json",
+        )
+
+    def test_query_count_does_not_depend_on_ticket_count(self):
+        with CaptureQueriesContext(connection) as small:
+            self.reserve([(1, 1), (1, 2)])
+        with CaptureQueriesContext(connection) as large:
+            self.reserve(
+                [(row, seat) for row in (2, 3, 4) for seat in range(1, 11)]
+            )
+
+        self.assertEqual(len(small), len(large))
+        self.assertEqual(Ticket.objects.count(), 32)
+
+    def test_repeated_seat_is_rejected(self):
+        res = self.reserve([(1, 1), (1, 2), (1, 1)])
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Reservation.objects.exists())
+
+    def test_seat_outside_hall_is_rejected(self):
+        res = self.reserve([(1, 1), (11, 1)])
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Ticket.objects.exists())
+
+    def test_taken_seat_is_rejected(self):
+        self.reserve([(1, 1)])
+
+        res = self.reserve([(1, 2), (1, 1)])
+
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(
+            res.data["seats"],
+            [{"performance": self.performance.id, "row": 1, "seat": 1}]
+        )
+        self.assertEqual(Ticket.objects.count(), 1)
+
+
+def hold_url(performance_id):
+    return reverse("theatre:performance-hold", args=[performance_id])
+
+
+class SeatHoldTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com", password="testpassword"
+        )
+        self.other_user = get_user_model().objects.create_user(
+            email="other@test.com", password="testpassword"
+        )
+        self.client.force_authenticate(self.user)
+        self.performance = sample_performance()
+
+    def hold(self, *seats):
+        return self.client.post(
+            hold_url(self.performance.id),
+            {"seats": [{"row": row, "seat": seat} for row, seat in seats]},
+            format="json",
+        )
+
+    def reserve(self, *seats):
+        return self.client.post(
+            RESERVATION_URL,
+            {
+                "tickets": [
+                    {
+                        "row": row,
+                        "seat": seat,
+                        "performance": self.performance.id
+                    }
+                    for row, seat in seats
+                ]
+            },
+            format="json",
+        )
+
+    def test_hold_seats(self):
+        res = self.hold((1, 1), (1, 2))
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(res.data["seats"]), 2)
+        self.assertIn("expires_at", res.data)
+        self.assertEqual(
+            SeatHold.objects.filter(user=self.user).count(), 2
+        )
+
+    def test_seat_held_by_other_user_conflicts(self):
+        self.hold((1, 1))
+        self.client.force_authenticate(self.other_user)
+
+        res = self.hold((1, 1), (1, 2))
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(
+            res.data["seats"],
+            [{"performance": self.performance.id, "row": 1, "seat": 1}]
+        )
+
+        res = self.reserve((1, 1))
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+        self.assertFalse(Ticket.objects.exists())
+
+    def test_reservation_consumes_own_hold(self):
+        self.hold((1, 1), (1, 2))
+
+        res = self.reserve((1, 1))
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            list(SeatHold.objects.values_list("row", "seat")), [(1, 2)]
+        )
+
+    def test_expired_hold_does_not_block(self):
+        SeatHold.objects.create(
+            performance=self.performance,
+            user=self.other_user,
+            row=1,
+            seat=1,
+            expires_at=timezone.now() - timezone.timedelta(seconds=1),
+        )
+
+        res = self.hold((1, 1))
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(SeatHold.objects.get().user, self.user)
+
+    @override_settings(MAX_HELD_SEATS=2)
+    def test_held_seats_are_limited(self):
+        res = self.hold((1, 1), (1, 2), (1, 3))
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(SeatHold.objects.exists())
+
+        self.hold((1, 1), (1, 2))
+        res = self.hold((2, 1), (2, 2))
+
+        # a new hold replaces the seats held before
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            list(SeatHold.objects.values_list("row", "seat")),
+            [(2, 1), (2, 2)],
+        )
+
+    def test_holding_again_keeps_first_expiry(self):
+        self.hold((1, 1))
+        first_expiry = timezone.now() + timezone.timedelta(seconds=30)
+        SeatHold.objects.update(expires_at=first_expiry)
+
+        res = self.hold((1, 1), (1, 2))
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            set(SeatHold.objects.values_list("expires_at", flat=True)),
+            {first_expiry},
+        )
+
+    def test_hold_outside_hall_is_rejected(self):
+        res = self.hold((11, 1))
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_release_holds(self):
+        self.hold((1, 1), (1, 2))
+
+        res = self.client.delete(hold_url(self.performance.id))
+
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(SeatHold.objects.exists())
+
+
+class ReservationListTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com", password="testpassword"
+        )
+        self.client.force_authenticate(self.user)
+
+    def create_reservations(self, count):
+        for _ in range(count):
+            performance = sample_performance()
+            reservation = Reservation.objects.create(user=self.user)
+            for seat in (1, 2, 3):
+                Ticket.objects.create(
+                    row=1,
+                    seat=seat,
+                    performance=performance,
+                    reservation=reservation,
+                )
+
+    def test_list_query_count_is_constant(self):
+        self.create_reservations(1)
+        with CaptureQueriesContext(connection) as single:
+            self.client.get(RESERVATION_URL)
+
+        self.create_reservations(4)
+        with CaptureQueriesContext(connection) as page:
+            res = self.client.get(RESERVATION_URL)
+
+        self.assertEqual(len(single), len(page))
+        self.assertEqual(len(res.data["results"]), 5)
+
+    def test_list_shows_nested_performance(self):
+        self.create_reservations(1)
+        Performance.objects.update(tickets_sold=3)
+
+        res = self.client.get(RESERVATION_URL)
+
+        ticket = res.data["results"][0]["tickets"][0]
+        self.assertEqual(ticket["performance"]["play_title"], "Sample play")
+        self.assertEqual(ticket["performance"]["theatre_hall"], "Blue")
+        self.assertEqual(ticket["performance"]["tickets_available"], 117)
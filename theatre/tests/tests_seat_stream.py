@@ -0,0 +1,236 @@
+import asyncio
+import json
+
+from asgiref.sync import async_to_sync, sync_to_async
+from django.contrib.auth import get_user_model
+from django.core import signals
+from django.db import close_old_connections
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from theatre.models import Ticket
+from theatre.seat_events import RESYNC, LocalBroker
+from theatre.seatmap import build_seat_bitmap, encode_seat_bitmap
+from theatre.streams import SeatStreamRouter
+from theatre.tests.tests_reservation_api import sample_performance
+from user.serializers import JWTObtainPairSerializer
+
+RESERVATION_URL = reverse("theatre:reservation-list")
+
+
+async def django_application(scope, receive, send):
+    await send({"type": "http.response.start", "status": 204, "headers": []})
+    await send({"type": "http.response.body", "body": b""})
+
+
+def parse_events(body):
+    """(event, data) of every server-sent event in body"""
+    events = []
+    for block in body.decode().split("\n\n"):
+        fields = dict(
+            line.split(": ", 1)
+            for line in block.splitlines()
+            if not line.startswith(":")
+        )
+        if "event" in fields:
+            events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+
+@override_settings(
+    SEAT_EVENTS_BROKER="theatre.seat_events.LocalBroker",
+    SEAT_STREAM_KEEPALIVE=5,
+)
+class SeatStreamTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com", password="testpassword"
+        )
+        access = JWTObtainPairSerializer.get_token(self.user).access_token
+        self.headers = [(b"authorization", f"Bearer {access}".encode())]
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.performance = sample_performance()
+        self.application = SeatStreamRouter(django_application)
+
+    def scope(self, performance_id, headers=None):
+        return {
+            "type": "http",
+            "method": "GET",
+            "path": f"/api/theatre/performances/{performance_id}"
+            "/seats/stream/",
+            "query_string": b"",
+            "headers": self.headers if headers is None else headers,
+        }
+
+    def stream(self, scope, events=1, during=None):
+        """
+        Messages the application sent until it sent `events` server-sent
+        events, calling during() once the first one arrived
+        """
+        pending = [during] if during is not None else []
+
+        async def run():
+            receive_queue = asyncio.Queue()
+            messages = []
+            received = asyncio.Event()
+
+            async def send(message):
+                messages.append(message)
+                received.set()
+
+            async def receive():
+                return await receive_queue.get()
+
+            def body():
+                return b"".join(
+                    message.get("body", b"") for message in messages
+                )
+
+            application = asyncio.ensure_future(
+                self.application(scope, receive, send)
+            )
+            while not application.done():
+                if len(parse_events(body())) >= events:
+                    break
+                received.clear()
+                await asyncio.wait(
+                    {application, asyncio.ensure_future(received.wait())},
+                    timeout=5,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                if pending and parse_events(body()):
+                    await sync_to_async(pending.pop())()
+
+            await receive_queue.put({"type": "http.disconnect"})
+            await asyncio.wait_for(application, timeout=5)
+            return messages
+
+        # the test transaction must survive the stream's request cycles,
+        # the test client keeps it the same way
+        signals.request_started.disconnect(close_old_connections)
+        signals.request_finished.disconnect(close_old_connections)
+        try:
+            return async_to_sync(run)()
+        finally:
+            signals.request_started.connect(close_old_connections)
+            signals.request_finished.connect(close_old_connections)
+
+    def reserve(self, *seats):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(
+                RESERVATION_URL,
+                {
+                    "tickets": [
+                        {
+                            "row": row,
+                            "seat": seat,
+                            "performance": self.performance.id,
+                        }
+                        for row, seat in seats
+                    ]
+                },
+                format="json",
+            )
+
+    def test_stream_starts_with_snapshot(self):
+        self.reserve((1, 1))
+
+        messages = self.stream(self.scope(self.performance.id))
+
+        self.assertEqual(messages[0]["status"], 200)
+        self.assertIn(
+            (b"content-type", b"text/event-stream"), messages[0]["headers"]
+        )
+        [(event, data)] = parse_events(messages[1]["body"])
+        self.assertEqual(event, "snapshot")
+        self.assertEqual(
+            data["taken"],
+            encode_seat_bitmap(build_seat_bitmap(self.performance)),
+        )
+        self.assertEqual((data["rows"], data["seats_in_row"]), (10, 12))
+
+    def test_stream_sends_taken_and_released_seats(self):
+        def change_seats():
+            self.reserve((2, 3), (2, 4))
+            with self.captureOnCommitCallbacks(execute=True):
+                Ticket.objects.filter(row=2, seat=3).delete()
+
+        messages = self.stream(
+            self.scope(self.performance.id), events=3, during=change_seats
+        )
+
+        events = parse_events(
+            b"".join(message.get("body", b"") for message in messages)
+        )
+        self.assertEqual(
+            events[1:],
+            [
+                ("seats", {"taken": [[2, 3], [2, 4]], "released": []}),
+                ("seats", {"taken": [], "released": [[2, 3]]}),
+            ],
+        )
+
+    def test_database_work_runs_in_request_cycles(self):
+        cycles = []
+
+        def started(**kwargs):
+            cycles.append("started")
+
+        def finished(**kwargs):
+            cycles.append("finished")
+
+        signals.request_started.connect(started)
+        signals.request_finished.connect(finished)
+        try:
+            self.stream(self.scope(self.performance.id))
+        finally:
+            signals.request_started.disconnect(started)
+            signals.request_finished.disconnect(finished)
+
+        # the performance lookup, then the snapshot
+        self.assertEqual(cycles, ["started", "finished"] * 2)
+
+    def test_other_requests_reach_django(self):
+        scope = {**self.scope(self.performance.id), "method": "POST"}
+
+        messages = self.stream(scope)
+
+        self.assertEqual(messages[0]["status"], 204)
+
+    def test_authentication_required(self):
+        messages = self.stream(self.scope(self.performance.id, headers=[]))
+
+        self.assertEqual(messages[0]["status"], 401)
+
+    def test_invalid_token(self):
+        messages = self.stream(
+            self.scope(
+                self.performance.id,
+                headers=[(b"authorization", b"Bearer invalid")],
+            )
+        )
+
+        self.assertEqual(messages[0]["status"], 401)
+
+    def test_missing_performance(self):
+        messages = self.stream(self.scope(0))
+
+        self.assertEqual(messages[0]["status"], 404)
+
+
+class LocalBrokerTests(TestCase):
+    def test_slow_subscriber_is_resynced(self):
+        broker = LocalBroker()
+        broker.queue_size = 2
+
+        async def run():
+            async with broker.subscribe(1) as next_event:
+                for seat in range(1, 4):
+                    broker.publish(1, {"taken": [[1, seat]], "released": []})
+                await asyncio.sleep(0)
+                return await next_event()
+
+        self.assertEqual(async_to_sync(run)(), RESYNC)
+        self.assertEqual(broker.subscribers, {})
@@ -3,6 +3,7 @@ import tempfile
 
 from PIL import Image
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.test import TestCase
 from django.urls import reverse
 from rest_framework import status
@@ -79,6 +80,7 @@ class UnauthenticatedMovieAPITests(TestCase):
 
 class AuthenticatedMovieAPITests(TestCase):
     def setUp(self):
+        cache.clear()
         self.client = APIClient()
         self.user = get_user_model().objects.create_user(
             email="test@test.com", password="testpassword"
@@ -136,6 +138,47 @@ class AuthenticatedMovieAPITests(TestCase):
         self.assertIn(play_first_serializer.data, res.data["results"])
         self.assertNotIn(play_serializer.data, res.data["results"])
 
+    def test_play_filters_are_combined(self):
+        genre = sample_genre(name="Horror")
+        actor = sample_actor(first_name="John", last_name="Doe")
+        play_match = sample_play(title="Dark night")
+        play_other_title = sample_play(title="Bright day")
+        play_no_actor = sample_play(title="Dark forest")
+        for play in (play_match, play_other_title, play_no_actor):
+            play.genres.add(genre)
+        play_match.actors.add(actor)
+        play_other_title.actors.add(actor)
+
+        res = self.client.get(
+            PLAY_URL,
+            {"title": "dark", "genres": f"{genre.id}", "actors": f"{actor.id}"}
+        )
+
+        self.assertEqual(
+            [play["title"] for play in res.data["results"]], ["Dark night"]
+        )
+
+    def test_play_filter_has_no_duplicates(self):
+        play = sample_play()
+        genre_1 = sample_genre(name="Horror")
+        genre_2 = sample_genre(name="Adventure")
+        play.genres.add(genre_1, genre_2)
+
+        res = self.client.get(PLAY_URL, {"genres": f"{genre_1.id},"
+                                                   f"{genre_2.id}"})
+
+        self.assertEqual(res.data["count"], 1)
+
+    def test_filtered_play_list_prefetches_relations(self):
+        genre = sample_genre(name="Horror")
+        for index in range(3):
+            play = sample_play(title=f"Play {index}")
+            play.genres.add(genre)
+            play.actors.add(sample_actor(last_name=f"Doe {index}"))
+
+        with self.assertNumQueries(4):
+            self.client.get(PLAY_URL, {"genres": f"{genre.id}"})
+
     def test_play_detail(self):
         play = sample_play()
         genre = sample_genre(name="Horror")
@@ -160,6 +203,7 @@ class AuthenticatedMovieAPITests(TestCase):
 
 class AdminMovieAPITests(TestCase):
     def setUp(self):
+        cache.clear()
         self.client = APIClient()
         self.user = get_user_model().objects.create_user(
             email="admin@email.com", password="<PASSWORD>", is_staff=True
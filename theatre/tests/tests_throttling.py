@@ -0,0 +1,124 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from theatre.tests.tests_reservation_api import sample_performance
+from theatre.throttling import FixedWindowRateThrottle
+
+GENRE_URL = reverse("theatre:genre-list")
+RESERVATION_URL = reverse("theatre:reservation-list")
+LOGIN_URL = reverse("user:get_token")
+
+RATES = {
+    "anon": "2/min",
+    "user": "3/min",
+    "catalog": "5/min",
+    "reservations": "1/min",
+    "login": "2/min",
+}
+
+
+@override_settings(
+    CACHES={
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        },
+        "throttle": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "throttle",
+        },
+    },
+    THROTTLE_CACHE="throttle",
+)
+@mock.patch.object(FixedWindowRateThrottle, "THROTTLE_RATES", RATES)
+class ThrottlingTests(TestCase):
+    def setUp(self):
+        caches["throttle"].clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com", password="testpassword"
+        )
+
+    def test_login_scope(self):
+        for _ in range(2):
+            res = self.client.post(
+                LOGIN_URL, {"email": "test@test.com", "password": "wrong"}
+            )
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        res = self.client.post(
+            LOGIN_URL, {"email": "test@test.com", "password": "testpassword"}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn("Retry-After", res)
+
+    def test_catalog_reads_use_catalog_scope(self):
+        self.client.force_authenticate(self.user)
+
+        for _ in range(5):
+            res = self.client.get(GENRE_URL)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        res = self.client.get(GENRE_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    def test_reservations_scope_only_limits_create(self):
+        performance = sample_performance()
+        self.client.force_authenticate(self.user)
+
+        for seat, expected in (
+            (1, status.HTTP_201_CREATED),
+            (2, status.HTTP_429_TOO_MANY_REQUESTS),
+        ):
+            res = self.client.post(
+                RESERVATION_URL,
+                {
+                    "tickets": [
+                        {
+                            "row": 1,
+                            "seat": seat,
+                            "performance": performance.id
+                        }
+                    ]
+                },
+                format="json",
+            )
+            self.assertEqual(res.status_code, expected)
+
+        res = self.client.get(RESERVATION_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_counter_is_a_single_cache_entry(self):
+        self.client.force_authenticate(self.user)
+        self.client.get(GENRE_URL)
+        self.client.get(GENRE_URL)
+
+        counters = caches["throttle"]._cache
+        self.assertEqual(len(counters), 1)
+
+    def test_new_window_resets_counter(self):
+        self.client.force_authenticate(self.user)
+        with mock.patch.object(
+            FixedWindowRateThrottle, "timer", return_value=120.0
+        ):
+            for _ in range(5):
+                self.client.get(GENRE_URL)
+            res = self.client.get(GENRE_URL)
+            self.assertEqual(
+                res.status_code, status.HTTP_429_TOO_MANY_REQUESTS
+            )
+            self.assertEqual(res["Retry-After"], "60")
+
+        with mock.patch.object(
+            FixedWindowRateThrottle, "timer", return_value=180.0
+        ):
+            res = self.client.get(GENRE_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
@@ -0,0 +1,168 @@
+import csv
+import io
+import json
+import os
+import tempfile
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.core import signals
+from django.core.management import call_command
+from django.db import close_old_connections, connection
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from theatre.export import (
+    EXPORT_COLUMNS,
+    iter_export_rows,
+    ticket_export_queryset,
+)
+from theatre.models import Reservation, Ticket
+from theatre.tests.tests_reservation_api import sample_performance
+from theatre_service_api.asgi import application
+from user.serializers import JWTObtainPairSerializer
+
+
+def export_url(export_format):
+    return reverse("theatre:ticket-export", args=[export_format])
+
+
+def read_body(response):
+    return b"".join(response.streaming_content).decode()
+
+
+class TicketExportTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = get_user_model().objects.create_user(
+            email="admin@test.com", password="testpassword", is_staff=True
+        )
+        self.client.force_authenticate(self.admin)
+
+        reservation = Reservation.objects.create(user=self.admin)
+        for show_time, seats in (
+            ("2024-03-01T19:00:00Z", (1, 2)),
+            ("2024-03-02T19:00:00Z", (5,)),
+        ):
+            performance = sample_performance(show_time=show_time)
+            for seat in seats:
+                Ticket.objects.create(
+                    row=1,
+                    seat=seat,
+                    performance=performance,
+                    reservation=reservation,
+                )
+
+    def test_export_requires_admin(self):
+        user = get_user_model().objects.create_user(
+            email="test@test.com", password="testpassword"
+        )
+        self.client.force_authenticate(user)
+
+        res = self.client.get(export_url("csv"))
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_csv_export(self):
+        res = self.client.get(export_url("csv"), HTTP_ACCEPT="text/csv")
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res["Content-Type"], "text/csv; charset=utf-8")
+        rows = list(csv.DictReader(io.StringIO(read_body(res))))
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(list(rows[0]), list(EXPORT_COLUMNS))
+        self.assertEqual(rows[0]["user_email"], "admin@test.com")
+        self.assertEqual(rows[0]["play_title"], "Sample play")
+        self.assertEqual(rows[0]["show_time"], "2024-03-01T19:00:00Z")
+
+    def test_ndjson_export_filtered_by_date(self):
+        res = self.client.get(
+            export_url("ndjson"),
+            {"date_from": "2024-03-02", "date_to": "2024-03-02"},
+        )
+
+        self.assertEqual(res["Content-Type"], "application/x-ndjson")
+        self.assertIn(
+            "tickets-2024-03-02-2024-03-02.ndjson",
+            res["Content-Disposition"],
+        )
+        lines = [json.loads(line) for line in read_body(res).splitlines()]
+        self.assertEqual(len(lines), 1)
+        self.assertEqual(lines[0]["seat"], 5)
+        self.assertEqual(lines[0]["theatre_hall"], "Blue")
+
+    def test_export_through_asgi(self):
+        access = JWTObtainPairSerializer.get_token(self.admin).access_token
+        scope = {
+            "type": "http",
+            "method": "GET",
+            "path": export_url("csv"),
+            "query_string": b"",
+            "headers": [
+                (b"host", b"testserver"),
+                (b"authorization", f"Bearer {access}".encode()),
+            ],
+        }
+        messages = []
+
+        async def receive():
+            return {"type": "http.request", "body": b""}
+
+        async def send(message):
+            messages.append(message)
+
+        # the test transaction must survive the request cycle, the test
+        # client keeps it the same way
+        signals.request_started.disconnect(close_old_connections)
+        signals.request_finished.disconnect(close_old_connections)
+        try:
+            async_to_sync(application)(scope, receive, send)
+        finally:
+            signals.request_started.connect(close_old_connections)
+            signals.request_finished.connect(close_old_connections)
+
+        self.assertEqual(messages[0]["status"], status.HTTP_200_OK)
+        self.assertFalse(messages[-1].get("more_body"))
+        body = b"".join(message.get("body", b"") for message in messages)
+        rows = list(csv.DictReader(io.StringIO(body.decode())))
+        self.assertEqual(len(rows), 3)
+
+    def test_invalid_date_range(self):
+        res = self.client.get(
+            export_url("csv"),
+            {"date_from": "2024-03-02", "date_to": "2024-03-01"},
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_keyset_batches_without_server_side_cursors(self):
+        queryset = ticket_export_queryset()
+        expected = list(queryset)
+
+        connection.settings_dict["DISABLE_SERVER_SIDE_CURSORS"] = True
+        try:
+            rows = list(iter_export_rows(queryset, chunk_size=2))
+        finally:
+            del connection.settings_dict["DISABLE_SERVER_SIDE_CURSORS"]
+
+        self.assertEqual(rows, expected)
+
+    def test_export_command(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "tickets.csv")
+            call_command(
+                "export_tickets", "--from", "2024-03-01", "--output", path
+            )
+            with open(path, newline="") as output:
+                rows = list(csv.DictReader(output))
+
+        self.assertEqual(len(rows), 3)
+
+        out = io.StringIO()
+        call_command(
+            "export_tickets", "--format", "ndjson", "--to", "2024-03-01",
+            stdout=out,
+        )
+        self.assertEqual(len(out.getvalue().splitlines()), 2)
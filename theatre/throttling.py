@@ -0,0 +1,85 @@
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework import throttling
+
+CATALOG_READ_SCOPES = {"list": "catalog", "retrieve": "catalog"}
+
+
+class FixedWindowRateThrottle(throttling.SimpleRateThrottle):
+    """
+    Count requests per fixed window in THROTTLE_CACHE with a single
+    atomic add/incr, so every worker sharing the cache shares the limit.
+    """
+
+    @property
+    def cache(self):
+        return caches[settings.THROTTLE_CACHE]
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        self.now = self.timer()
+        window = int(self.now // self.duration)
+        count = self.increment(f"{self.key}:{window}")
+
+        if count > self.num_requests:
+            return self.throttle_failure()
+        return True
+
+    def increment(self, key):
+        if self.cache.add(key, 1, self.duration):
+            return 1
+        try:
+            return self.cache.incr(key)
+        except ValueError:
+            # The window expired between add() and incr()
+            self.cache.set(key, 1, self.duration)
+            return 1
+
+    def wait(self):
+        return self.duration - self.now % self.duration
+
+
+class UnscopedRateThrottle(FixedWindowRateThrottle):
+    """Leave views that declare a throttle_scope to ScopedRateThrottle"""
+
+    def allow_request(self, request, view):
+        if getattr(view, "throttle_scope", None):
+            return True
+        return super().allow_request(request, view)
+
+
+class AnonRateThrottle(UnscopedRateThrottle, throttling.AnonRateThrottle):
+    pass
+
+
+class UserRateThrottle(UnscopedRateThrottle, throttling.UserRateThrottle):
+    pass
+
+
+class ScopedRateThrottle(
+    FixedWindowRateThrottle, throttling.ScopedRateThrottle
+):
+    def allow_request(self, request, view):
+        self.scope = getattr(view, self.scope_attr, None)
+        if not self.scope:
+            return True
+
+        self.rate = self.get_rate()
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+        return super().allow_request(request, view)
+
+
+class ThrottleScopeMixin:
+    """Pick the throttle scope of a viewset action from throttle_scopes"""
+
+    throttle_scopes = {}
+
+    @property
+    def throttle_scope(self):
+        return self.throttle_scopes.get(getattr(self, "action", None))
@@ -1,5 +1,13 @@
+from django.conf import settings
 from rest_framework import routers
-from django.urls import path, include
+from django.urls import path, include, re_path
+
+from theatre.async_views import (
+    PlayListView,
+    PlayDetailView,
+    PerformanceListView,
+    PerformanceDetailView,
+)
 
 from theatre.views import (
     TheatreHallViewSet,
@@ -8,6 +16,7 @@ from theatre.views import (
     PlayViewSet,
     PerformanceViewSet,
     ReservationViewSet,
+    TicketExportView,
 )
 
 router = routers.DefaultRouter()
@@ -19,8 +28,33 @@ router.register("plays", PlayViewSet)
 router.register("performances", PerformanceViewSet),
 router.register("reservations", ReservationViewSet),
 
+# The busiest catalog reads are served by async views in the ASGI
+# deployment, every other route stays on the router
+async_urlpatterns = [
+    path("plays/", PlayListView.as_view(), name="play-list"),
+    path("plays/<str:pk>/", PlayDetailView.as_view(), name="play-detail"),
+    path(
+        "performances/",
+        PerformanceListView.as_view(),
+        name="performance-list"
+    ),
+    path(
+        "performances/<str:pk>/",
+        PerformanceDetailView.as_view(),
+        name="performance-detail"
+    ),
+]
+
 urlpatterns = [
     path("", include(router.urls)),
+    re_path(
+        r"^exports/tickets\.(?P<export_format>csv|ndjson)$",
+        TicketExportView.as_view(),
+        name="ticket-export"
+    ),
 ]
 
+if settings.ASYNC_VIEWS:
+    urlpatterns = async_urlpatterns + urlpatterns
+
 app_name = "theatre"
@@ -1,21 +1,51 @@
-from datetime import datetime
+from datetime import datetime, time, timedelta
 
-from django.db.models import F, Count
+from django.db.models import Exists, OuterRef, Prefetch
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import extend_schema, OpenApiParameter
 from rest_framework import mixins, viewsets, status
-from rest_framework.authentication import TokenAuthentication
 from rest_framework.decorators import action
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.views import APIView
 from rest_framework.viewsets import GenericViewSet
+from theatre.cache import CachedListMixin, CachedRetrieveMixin
+from theatre.daily_schedule import (
+    availability_changed,
+    date_scope,
+    get_schedule,
+    performance_scopes,
+    play_scope,
+    refresh_schedule,
+)
+from theatre.export import (
+    EXPORT_FORMATS,
+    iter_export_rows,
+    ticket_export_queryset,
+)
+from theatre.images import DEFAULT_RENDITION, RENDITIONS
+from theatre.pagination import (
+    PerformancePagination,
+    PlayPagination,
+    ReservationPagination,
+)
 from theatre.permissions import IsAdminAllORIsAuthenticatedORReadOnly
+from theatre.search import SEARCH_RESULTS_LIMIT, search_plays
+from theatre.throttling import CATALOG_READ_SCOPES, ThrottleScopeMixin
 
 from theatre.models import (
     TheatreHall,
     Actor,
     Genre,
     Play,
+    PlayActor,
+    PlayGenre,
     Performance,
-    Reservation
+    Reservation,
+    SeatHold,
+    Ticket
 )
 from theatre.serializers import (
     TheatreHallSerializer,
@@ -28,46 +58,74 @@ from theatre.serializers import (
     PlayDetailSerializer,
     PerformanceListSerializer,
     PerformanceDetailSerializer,
+    PerformanceSeatMapSerializer,
+    PerformanceBulkSerializer,
+    PerformanceBulkSummarySerializer,
     ReservationListSerializer,
-    PlayImageSerializer
+    PlayImageSerializer,
+    SeatHoldSerializer,
+    BestSeatsSerializer,
+    TicketExportSerializer,
 )
 
 
 class TheatreHallViewSet(
+    ThrottleScopeMixin,
+    CachedListMixin,
     mixins.CreateModelMixin,
     mixins.ListModelMixin,
     GenericViewSet
 ):
     queryset = TheatreHall.objects.all()
     serializer_class = TheatreHallSerializer
-    authentication_classes = (TokenAuthentication,)
     permission_classes = (IsAdminAllORIsAuthenticatedORReadOnly,)
+    throttle_scopes = CATALOG_READ_SCOPES
 
 
-class ActorViewSet(viewsets.ModelViewSet):
+class ActorViewSet(
+    ThrottleScopeMixin,
+    CachedListMixin,
+    CachedRetrieveMixin,
+    viewsets.ModelViewSet
+):
     queryset = Actor.objects.all()
     serializer_class = ActorSerializer
-    authentication_classes = (TokenAuthentication,)
     permission_classes = (IsAdminAllORIsAuthenticatedORReadOnly,)
+    throttle_scopes = CATALOG_READ_SCOPES
 
 
-class GenreViewSet(viewsets.ModelViewSet):
+class GenreViewSet(
+    ThrottleScopeMixin,
+    CachedListMixin,
+    CachedRetrieveMixin,
+    viewsets.ModelViewSet
+):
     queryset = Genre.objects.all()
     serializer_class = GenreSerializer
-    authentication_classes = (TokenAuthentication,)
     permission_classes = (IsAdminAllORIsAuthenticatedORReadOnly,)
+    throttle_scopes = CATALOG_READ_SCOPES
 
 
-class PlayViewSet(viewsets.ModelViewSet):
-    queryset = Play.objects.all().prefetch_related("genres", "actors")
+class PlayViewSet(
+    ThrottleScopeMixin,
+    CachedListMixin,
+    CachedRetrieveMixin,
+    viewsets.ModelViewSet
+):
+    queryset = (
+        Play.objects.all()
+        .prefetch_related("genres", "actors")
+        .defer("search_vector")
+    )
     serializer_class = PlaySerializer
-    authentication_classes = (TokenAuthentication,)
+    pagination_class = PlayPagination
     permission_classes = (IsAdminAllORIsAuthenticatedORReadOnly,)
+    throttle_scopes = CATALOG_READ_SCOPES
 
     @staticmethod
     def params_to_ints(qs):
         """Converts a list of string IDs to a list of integers"""
-        return [int(str_id) for str_id in qs.split(",")]
+        return [int(str_id) for str_id in qs.split(",") if str_id]
 
     def get_serializer_class(self):
         if self.action == "list":
@@ -98,7 +156,8 @@ class PlayViewSet(viewsets.ModelViewSet):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
     def get_queryset(self):
-        """Retrieve the plays with filters"""
+        """Retrieve the plays with all given filters combined"""
+        search = self.request.query_params.get("search")
         title = self.request.query_params.get("title")
         genres = self.request.query_params.get("genres")
         actors = self.request.query_params.get("actors")
@@ -106,20 +165,42 @@ class PlayViewSet(viewsets.ModelViewSet):
         queryset = self.queryset
 
         if title:
-            return Play.objects.filter(title__icontains=title)
+            queryset = queryset.filter(title__icontains=title)
 
         if genres:
             genres_ids = self.params_to_ints(genres)
-            return Play.objects.filter(genres__in=genres_ids)
+            queryset = queryset.filter(
+                Exists(
+                    PlayGenre.objects.filter(
+                        play=OuterRef("pk"), genre_id__in=genres_ids
+                    )
+                )
+            )
 
         if actors:
             actors_ids = self.params_to_ints(actors)
-            return Play.objects.filter(actors__in=actors_ids)
+            queryset = queryset.filter(
+                Exists(
+                    PlayActor.objects.filter(
+                        play=OuterRef("pk"), actor_id__in=actors_ids
+                    )
+                )
+            )
 
-        return queryset.distinct()
+        if search:
+            queryset = search_plays(queryset, search)
+
+        return queryset
 
     @extend_schema(
         parameters=[
+            OpenApiParameter(
+                name="search",
+                description="Full-text search over title, description, "
+                            "actors and genres, best matches first, "
+                            f"at most {SEARCH_RESULTS_LIMIT} of them",
+                type=str,
+            ),
             OpenApiParameter(
                 name="title", description="Filter by title", type=str
             ),
@@ -133,6 +214,13 @@ class PlayViewSet(viewsets.ModelViewSet):
                 type={"type": "array", "items": {"type": "number"}},
                 description="Filter by actors id (ex. ?actors=1,2)",
             ),
+            OpenApiParameter(
+                name="image_size",
+                type=str,
+                enum=list(RENDITIONS),
+                description="Size of the poster linked as image "
+                            f"(default {DEFAULT_RENDITION})",
+            ),
         ]
     )
     def list(self, request, *args, **kwargs):
@@ -140,20 +228,18 @@ class PlayViewSet(viewsets.ModelViewSet):
         return super().list(request, *args, **kwargs)
 
 
-class PerformanceViewSet(viewsets.ModelViewSet):
-    queryset = (
-        Performance.objects.all()
-        .select_related("play", "theatre_hall")
-        .annotate(
-            tickets_available=(F("theatre_hall__rows") * F("theatre_hall"
-                                                           "__seats_in_row")
-                               - Count("tickets")
-                               )
-        )
+# query parameters PerformanceViewSet can answer from the daily schedule
+SCHEDULE_QUERY_PARAMS = {"date", "play", "limit", "offset", "count"}
+
+
+class PerformanceViewSet(ThrottleScopeMixin, viewsets.ModelViewSet):
+    queryset = Performance.objects.all().select_related(
+        "play", "theatre_hall"
     )
     serializer_class = PerformanceSerializer
-    authentication_classes = (TokenAuthentication,)
+    pagination_class = PerformancePagination
     permission_classes = (IsAdminAllORIsAuthenticatedORReadOnly,)
+    throttle_scopes = CATALOG_READ_SCOPES
 
     def get_queryset(self):
         date = self.request.query_params.get("date")
@@ -163,34 +249,228 @@ class PerformanceViewSet(viewsets.ModelViewSet):
 
         if date:
             date = datetime.strptime(date, "%Y-%m-%d").date()
-            queryset = queryset.filter(show_time__date=date)
+            # a half-open range on show_time can use its indexes,
+            # show_time__date wraps the column in a function
+            day_start = timezone.make_aware(datetime.combine(date, time.min))
+            queryset = queryset.filter(
+                show_time__gte=day_start,
+                show_time__lt=day_start + timedelta(days=1)
+            )
 
         if play_id_str:
             queryset = queryset.filter(play_id=int(play_id_str))
 
         return queryset
 
+    def schedule_scope(self, request):
+        """
+        The materialized list serving this request, if any: date and
+        play filters with limit/offset pages
+        """
+        params = set(request.query_params)
+        if not params & {"date", "play"} or params - SCHEDULE_QUERY_PARAMS:
+            return None
+
+        date = request.query_params.get("date")
+        play = request.query_params.get("play")
+        try:
+            if date:
+                date = datetime.strptime(date, "%Y-%m-%d").date()
+            # empty filters are ignored, like get_queryset() does
+            play = int(play) if play else None
+        except ValueError:
+            return None
+
+        if date:
+            return date_scope(date), play
+        if play is None:
+            return None
+        return play_scope(play), None
+
+    def list(self, request, *args, **kwargs):
+        scope = self.schedule_scope(request)
+        if scope is None:
+            return super().list(request, *args, **kwargs)
+
+        rows = get_schedule(*scope)
+        for row in rows:
+            if row["play_image"]:
+                row["play_image"] = request.build_absolute_uri(
+                    row["play_image"]
+                )
+
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(page)
+        return Response(rows)
+
     def get_serializer_class(self):
         if self.action == "list":
             return PerformanceListSerializer
 
+        if self.action == "hold":
+            return SeatHoldSerializer
+
+        if self.action == "best_seats":
+            return BestSeatsSerializer
+
+        if self.action == "bulk":
+            return PerformanceBulkSerializer
+
         if self.action == "retrieve":
+            if self.request.query_params.get("seatmap") == "bitmap":
+                return PerformanceSeatMapSerializer
+
             return PerformanceDetailSerializer
 
         return PerformanceSerializer
 
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name="seatmap",
+                type=str,
+                enum=["bitmap"],
+                description="Return taken places as a base64 bitmap "
+                            "(one bit per seat, row-major) "
+                            "instead of a list of tickets",
+            ),
+        ]
+    )
+    def retrieve(self, request, *args, **kwargs):
+        """Get Performance with its taken places"""
+        return super().retrieve(request, *args, **kwargs)
+
+    @extend_schema(responses={201: PerformanceBulkSummarySerializer})
+    @action(methods=["POST"], detail=False, url_path="bulk")
+    def bulk(self, request):
+        """
+        Schedule many performances at once, listed or expanded from
+        weekly recurrence rules. Nothing is created if any of them
+        overlaps another performance in its hall.
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        summary = serializer.save()
+        refresh_schedule(
+            scope
+            for play_id, _, show_time in serializer.validated_data["schedule"]
+            for scope in performance_scopes(show_time, play_id)
+        )
+        return Response(
+            PerformanceBulkSummarySerializer(summary).data,
+            status=status.HTTP_201_CREATED
+        )
+
+    @action(
+        methods=["POST", "DELETE"],
+        detail=True,
+        url_path="hold",
+        permission_classes=(IsAuthenticated,)
+    )
+    def hold(self, request, pk=None):
+        """Hold seats for the user while the reservation is completed"""
+        performance = self.get_object()
+
+        if request.method == "DELETE":
+            SeatHold.objects.filter(
+                performance=performance, user_id=request.user.pk
+            ).delete()
+            return Response(status=status.HTTP_204_NO_CONTENT)
+
+        serializer = self.get_serializer(
+            data=request.data,
+            context={
+                **self.get_serializer_context(),
+                "performance": performance
+            }
+        )
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
 
-class ReservationViewSet(viewsets.ModelViewSet):
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name="count",
+                type=int,
+                required=True,
+                description="Number of adjacent seats in one row",
+            ),
+        ],
+        methods=["GET"],
+    )
+    @extend_schema(
+        description="Find the best adjacent seats and hold them for "
+                    "the user",
+        methods=["POST"],
+    )
+    @action(
+        methods=["GET", "POST"],
+        detail=True,
+        url_path="best-seats",
+        permission_classes=(IsAuthenticated,)
+    )
+    def best_seats(self, request, pk=None):
+        """
+        Best free adjacent seats in one row: rows near the preferred
+        depth of the hall first, then seats near the middle of the row
+        """
+        performance = self.get_object()
+        serializer = self.get_serializer(
+            data=(
+                request.query_params
+                if request.method == "GET"
+                else request.data
+            ),
+            context={
+                **self.get_serializer_context(),
+                "performance": performance
+            }
+        )
+        serializer.is_valid(raise_exception=True)
+
+        if request.method == "GET":
+            seats = [
+                {"row": row, "seat": seat} for row, seat in serializer.find()
+            ]
+            return Response(
+                BestSeatsSerializer({"seats": seats, "expires_at": None}).data
+            )
+
+        serializer.save()
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+
+class ReservationViewSet(ThrottleScopeMixin, viewsets.ModelViewSet):
     queryset = Reservation.objects.all()
     serializer_class = ReservationSerializer
-    authentication_classes = (TokenAuthentication,)
+    pagination_class = ReservationPagination
+    throttle_scopes = {"create": "reservations"}
 
     def get_queryset(self):
-        queryset = Reservation.objects.filter(user=self.request.user)
+        queryset = Reservation.objects.filter(
+            user_id=self.request.user.pk
+        )
+
+        if self.action == "list":
+            queryset = queryset.prefetch_related(
+                Prefetch(
+                    "tickets",
+                    queryset=Ticket.objects.select_related(
+                        "performance__play", "performance__theatre_hall"
+                    )
+                )
+            )
+
         return queryset
 
     def perform_create(self, serializer):
-        serializer.save(user=self.request.user)
+        serializer.save(user_id=self.request.user.pk)
+        availability_changed(
+            ticket["performance"]
+            for ticket in serializer.validated_data["tickets"]
+        )
 
     def get_serializer_class(self):
         serializer = self.serializer_class
@@ -199,3 +479,52 @@ class ReservationViewSet(viewsets.ModelViewSet):
             return ReservationListSerializer
 
         return serializer
+
+
+class TicketExportView(APIView):
+    """
+    Stream every ticket of the performances in a date range, joined with
+    performance, play, hall and user, as CSV or NDJSON
+    """
+
+    permission_classes = (IsAdminUser,)
+
+    def perform_content_negotiation(self, request, force=False):
+        # the body is not rendered, so Accept: text/csv must not fail,
+        # errors fall back to JSON
+        return super().perform_content_negotiation(request, force=True)
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name="date_from",
+                description="First show date (ex. ?date_from=2024-01-01)",
+                type=OpenApiTypes.DATE,
+            ),
+            OpenApiParameter(
+                name="date_to",
+                description="Last show date, inclusive",
+                type=OpenApiTypes.DATE,
+            ),
+        ],
+        responses={200: OpenApiTypes.BINARY},
+    )
+    def get(self, request, export_format):
+        serializer = TicketExportSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        date_from = serializer.validated_data.get("date_from")
+        date_to = serializer.validated_data.get("date_to")
+
+        content_type, stream = EXPORT_FORMATS[export_format]
+        rows = iter_export_rows(ticket_export_queryset(date_from, date_to))
+
+        response = StreamingHttpResponse(
+            stream(rows), content_type=content_type
+        )
+        filename = "-".join(
+            ["tickets"] + [str(date) for date in (date_from, date_to) if date]
+        )
+        response["Content-Disposition"] = (
+            f'attachment; filename="{filename}.{export_format}"'
+        )
+        return response
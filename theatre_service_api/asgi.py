@@ -9,8 +9,18 @@ https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
 
 import os
 
-from django.core.asgi import get_asgi_application
+import django
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "theatre_service_api.settings")
 
-application = get_asgi_application()
+# what get_asgi_application() does, with the handler streaming exports
+django.setup(set_prefix=False)
+
+from theatre_service_api.handlers import ASGIHandler  # noqa: E402
+
+django_application = ASGIHandler()
+
+# imported once Django is set up, it uses the ORM
+from theatre.streams import SeatStreamRouter  # noqa: E402
+
+application = SeatStreamRouter(django_application)
@@ -0,0 +1,58 @@
+from asgiref.sync import sync_to_async
+from django.core.handlers import asgi
+
+# next() of a streaming response, returned once it is exhausted
+END_OF_STREAM = object()
+
+
+def response_headers(response):
+    headers = [
+        (
+            header.encode("ascii") if isinstance(header, str) else header,
+            value.encode("latin1") if isinstance(value, str) else value,
+        )
+        for header, value in response.items()
+    ]
+    headers += [
+        (b"Set-Cookie", cookie.output(header="").encode("ascii").strip())
+        for cookie in response.cookies.values()
+    ]
+    return headers
+
+
+class ASGIHandler(asgi.ASGIHandler):
+    """
+    Django's ASGI handler, except that streaming responses are iterated
+    in the thread running sync views. Django 4.1 iterates them in the
+    event loop, where a generator reading the database (the ticket
+    export) fails with SynchronousOnlyOperation after the status and
+    first lines went out.
+    """
+
+    async def send_response(self, response, send):
+        if not response.streaming:
+            return await super().send_response(response, send)
+
+        await send(
+            {
+                "type": "http.response.start",
+                "status": response.status_code,
+                "headers": response_headers(response),
+            }
+        )
+        parts = iter(response)
+        next_part = sync_to_async(next, thread_sensitive=True)
+        while True:
+            part = await next_part(parts, END_OF_STREAM)
+            if part is END_OF_STREAM:
+                break
+            for chunk, _ in self.chunk_bytes(part):
+                await send(
+                    {
+                        "type": "http.response.body",
+                        "body": chunk,
+                        "more_body": True,
+                    }
+                )
+        await send({"type": "http.response.body"})
+        await sync_to_async(response.close, thread_sensitive=True)()
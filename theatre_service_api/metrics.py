@@ -0,0 +1,378 @@
+import asyncio
+import logging
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+
+from asgiref.sync import markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema
+from rest_framework import serializers
+from rest_framework.permissions import IsAdminUser
+from rest_framework.views import APIView
+
+from user.authentication import token_cache
+
+logger = logging.getLogger(__name__)
+
+# Prometheus' default buckets, in seconds
+DURATION_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100)
+
+# route label of requests no URL pattern matched
+UNMATCHED_ROUTE = "unmatched"
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# timing of the request being handled, seen by the query wrapper in
+# whichever thread runs its queries
+request_timing = ContextVar("request_timing", default=None)
+
+
+class RequestTiming:
+    __slots__ = (
+        "start",
+        "db_time",
+        "db_queries",
+        "serialize_time",
+        "serializing",
+        "render_time",
+    )
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.db_time = 0.0
+        self.db_queries = 0
+        self.serialize_time = 0.0
+        self.serializing = False
+        self.render_time = 0.0
+
+
+def time_query(execute, sql, params, many, context):
+    timing = request_timing.get()
+    if timing is None:
+        return execute(sql, params, many, context)
+
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timing.db_time += time.perf_counter() - start
+        timing.db_queries += 1
+
+
+class SerializerTimingMixin:
+    """
+    Count the time a serializer spends building its representation as
+    the request's serialize time, minus the queries it runs. Nested
+    serializers are counted once, in the outermost one.
+    """
+
+    def to_representation(self, instance):
+        timing = request_timing.get()
+        if timing is None or timing.serializing:
+            return super().to_representation(instance)
+
+        timing.serializing = True
+        db_time = timing.db_time
+        start = time.perf_counter()
+        try:
+            return super().to_representation(instance)
+        finally:
+            timing.serialize_time += (
+                time.perf_counter() - start - (timing.db_time - db_time)
+            )
+            timing.serializing = False
+
+
+class TimedModelSerializer(SerializerTimingMixin, serializers.ModelSerializer):
+    pass
+
+
+def install_query_timer(connection, **kwargs):
+    if time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(time_query)
+
+
+# connections opened later, by any thread
+connection_created.connect(install_query_timer)
+
+
+def format_labels(labels):
+    return ",".join(
+        '{}="{}"'.format(
+            name,
+            str(value)
+            .replace("\\", "\\\\")
+            .replace('"', '\\"')
+            .replace("\n", "\\n"),
+        )
+        for name, value in labels
+    )
+
+
+class Histogram:
+    """Prometheus histogram, one series per label set"""
+
+    def __init__(self, name, documentation, buckets):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(buckets)
+        # labels -> count per bucket, count above the last one, sum
+        self.series = {}
+
+    def observe(self, labels, value):
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = [0] * (len(self.buckets) + 1)
+            series.append(0.0)
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def exposition(self):
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} histogram",
+        ]
+        for labels, series in sorted(self.series.items()):
+            label_text = format_labels(labels)
+            count = 0
+            for bound, bucket_count in zip(
+                self.buckets + ("+Inf",), series[:-1]
+            ):
+                count += bucket_count
+                lines.append(
+                    f'{self.name}_bucket{{{label_text},le="{bound}"}} {count}'
+                )
+            lines.append(f"{self.name}_sum{{{label_text}}} {series[-1]}")
+            lines.append(f"{self.name}_count{{{label_text}}} {count}")
+        return lines
+
+
+class Counter:
+    """Prometheus counter, one value per label set"""
+
+    def __init__(self, name, documentation):
+        self.name = name
+        self.documentation = documentation
+        self.values = {}
+
+    def inc(self, labels, amount=1):
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def exposition(self):
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} counter",
+        ]
+        for labels, value in sorted(self.values.items()):
+            lines.append(f"{self.name}{{{format_labels(labels)}}} {value}")
+        return lines
+
+
+class RequestMetrics:
+    """Request metrics of this process, by route"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        with self.lock:
+            self.requests = Counter(
+                "http_requests_total", "Requests handled, by status code."
+            )
+            self.duration = Histogram(
+                "http_request_duration_seconds",
+                "Wall time of the request.",
+                DURATION_BUCKETS,
+            )
+            self.db_duration = Histogram(
+                "http_request_db_duration_seconds",
+                "Time the request spent in SQL queries.",
+                DURATION_BUCKETS,
+            )
+            self.db_queries = Histogram(
+                "http_request_db_queries",
+                "SQL queries run by the request.",
+                QUERY_BUCKETS,
+            )
+            self.serialize_duration = Histogram(
+                "http_request_serialize_duration_seconds",
+                "Time serializers spent building the response data.",
+                DURATION_BUCKETS,
+            )
+            self.render_duration = Histogram(
+                "http_request_render_duration_seconds",
+                "Time spent rendering the response body.",
+                DURATION_BUCKETS,
+            )
+
+    def observe(self, route, method, status, duration, timing):
+        labels = (("route", route), ("method", method))
+        with self.lock:
+            self.requests.inc(labels + (("status", str(status)),))
+            self.duration.observe(labels, duration)
+            self.db_duration.observe(labels, timing.db_time)
+            self.db_queries.observe(labels, timing.db_queries)
+            self.serialize_duration.observe(labels, timing.serialize_time)
+            self.render_duration.observe(labels, timing.render_time)
+
+    def exposition(self):
+        with self.lock:
+            lines = [
+                line
+                for metric in (
+                    self.requests,
+                    self.duration,
+                    self.db_duration,
+                    self.db_queries,
+                    self.serialize_duration,
+                    self.render_duration,
+                )
+                for line in metric.exposition()
+            ]
+
+        stats = token_cache.stats()
+        size = stats.pop("size")
+        lines += [
+            "# HELP token_auth_cache_lookups_total "
+            "Token lookups of this process, by where they were answered.",
+            "# TYPE token_auth_cache_lookups_total counter",
+        ]
+        lines += [
+            f'token_auth_cache_lookups_total{{result="{result}"}} {count}'
+            for result, count in sorted(stats.items())
+        ]
+        lines += [
+            "# HELP token_auth_cache_entries "
+            "Tokens cached in this process.",
+            "# TYPE token_auth_cache_entries gauge",
+            f"token_auth_cache_entries {size}",
+        ]
+        return "\n".join(lines) + "\n"
+
+
+metrics = RequestMetrics()
+
+
+class RequestMetricsMiddleware:
+    """
+    Time every request: wall time, SQL queries and their time, the time
+    serializers build the response data in (SerializerTimingMixin) and
+    the time rendering the response. Timings go to the Server-Timing header,
+    a log line and the histograms served by MetricsView.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.REQUEST_METRICS:
+            raise MiddlewareNotUsed
+
+        self.get_response = get_response
+        self.is_async = asyncio.iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+        # connections opened before connection_created was connected
+        for connection in connections.all(initialized_only=True):
+            install_query_timer(connection)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+
+        timing = RequestTiming()
+        token = request_timing.set(timing)
+        try:
+            response = self.get_response(request)
+        finally:
+            request_timing.reset(token)
+        self.record(request, response, timing)
+        return response
+
+    async def __acall__(self, request):
+        timing = RequestTiming()
+        token = request_timing.set(timing)
+        try:
+            response = await self.get_response(request)
+        finally:
+            request_timing.reset(token)
+        self.record(request, response, timing)
+        return response
+
+    def process_template_response(self, request, response):
+        timing = request_timing.get()
+        if timing is not None:
+            start = time.perf_counter()
+
+            def rendered(response):
+                timing.render_time += time.perf_counter() - start
+
+            response.add_post_render_callback(rendered)
+        return response
+
+    def record(self, request, response, timing):
+        duration = time.perf_counter() - timing.start
+        match = request.resolver_match
+        route = match.view_name if match else UNMATCHED_ROUTE
+        app_time = max(
+            duration
+            - timing.db_time
+            - timing.serialize_time
+            - timing.render_time,
+            0,
+        )
+
+        response["Server-Timing"] = (
+            f"db;dur={timing.db_time * 1000:.1f};"
+            f'desc="{timing.db_queries} queries", '
+            f"serialize;dur={timing.serialize_time * 1000:.1f}, "
+            f"render;dur={timing.render_time * 1000:.1f}, "
+            f"app;dur={app_time * 1000:.1f}, "
+            f"total;dur={duration * 1000:.1f}"
+        )
+        metrics.observe(
+            route, request.method, response.status_code, duration, timing
+        )
+
+        if logger.isEnabledFor(logging.INFO):
+            fields = {
+                "route": route,
+                "method": request.method,
+                "status": response.status_code,
+                "total_ms": round(duration * 1000, 1),
+                "db_ms": round(timing.db_time * 1000, 1),
+                "db_queries": timing.db_queries,
+                "serialize_ms": round(timing.serialize_time * 1000, 1),
+                "render_ms": round(timing.render_time * 1000, 1),
+                "app_ms": round(app_time * 1000, 1),
+            }
+            logger.info(
+                " ".join(f"{name}={value}" for name, value in fields.items()),
+                extra={"metrics": fields},
+            )
+
+
+class MetricsView(APIView):
+    """Request metrics of this process in the Prometheus text format"""
+
+    permission_classes = (IsAdminUser,)
+    # scraped every few seconds, it must not use up the user's quota
+    throttle_classes = ()
+
+    @extend_schema(responses={200: OpenApiTypes.STR})
+    def get(self, request):
+        return HttpResponse(
+            metrics.exposition(), content_type=PROMETHEUS_CONTENT_TYPE
+        )
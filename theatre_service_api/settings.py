@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 import os
+from datetime import timedelta
 from pathlib import Path
 from dotenv import load_dotenv
 load_dotenv()
@@ -37,6 +38,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "rest_framework",
     "drf_spectacular",
     "theatre",
@@ -50,7 +52,13 @@ MEDIA_URL = "/media/"
 
 AUTH_USER_MODEL = "user.User"
 
+# How long seats stay held for a user finishing a reservation
+SEAT_HOLD_TTL_SECONDS = int(os.getenv("SEAT_HOLD_TTL_SECONDS", 300))
+# Seats a user may hold for one performance at once
+MAX_HELD_SEATS = int(os.getenv("MAX_HELD_SEATS", 10))
+
 MIDDLEWARE = [
+    "theatre_service_api.metrics.RequestMetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -92,9 +100,127 @@ DATABASES = {
         "PASSWORD": os.getenv("POSTGRES_PASSWORD"),
         "HOST": os.getenv("POSTGRES_HOST"),
         "PORT": os.getenv("POSTGRES_PORT"),
+        # Keep connections open between requests, checked before reuse.
+        # Under ASGI every request runs in a new thread that cannot reuse
+        # them, set CONN_MAX_AGE=0 there
+        "CONN_MAX_AGE": int(os.getenv("CONN_MAX_AGE", 60)),
+        "CONN_HEALTH_CHECKS": True,
+    }
+}
+
+# Behind a pooler in transaction mode (pgbouncer pool_mode=transaction)
+# consecutive transactions of one connection may run on different
+# server connections. Server-side cursors outlive their transaction, so
+# they are turned off. Reservations lock and write within one atomic
+# block and are unaffected. Give the database role timezone='UTC' so
+# Django never needs a session-level SET TIME ZONE
+
+if os.getenv("DB_TRANSACTION_POOLING", "false").lower() == "true":
+    DATABASES["default"]["DISABLE_SERVER_SIDE_CURSORS"] = True
+
+# Local runs without PostgreSQL, e.g. manage.py benchmark_api:
+# SQLITE_PATH points the default database to an SQLite file
+
+if os.getenv("SQLITE_PATH"):
+    DATABASES["default"] = {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": os.getenv("SQLITE_PATH"),
+    }
+
+# Cache
+# Local memory by default, point CACHE_BACKEND/CACHE_LOCATION
+# to a file-based or Redis cache shared by all workers in production
+
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv(
+            "CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": os.getenv("CACHE_LOCATION", ""),
     }
 }
 
+# Serve play and performance reads with async views, for the ASGI
+# deployment (uvicorn). Leave off under WSGI
+
+ASYNC_VIEWS = os.getenv("ASYNC_VIEWS", "false").lower() == "true"
+
+# Threads per process resizing uploaded play images, 0 resizes them
+# in the request once the upload is saved
+
+IMAGE_PROCESSING_WORKERS = int(os.getenv("IMAGE_PROCESSING_WORKERS", 2))
+
+# Seconds a catalog response is kept if nothing in the catalog changes
+CATALOG_CACHE_TIMEOUT = int(os.getenv("CATALOG_CACHE_TIMEOUT", 60 * 60))
+
+# Seconds the tickets_available of the materialized daily schedule
+# (performance lists by date or play) may lag behind sales
+
+SCHEDULE_AVAILABILITY_TTL = int(os.getenv("SCHEDULE_AVAILABILITY_TTL", 5))
+
+# Seat availability streams (/performances/{id}/seats/stream, ASGI only).
+# The local broker reaches streams of the same process, use
+# theatre.seat_events.RedisBroker when several processes sell seats
+
+SEAT_EVENTS_BROKER = os.getenv(
+    "SEAT_EVENTS_BROKER", "theatre.seat_events.LocalBroker"
+)
+SEAT_EVENTS_REDIS_URL = os.getenv("SEAT_EVENTS_REDIS_URL", "")
+SEAT_STREAM_KEEPALIVE = int(os.getenv("SEAT_STREAM_KEEPALIVE", 15))
+
+# Request metrics: Server-Timing headers, a log line per request at
+# INFO and histograms by route served to admins at /api/metrics/.
+# Each process keeps its own, scrape every worker. The log lines are
+# only written with REQUEST_METRICS_LOG_LEVEL=INFO
+
+REQUEST_METRICS = os.getenv("REQUEST_METRICS", "true").lower() == "true"
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        "theatre_service_api.metrics": {
+            "handlers": ["console"],
+            "level": os.getenv("REQUEST_METRICS_LOG_LEVEL", "WARNING"),
+            "propagate": False,
+        },
+    },
+}
+
+# Cache alias holding the throttle counters. It must be shared by all
+# workers (Redis) for limits to hold across processes
+
+THROTTLE_CACHE = os.getenv("THROTTLE_CACHE", "default")
+
+# Token authentication cache: seconds a token stays cached, entries per
+# process, optional cache alias shared between processes. Without the
+# shared cache each process keeps its own entries and a deleted token or
+# a deactivated user is only refused by the other processes once their
+# entry expires, up to TIMEOUT seconds later
+
+TOKEN_AUTH_CACHE = {
+    "TIMEOUT": int(os.getenv("TOKEN_AUTH_CACHE_TIMEOUT", 60)),
+    "MAX_SIZE": int(os.getenv("TOKEN_AUTH_CACHE_MAX_SIZE", 10000)),
+    "SHARED_CACHE": os.getenv("TOKEN_AUTH_SHARED_CACHE"),
+}
+
+# JWT: access tokens are trusted without a user lookup, so keep them
+# short lived. Refreshing reloads the user, so deactivation and is_staff
+# changes apply once the current access token expires
+
+SIMPLE_JWT = {
+    "ACCESS_TOKEN_LIFETIME": timedelta(
+        minutes=int(os.getenv("JWT_ACCESS_TOKEN_MINUTES", 5))
+    ),
+    "REFRESH_TOKEN_LIFETIME": timedelta(
+        days=int(os.getenv("JWT_REFRESH_TOKEN_DAYS", 1))
+    ),
+    "AUTH_HEADER_TYPES": ("Bearer",),
+}
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -135,16 +261,25 @@ STATIC_URL = "static/"
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 REST_FRAMEWORK = {
-    "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.LimitOffsetPagination",
+    "DEFAULT_PAGINATION_CLASS": "theatre.pagination.TheatrePagination",
     "PAGE_SIZE": 5,
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
+    "DEFAULT_AUTHENTICATION_CLASSES": [
+        "user.authentication.CachedTokenAuthentication",
+        "rest_framework_simplejwt.authentication."
+        "JWTStatelessUserAuthentication",
+    ],
     "DEFAULT_THROTTLE_CLASSES": [
-        "rest_framework.throttling.AnonRateThrottle",
-        "rest_framework.throttling.UserRateThrottle"
+        "theatre.throttling.AnonRateThrottle",
+        "theatre.throttling.UserRateThrottle",
+        "theatre.throttling.ScopedRateThrottle",
     ],
     "DEFAULT_THROTTLE_RATES": {
         "anon": "100/day",
-        "user": "1000/day"
+        "user": "1000/day",
+        "catalog": "10000/day",
+        "reservations": "50/hour",
+        "login": "10/min",
     }
 }
 
@@ -0,0 +1,201 @@
+import threading
+import time
+from collections import OrderedDict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.utils.translation import gettext as _
+from rest_framework import exceptions
+from rest_framework.authentication import (
+    TokenAuthentication,
+    get_authorization_header,
+)
+from rest_framework.authtoken.models import Token
+from rest_framework_simplejwt.authentication import (
+    JWTStatelessUserAuthentication,
+)
+
+SNAPSHOT_FIELDS = ("id", "email", "is_staff", "is_superuser", "is_active")
+
+
+class TokenCache:
+    """
+    Map token keys to minimal user snapshots (TOKEN_AUTH_CACHE settings).
+    With a shared cache configured the snapshots live there alone, so
+    invalidate() revokes a token in every process at once. Without one
+    they sit in an in-process LRU with TTL.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+        self.counters = {"local_hits": 0, "shared_hits": 0, "misses": 0}
+
+    @property
+    def config(self):
+        return settings.TOKEN_AUTH_CACHE
+
+    @property
+    def shared_cache(self):
+        alias = self.config.get("SHARED_CACHE")
+        return caches[alias] if alias else None
+
+    @staticmethod
+    def shared_key(key):
+        return f"auth:token:{key}"
+
+    def get(self, key):
+        shared_cache = self.shared_cache
+        if shared_cache is None:
+            snapshot = self.get_local(key)
+        else:
+            snapshot = shared_cache.get(self.shared_key(key))
+            if snapshot is not None:
+                with self.lock:
+                    self.counters["shared_hits"] += 1
+
+        if snapshot is None:
+            with self.lock:
+                self.counters["misses"] += 1
+        return snapshot
+
+    def get_local(self, key):
+        """
+        Snapshot cached in this process, never touches the shared cache.
+        Nothing is cached in-process when a shared cache is configured.
+        """
+        now = time.monotonic()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                expires_at, snapshot = entry
+                if expires_at > now:
+                    self.entries.move_to_end(key)
+                    self.counters["local_hits"] += 1
+                    return snapshot
+                del self.entries[key]
+        return None
+
+    def set(self, key, snapshot):
+        shared_cache = self.shared_cache
+        if shared_cache is not None:
+            shared_cache.set(
+                self.shared_key(key), snapshot, self.config["TIMEOUT"]
+            )
+            return
+
+        with self.lock:
+            self.entries[key] = (
+                time.monotonic() + self.config["TIMEOUT"],
+                snapshot,
+            )
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.config["MAX_SIZE"]:
+                self.entries.popitem(last=False)
+
+    def invalidate(self, keys):
+        keys = list(keys)
+        with self.lock:
+            for key in keys:
+                self.entries.pop(key, None)
+        if self.shared_cache is not None:
+            self.shared_cache.delete_many(
+                [self.shared_key(key) for key in keys]
+            )
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            for name in self.counters:
+                self.counters[name] = 0
+
+    def stats(self):
+        with self.lock:
+            return {**self.counters, "size": len(self.entries)}
+
+
+token_cache = TokenCache()
+
+
+def user_from_snapshot(snapshot):
+    """
+    Unsaved-looking User carrying only the snapshot fields,
+    good for permission checks and filtering by user.
+    Load the real user before changing and saving it.
+    """
+    user = get_user_model()(**snapshot)
+    user._state.adding = False
+    return user
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """TokenAuthentication that skips the Token + User query on cache hits"""
+
+    async def aauthenticate(self, request):
+        """
+        authenticate() for async views: a token cached in this process is
+        resolved in the event loop, anything else in a worker thread
+        """
+        auth = get_authorization_header(request).split()
+        if len(auth) == 2 and auth[0].lower() == self.keyword.lower().encode():
+            key = auth[1].decode(errors="replace")
+            snapshot = token_cache.get_local(key)
+            if snapshot is not None:
+                return self.authenticate_snapshot(snapshot, key)
+
+        return await sync_to_async(self.authenticate)(request)
+
+    def authenticate_credentials(self, key):
+        snapshot = token_cache.get(key)
+
+        if snapshot is None:
+            try:
+                token = Token.objects.select_related("user").get(key=key)
+            except Token.DoesNotExist:
+                raise exceptions.AuthenticationFailed(_("Invalid token."))
+
+            snapshot = {
+                field: getattr(token.user, field) for field in SNAPSHOT_FIELDS
+            }
+            token_cache.set(key, snapshot)
+
+        return self.authenticate_snapshot(snapshot, key)
+
+    @staticmethod
+    def authenticate_snapshot(snapshot, key):
+        if not snapshot["is_active"]:
+            raise exceptions.AuthenticationFailed(
+                _("User inactive or deleted.")
+            )
+
+        return user_from_snapshot(snapshot), key
+
+
+async def aauthenticate(request):
+    """
+    Run the authenticators of a DRF request from an async view.
+    Stateless JWTs need no I/O, cached tokens use aauthenticate(),
+    any other authenticator runs in a worker thread.
+    """
+    for authenticator in request.authenticators:
+        try:
+            if hasattr(authenticator, "aauthenticate"):
+                user_auth = await authenticator.aauthenticate(request)
+            elif isinstance(authenticator, JWTStatelessUserAuthentication):
+                user_auth = authenticator.authenticate(request)
+            else:
+                user_auth = await sync_to_async(authenticator.authenticate)(
+                    request
+                )
+        except exceptions.APIException:
+            request._not_authenticated()
+            raise
+
+        if user_auth is not None:
+            request._authenticator = authenticator
+            request.user, request.auth = user_auth
+            return
+
+    request._not_authenticated()
@@ -0,0 +1,86 @@
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.authentication import (
+    JWTStatelessUserAuthentication,
+)
+
+from user.authentication import CachedTokenAuthentication, token_cache
+from user.serializers import JWTObtainPairSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare per-request authentication cost of DB tokens, cached "
+        "tokens and stateless JWTs. The benchmark user is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        count = options["requests"]
+        factory = APIRequestFactory()
+
+        with transaction.atomic():
+            user = get_user_model().objects.create_user(
+                email="benchmark-auth@example.com", password="benchmark"
+            )
+            token = Token.objects.create(user=user)
+            access = JWTObtainPairSerializer.get_token(user).access_token
+
+            token_header = f"Token {token.key}"
+            jwt_header = f"Bearer {access}"
+            token_auth = CachedTokenAuthentication()
+            jwt_auth = JWTStatelessUserAuthentication()
+
+            def cold_token():
+                token_cache.clear()
+                return token_auth, token_header
+
+            def cached_token():
+                return token_auth, token_header
+
+            def jwt():
+                return jwt_auth, jwt_header
+
+            token_cache.clear()
+            for name, setup in (
+                ("token (uncached)", cold_token),
+                ("token (cached)", cached_token),
+                ("jwt (stateless)", jwt),
+            ):
+                timings, queries = self.run(factory, setup, count)
+                timings.sort()
+                self.stdout.write(
+                    f"{name:<18} "
+                    f"p50 {statistics.median(timings):.1f}us, "
+                    f"p95 {timings[int(len(timings) * 0.95) - 1]:.1f}us, "
+                    f"{queries / count:.2f} queries/request"
+                )
+
+            token_cache.clear()
+            transaction.set_rollback(True)
+
+    @staticmethod
+    def run(factory, setup, count):
+        timings = []
+        with CaptureQueriesContext(connection) as captured:
+            for _ in range(count):
+                authenticator, header = setup()
+                request = Request(
+                    factory.get(
+                        "/api/theatre/plays/", HTTP_AUTHORIZATION=header
+                    )
+                )
+                started = time.perf_counter()
+                authenticator.authenticate(request)
+                timings.append((time.perf_counter() - started) * 1_000_000)
+        return timings, len(captured)
@@ -1,9 +1,17 @@
 from django.contrib.auth import get_user_model, authenticate
 from rest_framework import serializers
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.serializers import (
+    TokenObtainPairSerializer,
+    TokenRefreshSerializer,
+)
+from rest_framework_simplejwt.settings import api_settings
 from django.utils.translation import gettext as _
 
+from theatre_service_api.metrics import TimedModelSerializer
 
-class UserSerializer(serializers.ModelSerializer):
+
+class UserSerializer(TimedModelSerializer):
     class Meta:
         model = get_user_model()
         fields = ("id", "email", "password", "is_staff")
@@ -72,3 +80,55 @@ class AuthTokenSerializer(serializers.Serializer):
 
         attrs["user"] = user
         return attrs
+
+
+class JWTObtainPairSerializer(TokenObtainPairSerializer):
+    @classmethod
+    def get_token(cls, user):
+        """Carry the permission flags so requests need no user lookup."""
+        token = super().get_token(user)
+        token["is_staff"] = user.is_staff
+        token["is_superuser"] = user.is_superuser
+        return token
+
+
+class JWTRefreshSerializer(TokenRefreshSerializer):
+    """
+    Refresh that reloads the user: inactive users get no new access
+    token, and the permission flags come from the database rather than
+    from the refresh token
+    """
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs["refresh"])
+        user_id = refresh[api_settings.USER_ID_CLAIM]
+
+        user = (
+            get_user_model()
+            .objects.filter(**{api_settings.USER_ID_FIELD: user_id})
+            .only("is_active", "is_staff", "is_superuser")
+            .first()
+        )
+        if user is None or not user.is_active:
+            raise AuthenticationFailed(
+                _("User not found or inactive."), code="user_inactive"
+            )
+        refresh["is_staff"] = user.is_staff
+        refresh["is_superuser"] = user.is_superuser
+
+        data = {"access": str(refresh.access_token)}
+
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            if api_settings.BLACKLIST_AFTER_ROTATION:
+                try:
+                    refresh.blacklist()
+                except AttributeError:
+                    # the blacklist app is not installed
+                    pass
+
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            data["refresh"] = str(refresh)
+
+        return data
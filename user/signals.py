@@ -0,0 +1,22 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from user.authentication import token_cache
+
+
+@receiver(post_save, sender=Token)
+@receiver(post_delete, sender=Token)
+def token_changed(sender, instance, **kwargs):
+    """Logout and token rotation drop the cached token"""
+    token_cache.invalidate([instance.key])
+
+
+@receiver(post_save, sender=get_user_model())
+def user_changed(sender, instance, raw=False, **kwargs):
+    """Keep is_staff/is_active of cached snapshots current"""
+    if not raw:
+        token_cache.invalidate(
+            Token.objects.filter(user=instance).values_list("key", flat=True)
+        )
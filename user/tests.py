@@ -1,3 +1,210 @@
-from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
 
-# Create your tests here.
+from theatre.models import Reservation
+from theatre.tests.tests_reservation_api import sample_performance
+from user.authentication import token_cache
+
+ME_URL = reverse("user:manage_user")
+GENRE_URL = reverse("theatre:genre-list")
+TOKEN_URL = reverse("user:token_obtain_pair")
+TOKEN_REFRESH_URL = reverse("user:token_refresh")
+TOKEN_VERIFY_URL = reverse("user:token_verify")
+RESERVATION_URL = reverse("theatre:reservation-list")
+
+
+class CachedTokenAuthenticationTests(TestCase):
+    def setUp(self):
+        token_cache.clear()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com", password="testpassword"
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+
+    def test_token_is_looked_up_once(self):
+        self.client.get(ME_URL)
+
+        with self.assertNumQueries(1):
+            res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["email"], "test@test.com")
+        self.assertEqual(token_cache.stats()["local_hits"], 1)
+        self.assertEqual(token_cache.stats()["misses"], 1)
+
+    def test_deleted_token_is_rejected(self):
+        self.client.get(ME_URL)
+
+        self.token.delete()
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivated_user_is_rejected(self):
+        self.client.get(ME_URL)
+
+        self.user.is_active = False
+        self.user.save()
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_staff_change_is_picked_up(self):
+        res = self.client.post(GENRE_URL, {"name": "Drama"})
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+        self.user.is_staff = True
+        self.user.save()
+        res = self.client.post(GENRE_URL, {"name": "Drama"})
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+    @override_settings(
+        TOKEN_AUTH_CACHE={
+            "TIMEOUT": 60,
+            "MAX_SIZE": 100,
+            "SHARED_CACHE": "default",
+        }
+    )
+    def test_revocation_by_another_process(self):
+        self.client.get(ME_URL)
+        res = self.client.get(ME_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(token_cache.stats()["shared_hits"], 1)
+        self.assertEqual(token_cache.stats()["size"], 0)
+
+        # what user_changed does in the process saving the user
+        get_user_model().objects.filter(pk=self.user.pk).update(
+            is_active=False
+        )
+        cache.delete(token_cache.shared_key(self.token.key))
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_update_me_keeps_password(self):
+        self.client.get(ME_URL)
+
+        res = self.client.patch(ME_URL, {"email": "new@test.com"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.email, "new@test.com")
+        self.assertTrue(self.user.check_password("testpassword"))
+
+
+class JWTAuthenticationTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com", password="testpassword"
+        )
+        self.client = APIClient()
+
+    def login(self):
+        res = self.client.post(
+            TOKEN_URL, {"email": "test@test.com", "password": "testpassword"}
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {res.data['access']}"
+        )
+        return res.data
+
+    def test_obtain_refresh_and_verify(self):
+        tokens = self.login()
+
+        res = self.client.post(TOKEN_VERIFY_URL, {"token": tokens["access"]})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        res = self.client.post(
+            TOKEN_REFRESH_URL, {"refresh": tokens["refresh"]}
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn("access", res.data)
+
+    def test_wrong_password_is_rejected(self):
+        res = self.client.post(
+            TOKEN_URL, {"email": "test@test.com", "password": "wrong"}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_catalog_request_needs_no_queries(self):
+        self.login()
+        self.client.get(GENRE_URL)
+
+        with self.assertNumQueries(0):
+            res = self.client.get(GENRE_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_staff_claim_grants_admin_access(self):
+        self.user.is_staff = True
+        self.user.save()
+        self.login()
+
+        res = self.client.post(GENRE_URL, {"name": "Drama"})
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+    def test_refresh_reloads_demoted_user(self):
+        self.user.is_staff = True
+        self.user.save()
+        tokens = self.login()
+        self.user.is_staff = False
+        self.user.save()
+
+        res = self.client.post(
+            TOKEN_REFRESH_URL, {"refresh": tokens["refresh"]}
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {res.data['access']}"
+        )
+
+        res = self.client.post(GENRE_URL, {"name": "Drama"})
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_refresh_rejects_inactive_user(self):
+        tokens = self.login()
+        self.user.is_active = False
+        self.user.save()
+
+        res = self.client.post(
+            TOKEN_REFRESH_URL, {"refresh": tokens["refresh"]}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_reservations_with_jwt(self):
+        performance = sample_performance()
+        self.login()
+
+        res = self.client.post(
+            RESERVATION_URL,
+            {
+                "tickets": [
+                    {"row": 1, "seat": 1, "performance": performance.id}
+                ]
+            },
+            format="json",
+        )
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Reservation.objects.get().user, self.user)
+
+        res = self.client.get(RESERVATION_URL)
+        self.assertEqual(len(res.data["results"]), 1)
+
+    def test_me_with_jwt(self):
+        self.login()
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.data["email"], "test@test.com")
@@ -1,9 +1,20 @@
 from django.urls import path
-from user.views import CreateUserView, CreateTokenView, ManageUserView
+from rest_framework_simplejwt.views import TokenVerifyView
+
+from user.views import (
+    CreateUserView,
+    CreateTokenView,
+    CreateJWTView,
+    ManageUserView,
+    RefreshJWTView,
+)
 
 urlpatterns = [
     path("register/", CreateUserView.as_view(), name="create"),
     path("login/", CreateTokenView.as_view(), name="get_token"),
+    path("token/", CreateJWTView.as_view(), name="token_obtain_pair"),
+    path("token/refresh/", RefreshJWTView.as_view(), name="token_refresh"),
+    path("token/verify/", TokenVerifyView.as_view(), name="token_verify"),
     path("me/", ManageUserView.as_view(), name="manage_user"),
 ]
 
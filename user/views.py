@@ -1,10 +1,20 @@
+from django.contrib.auth import get_user_model
 from rest_framework import generics
-from rest_framework.authentication import TokenAuthentication
 from rest_framework.authtoken.views import ObtainAuthToken
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.settings import api_settings
+from rest_framework_simplejwt.views import (
+    TokenObtainPairView,
+    TokenRefreshView,
+)
 
-from user.serializers import UserSerializer, AuthTokenSerializer
+from theatre.throttling import ScopedRateThrottle
+from user.serializers import (
+    UserSerializer,
+    AuthTokenSerializer,
+    JWTObtainPairSerializer,
+    JWTRefreshSerializer,
+)
 
 
 class CreateUserView(generics.CreateAPIView):
@@ -14,12 +24,24 @@ class CreateUserView(generics.CreateAPIView):
 class CreateTokenView(ObtainAuthToken):
     renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES
     serializer_class = AuthTokenSerializer
+    throttle_classes = (ScopedRateThrottle,)
+    throttle_scope = "login"
+
+
+class CreateJWTView(TokenObtainPairView):
+    serializer_class = JWTObtainPairSerializer
+    throttle_classes = (ScopedRateThrottle,)
+    throttle_scope = "login"
+
+
+class RefreshJWTView(TokenRefreshView):
+    serializer_class = JWTRefreshSerializer
 
 
 class ManageUserView(generics.RetrieveUpdateAPIView):
     serializer_class = UserSerializer
-    authentication_classes = (TokenAuthentication,)
     permission_classes = (IsAuthenticated,)
 
     def get_object(self):
-        return self.request.user
+        # request.user may be a cached snapshot, load the full user to edit
+        return get_user_model().objects.get(pk=self.request.user.pk)